@@ -1,17 +1,45 @@
-import requests
-import pytz
-from flask import Flask, request, jsonify
-from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
-from telegram.ext import ApplicationBuilder, CommandHandler, CallbackQueryHandler, ContextTypes, CallbackContext
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+from flask import Flask, Response, request, jsonify
 import pymongo
-from pymongo import MongoClient, ASCENDING, DESCENDING
+from pymongo import MongoClient, DESCENDING, ReturnDocument
 from dotenv import load_dotenv
 import os
+import atexit
+import asyncio
 import logging
-from datetime import datetime, date
-from apscheduler.schedulers.background import BackgroundScheduler
-import firebase_admin
-from firebase_admin import credentials, messaging
+import threading
+from uuid import uuid4
+from datetime import datetime, date, timedelta, timezone
+from src.db.async_collection import AsyncCollection, create_executor
+from src.db.indexes import UNIQUE_INDEXES, apply_indexes
+from src.leaderboard.ranking import RankingEngine
+from src.leaderboard.rank_lookup import RankLookup
+from src.leaderboard.cache import LeaderboardCache, RedisLeaderboardBackend
+from src.audit.writer import AuditLogWriter
+from src.ledger.transfers import TransferEngine, supports_transactions
+from src.notifications.fanout import NotificationFanout
+from src.notifications.senders import senders_from_env
+from src.cache.membership import MEMBER_STATUSES, MembershipCache
+from src.cache.profile import ProfileCache
+from src.metrics.instrumentation import (
+    MongoCommandTimer, instrument_flask, stats_collector, timed_handler, timed_job, track_handler
+)
+from src.referrals.graph import ReferralGraph
+from src.users.onboarding import UserOnboarder, new_user_document, read_jsonl
+from src.api.sync import SyncService
+from src.api.telegram_auth import validate_init_data
+from src.tasks.bulk_assign import CohortAssigner, check_cohort_filter
+from src.tasks.catalog import TaskCatalog
+from src.tasks.completion import TaskCompletion
+from src.tasks.store import UserTaskStore
+
+# Telegram, requests, APScheduler and Firebase are imported where they are used,
+# so importing this module (e.g. on a serverless cold start) stays cheap.
+if TYPE_CHECKING:
+    from telegram import Update
+    from telegram.ext import CallbackContext, ContextTypes
 
 # Load environment variables from .env file
 load_dotenv()
@@ -21,16 +49,17 @@ DB_NAME = os.getenv('DB_NAME', 'Cluster0')  # Use environment variable for datab
 
 
 # Set the webhook URL
-WEBHOOK_URL = "https://rebltasks.vercel.app/api/webhook"  # Your Vercel app URL
-
-# Set the webhook with Telegram API
-response = requests.post(
-    f"https://api.telegram.org/bot{TELEGRAM_BOT_TOKEN}/setWebhook",
-    json={"url": WEBHOOK_URL},
-)
-
-# Optional: Print response to verify if the webhook was set successfully
-print(response.json())
+WEBHOOK_URL = f"{os.getenv('WEBHOOK_URL', 'https://rebltasks.vercel.app')}/api/webhook"  # Your Vercel app URL
+# Telegram echoes this in X-Telegram-Bot-Api-Secret-Token; the webhooks reject requests without it
+WEBHOOK_SECRET = os.getenv('TELEGRAM_WEBHOOK_SECRET')
+# chat_member updates are opt-in; they keep the channel-membership cache fresh
+ALLOWED_UPDATES = ["message", "callback_query", "chat_member"]
+
+async def register_webhook(bot, url=WEBHOOK_URL, secret_token=WEBHOOK_SECRET):
+    """Point Telegram at the ASGI webhook (called from its lifespan; run_webhook registers itself)."""
+    result = await bot.set_webhook(url, allowed_updates=ALLOWED_UPDATES, secret_token=secret_token)
+    logging.info(f"setWebhook {url}: {result}")
+    return result
 
 def process_data(update: Update, context: CallbackContext):
     # Notify user that data is being processed
@@ -43,12 +72,19 @@ def process_data(update: Update, context: CallbackContext):
     update.message.reply_text("Data has been processed!")
 #Flask setup
 app = Flask(__name__)
+instrument_flask(app)
+
+@app.before_request
+def ensure_initialized():
+    """Connect to MongoDB lazily on the first request."""
+    init()
 
 @app.route('/tasks', methods=['GET'])
 def get_tasks():
-    """Get all available tasks."""
-    tasks = list(tasks_collection.find())  # Fetch tasks from MongoDB
-    return jsonify(tasks)
+    """List available tasks a page at a time (?after=<next_cursor>&limit=<n>), served from memory."""
+    after = request.args.get('after')
+    limit = request.args.get('limit', 100, type=int)
+    return Response(task_catalog.iter_page_json(after, limit), mimetype='application/json')
 
 @app.route('/assign_task', methods=['POST'])
 def assign_task():
@@ -61,6 +97,43 @@ def assign_task():
     except Exception as e:
         return jsonify({"message": str(e)}), 400
 
+@app.route('/assign_task/bulk', methods=['POST'])
+def assign_task_bulk_api():
+    """Start assigning a task to a cohort ({"task_id", "user_ids"} or {"task_id", "cohort"})."""
+    data = request.json
+    try:
+        run_id = assign_task_bulk(
+            data["task_id"],
+            user_ids=data.get("user_ids"),
+            cohort=check_cohort_filter(data["cohort"]) if "cohort" in data else None,
+            run_id=data.get("run_id")
+        )
+    except (KeyError, ValueError) as e:
+        return jsonify({"message": str(e)}), 400
+    return jsonify({"run_id": run_id, "status": f"/assign_task/bulk/{run_id}"}), 202
+
+@app.route('/assign_task/bulk/<run_id>', methods=['GET'])
+def assign_task_bulk_status(run_id):
+    """Progress of a bulk assignment run."""
+    run = db['assignment_runs'].find_one({"_id": run_id}, {"started_at": 0, "finished_at": 0})
+    if not run:
+        return jsonify({"message": "Unknown run."}), 404
+    return jsonify(run), 200
+
+@app.route('/complete_tasks/batch', methods=['POST'])
+def complete_tasks_batch_api():
+    """Complete a batch of verified tasks: {"completions": [[user_id, task_id], ...]}."""
+    data = request.get_json(silent=True)
+    completions = data.get("completions", []) if isinstance(data, dict) else None
+    if not isinstance(completions, list):
+        return jsonify({"message": "completions must be a list of [user_id, task_id] pairs."}), 400
+    report = complete_tasks_batch(completions)
+    return jsonify({
+        "completed": report["completed"],
+        "rejected": [list(item) for item in report["rejected"]],
+        "duration_ms": report["duration_ms"]
+    }), 200
+
 @app.route('/claim_reward', methods=['POST'])
 def claim_reward():
     """Claim daily reward for a user."""
@@ -75,7 +148,10 @@ def send_notification_api():
     """Trigger a notification to a user."""
     user_id = request.json.get("user_id")
     message = request.json.get("message")
-    user = users_collection.find_one({"user_id": user_id})
+    user = users_collection.find_one(
+        {"user_id": user_id},
+        {"_id": 0, "email": 1, "phone_number": 1, "device_token": 1}
+    )
     if user:
         user_email = user.get("email")
         user_phone = user.get("phone_number")
@@ -86,9 +162,6 @@ def send_notification_api():
     else:
         return jsonify({"message": "User not found."}), 400
 
-if __name__ == '__main__':
-    app.run(debug=True)
-
 # Set up logging
 logging.basicConfig(
     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
@@ -96,38 +169,164 @@ logging.basicConfig(
 )
 
 
-# Ensure Telegram Bot Token is provided
-if not TELEGRAM_BOT_TOKEN:
-    logging.critical("No Telegram Bot Token found. Please check your .env file.")
-    exit(1)
-
-# MongoDB connection handling
-try:
-    client = MongoClient(MONGO_URI, serverSelectionTimeoutMS=5000)
-    client.admin.command('ping')  # Test connection
-    db = client[DB_NAME]
-    users_collection = db['users']
-    tasks_collection = db['tasks']
-    logs_collection = db['audit_logs']
-    logging.info(f"Successfully connected to MongoDB database: {DB_NAME}")
-except pymongo.errors.PyMongoError as e:
-    logging.critical(f"Failed to connect to MongoDB: {e}")
-    exit(1)
+### Startup ###
+
+# Shared clients and services; created by init() on first use.
+client = db = None
+users_collection = tasks_collection = logs_collection = None
+task_store = task_catalog = cohort_assigner = task_completion = None
+referral_graph = user_onboarder = None
+mongo_executor = users_async = None
+audit_writer = transfer_engine = None
+ranking_engine = rank_lookup = leaderboard_cache = profile_cache = None
+sync_service = None
+notification_senders = reminder_fanout = None
+scheduler = None
+application = update_processor = None
+send_queue = None
+
+_init_lock = threading.Lock()
+_initialized = False
+
+def _redis_client():
+    """Shared Redis connection for the cache tiers, if REDIS_URL is configured."""
+    if not os.getenv('REDIS_URL'):
+        return None
+    import redis
+    return redis.Redis.from_url(os.getenv('REDIS_URL'))
+
+def init(mongo_client=None, use_transactions=None):
+    """Connect to MongoDB and build the shared services. Safe to call repeatedly."""
+    global client, db, users_collection, tasks_collection, logs_collection
+    global task_store, task_catalog, cohort_assigner, task_completion, referral_graph
+    global user_onboarder
+    global mongo_executor, users_async, audit_writer, transfer_engine
+    global ranking_engine, rank_lookup, leaderboard_cache, profile_cache, sync_service
+    global notification_senders, reminder_fanout
+    global _initialized
+    if _initialized:
+        return
+    with _init_lock:
+        if _initialized:
+            return
+        # MongoDB connection handling
+        try:
+            if mongo_client is None:
+                mongo_client = MongoClient(
+                    MONGO_URI,
+                    serverSelectionTimeoutMS=5000,
+                    event_listeners=[MongoCommandTimer()]
+                )
+                mongo_client.admin.command('ping')  # Test connection
+            if use_transactions is None:
+                use_transactions = supports_transactions(mongo_client)
+        except pymongo.errors.PyMongoError as e:
+            logging.critical(f"Failed to connect to MongoDB: {e}")
+            raise
+        client = mongo_client
+        db = client[DB_NAME]
+        users_collection = db['users']
+        tasks_collection = db['tasks']
+        logs_collection = db['audit_logs']
+        # create_user, add_referral and task assignment rely on these; no-ops once they exist
+        apply_indexes(db, UNIQUE_INDEXES)
+        audit_writer = AuditLogWriter(logs_collection)
+        atexit.register(audit_writer.close)
+        task_store = UserTaskStore(db['user_tasks'], users_collection)
+        referral_graph = ReferralGraph(db['referrals'])
+        user_onboarder = UserOnboarder(users_collection, audit_writer=audit_writer)
+        task_catalog = TaskCatalog(
+            tasks_collection,
+            db['catalog_versions'],
+            change_stream=use_transactions,
+            poll_interval=float(os.getenv('TASK_CATALOG_POLL_INTERVAL', '30'))
+        )
+        task_catalog.start()
+        cohort_assigner = CohortAssigner(users_collection, task_store, db['assignment_runs'])
+        task_completion = TaskCompletion(
+            db['user_tasks'],
+            users_collection,
+            task_catalog,
+            audit_writer=audit_writer,
+            use_transactions=use_transactions
+        )
+        transfer_engine = TransferEngine(
+            users_collection,
+            audit_writer=audit_writer,
+            use_transactions=use_transactions
+        )
+        # Awaitable views used by the async Telegram handlers
+        mongo_executor = create_executor()
+        users_async = AsyncCollection(users_collection, mongo_executor)
+        ranking_engine = RankingEngine(users_collection)
+        rank_lookup = RankLookup(users_collection)
+        redis_client = _redis_client()
+        leaderboard_cache = LeaderboardCache(
+            users_collection,
+            size=int(os.getenv('LEADERBOARD_CACHE_SIZE', '50')),
+            backend=RedisLeaderboardBackend(redis_client) if redis_client else None
+        )
+        profile_cache = ProfileCache(
+            users_collection,
+            ttl=float(os.getenv('PROFILE_CACHE_TTL', '10')),
+            redis_client=redis_client
+        )
+        sync_service = SyncService(
+            users_collection,
+            profile_cache,
+            stats_ttl=float(os.getenv('SYNC_STATS_TTL', '60')),
+            payload_ttl=float(os.getenv('SYNC_PAYLOAD_TTL', '5'))
+        )
+        notification_senders = senders_from_env()
+        reminder_fanout = NotificationFanout(
+            users_collection,
+            db['notification_runs'],
+            notification_senders,
+            rate_limits={"push": 500, "email": 20, "sms": 10}
+        )
+        _register_metrics()
+        logging.info(f"Successfully connected to MongoDB database: {DB_NAME}")
+        _initialized = True
+
+def _register_metrics():
+    """Expose queue depths and cache statistics on /metrics (read at scrape time)."""
+    stats_collector.register_cache('profile', lambda: profile_cache.stats())
+    stats_collector.register_cache('sync', lambda: sync_service.stats())
+    stats_collector.register_cache('leaderboard', lambda: leaderboard_cache.stats())
+    stats_collector.register_cache('membership', lambda: membership_cache.stats())
+    stats_collector.register_queue('audit_log', lambda: audit_writer.pending)
+    stats_collector.register_queue('send_interactive', lambda: send_queue.stats()["queue_depth"]["interactive"])
+    stats_collector.register_queue('send_bulk', lambda: send_queue.stats()["queue_depth"]["bulk"])
+    stats_collector.register_queue('updates', lambda: update_processor.stats()["queue_depth"])
+
+def start_scheduler():
+    """Start the background jobs (long-running deployments only)."""
+    global scheduler
+    from apscheduler.schedulers.background import BackgroundScheduler
+    init()
+    scheduler = BackgroundScheduler()
+    scheduler.add_job(timed_job('daily_reminder', daily_reminder), 'interval', days=1)  # Run daily
+    scheduler.start()
+    return scheduler
 
 ### User Balance Management ###
 
 def get_user_balance(user_id):
     """Fetch the user's balance from the database."""
-    user = users_collection.find_one({"user_id": user_id})
+    user = profile_cache.get(user_id)
     return user.get("balance", 0) if user else 0
 
 def update_user_balance(user_id, amount):
     """Update the user's balance by the given amount."""
-    users_collection.update_one(
+    user = users_collection.find_one_and_update(
         {"user_id": user_id},
         {"$inc": {"balance": amount}},
-        upsert=True
+        projection={"_id": 0, "balance": 1, "referrals": 1},
+        upsert=True,
+        return_document=ReturnDocument.AFTER
     )
+    profile_cache.invalidate(user_id)
+    leaderboard_cache.on_user_change(user_id, user.get("balance", 0), user.get("referrals", 0))
     log_event(user_id, "balance_update", f"Balance updated by {amount} coins.")
 
 ### Task System Integration ###
@@ -140,226 +339,297 @@ def create_task(task_name, reward, description=None):
         "description": description,
         "created_at": datetime.now()
     })
+    task_catalog.bump_version()
+
+def assign_task_bulk(task_id, user_ids=None, cohort=None, run_id=None):
+    """Assign a task to a cohort in the background; re-using a run_id resumes that run."""
+    if (user_ids is None) == (cohort is None):
+        raise ValueError("Pass exactly one of user_ids or cohort.")
+    if run_id:
+        # Fail fast (400) instead of in the background when the run is for another task or cohort
+        cohort_assigner.check_resume(run_id, task_id, user_ids=user_ids, cohort=cohort)
+    else:
+        run_id = f"assign:{task_id}:{uuid4().hex}"
+
+    # Cached profiles pick up the new counters when their TTL runs out.
+    def run():
+        try:
+            cohort_assigner.assign(run_id, task_id, user_ids=user_ids, cohort=cohort)
+        except Exception as e:
+            logging.error(f"Bulk assignment {run_id} stopped: {e}")
+    threading.Thread(target=run, name=f'bulk-assign-{run_id}', daemon=True).start()
+    return run_id
 
 def assign_task(user_id, task_id):
     """Assign a task to a user."""
-    users_collection.update_one(
-        {"user_id": user_id},
-        {"$push": {"assigned_tasks": task_id}},
-        upsert=True
-    )
+    if task_store.assign(user_id, task_id):
+        profile_cache.invalidate(user_id)
 
 def validate_task_completion(user_id, task_id):
-    """Validate task completion and reward the user."""
-    task = tasks_collection.find_one({"_id": task_id})
-    if not task:
-        raise ValueError("Task does not exist.")
-    
-    user = users_collection.find_one({"user_id": user_id})
-    if task_id not in user.get("assigned_tasks", []):
-        raise ValueError("Task not assigned to this user.")
-    
-    # Reward user and mark task as completed.
-    update_user_balance(user_id, task["reward"])
-    users_collection.update_one(
-        {"user_id": user_id},
-        {"$pull": {"assigned_tasks": task_id}, "$push": {"completed_tasks": task_id}}
-    )
-    log_event(user_id, "task_completed", f"Completed task '{task['task_name']}' for {task['reward']} coins.")
+    """Validate task completion and reward the user (exactly once, however often it is called)."""
+    # Raises ValueError for unknown tasks and TaskNotAssigned (a ValueError) otherwise.
+    user = task_completion.complete(user_id, task_id)
+    profile_cache.invalidate(user_id)
+    leaderboard_cache.on_user_change(user_id, user.get("balance", 0), user.get("referrals", 0))
+    return user["reward"]
+
+def complete_tasks_batch(completions):
+    """Complete many (user_id, task_id) pairs at once, e.g. from a verification job."""
+    report = task_completion.complete_many(completions)
+    if report["credited_users"]:
+        profile_cache.invalidate(*report["credited_users"])
+        leaderboard_cache.invalidate()
+    return report
 
 ### Audit Logs ###
 
 def log_event(user_id, event_type, description):
     """Record significant events in the audit logs."""
-    logs_collection.insert_one({
-        "user_id": user_id,
-        "event_type": event_type,
-        "description": description,
-        "timestamp": datetime.now()
-    })
+    audit_writer.log(user_id, event_type, description)
 
 def get_user_logs(user_id, limit=50):
     """Fetch a user's audit logs."""
+    audit_writer.flush(timeout=5)
     return list(logs_collection.find({"user_id": user_id}).sort("timestamp", DESCENDING).limit(limit))
 
 ### Leaderboard and Ranking ###
 
 def get_top_users(limit=10):
     """Fetch the top users based on balance and referrals."""
-    return list(users_collection.find().sort([("balance", DESCENDING), ("referrals", DESCENDING)]).limit(limit))
+    return leaderboard_cache.top(limit)
 
 def update_ranking():
     """Update user rankings based on balance and referrals."""
-    users = users_collection.find().sort([("balance", DESCENDING), ("referrals", DESCENDING)])
-    rank = 1
-    for user in users:
-        users_collection.update_one(
-            {"user_id": user["user_id"]},
-            {"$set": {"rank": rank}}
-        )
-        rank += 1
-    log_event(None, "ranking_update", "Leaderboard rankings updated.")
+    report = ranking_engine.run()
+    logging.info(
+        f"Ranking update ({report['strategy']}): {report['writes']} of {report['scanned']} users "
+        f"changed rank in {report['duration_ms']:.1f} ms"
+    )
+    log_event(None, "ranking_update", f"Leaderboard rankings updated ({report['writes']} changed).")
+    return report
 
 ### Notifications ###
 
 def notify_user(user_id, message):
     """Send a notification to a user."""
-    # Placeholder function for integration with notification service.
-    print(f"Notification to {user_id}: {message}")
+    # Queued on the bulk lane so broadcasts never delay interactive replies.
+    if send_queue is None or not send_queue.running:
+        logging.info(f"Notification to {user_id} (send queue not running): {message}")
+        return None
+    from src.outbound.send_queue import BULK
+    return send_queue.submit_threadsafe(user_id, message, priority=BULK)
 
 def notify_leaderboard_change():
     """Notify users of leaderboard changes."""
     top_users = get_top_users()
-    for user in top_users:
-        notify_user(user["user_id"], f"Congratulations! You are ranked #{user['rank']} on the leaderboard.")
+    for rank, user in enumerate(top_users, 1):
+        notify_user(user["user_id"], f"Congratulations! You are ranked #{rank} on the leaderboard.")
 
 
 ### Referral Management ###
 
 def add_referral(referrer_id, referred_id):
     """Track referrals and increment referrer's referral count."""
-    referrer = users_collection.find_one({"user_id": referrer_id})
-    referred = users_collection.find_one({"user_id": referred_id})
-    
-    # Ensure a user cannot refer themselves or be referred multiple times.
     if referrer_id == referred_id:
         raise ValueError("A user cannot refer themselves.")
-    if referred and referred.get("referred_by"):
+    # Claim users.referred_by first: it also covers users referred before the graph was
+    # backfilled (python -m src.referrals.backfill). An existing user whose referred_by is
+    # set fails the filter, and the upsert then hits the unique user_id index (see UNIQUE_INDEXES).
+    try:
+        claim = users_collection.update_one(
+            {"user_id": referred_id, "referred_by": None},
+            {"$set": {"referred_by": referrer_id}},
+            upsert=True
+        )
+    except pymongo.errors.DuplicateKeyError:
         raise ValueError("User has already been referred by someone else.")
-    
-    # Update the referrer's referral count and add the referred user.
-    users_collection.update_one(
+    # The graph rejects repeat referrals (unique index) and cycles at any depth.
+    try:
+        referral_graph.add(referrer_id, referred_id)
+    except ValueError:
+        if claim.upserted_id is not None:
+            users_collection.delete_one({"_id": claim.upserted_id})  # the stub created above
+        else:
+            users_collection.update_one(
+                {"user_id": referred_id, "referred_by": referrer_id},
+                {"$set": {"referred_by": None}}
+            )
+        profile_cache.invalidate(referred_id)
+        raise
+
+    # Update the referrer's referral count.
+    referrer = users_collection.find_one_and_update(
         {"user_id": referrer_id},
         {"$inc": {"referrals": 1}},
-        upsert=True
-    )
-    users_collection.update_one(
-        {"user_id": referred_id},
-        {"$set": {"referred_by": referrer_id}},
-        upsert=True
+        projection={"_id": 0, "balance": 1, "referrals": 1},
+        upsert=True,
+        return_document=ReturnDocument.AFTER
     )
+    leaderboard_cache.on_user_change(referrer_id, referrer.get("balance", 0), referrer.get("referrals", 0))
+    profile_cache.invalidate(referrer_id, referred_id)
 
-def get_referral_count(user_id):
-    """Get the total number of referrals for a user."""
-    user = users_collection.find_one({"user_id": user_id})
-    return user.get("referrals", 0) if user else 0
+def get_downline(user_id, max_level=None):
+    """Users referred directly (level 1) and indirectly (level 2+) by a user."""
+    return referral_graph.downline_by_level(user_id, max_level)
 
-### Leaderboard and Ranking ###
+def get_top_referrers(days=7, limit=10):
+    """Users with the most new referrals over the last ``days`` days."""
+    return referral_graph.top_referrers(datetime.now() - timedelta(days=days), limit=limit)
 
-def get_top_users(limit=10):
-    """Fetch the top users based on balance and referrals."""
-    return list(users_collection.find().sort([("balance", -1), ("referrals", -1)]).limit(limit))
+def get_referral_tree_depth():
+    """Length of the longest referral chain."""
+    return referral_graph.tree_depth()
 
-def update_ranking():
-    """Update user rankings based on balance and referrals."""
-    users = users_collection.find().sort([("balance", -1), ("referrals", -1)])
-    rank = 1
-    for user in users:
-        users_collection.update_one(
-            {"user_id": user["user_id"]},
-            {"$set": {"rank": rank}}
-        )
-        rank += 1
+def get_referral_count(user_id):
+    """Get the total number of referrals for a user."""
+    user = profile_cache.get(user_id)
+    return user.get("referrals", 0) if user else 0
 
 ### Daily Rewards ###
 
+def _daily_reward_filter(user_id, today):
+    """Users whose last claim (a YYYY-MM-DD string) is missing or before ``today``."""
+    return {
+        "user_id": user_id,
+        "$or": [{"last_daily_reward": None}, {"last_daily_reward": {"$lt": today}}]
+    }
+
 def check_daily_reward(user_id):
     """Check if the user has claimed their daily reward."""
-    user = users_collection.find_one({"user_id": user_id})
-    last_claimed = user.get("last_daily_reward") if user else None
-    if not last_claimed:
-        return True
-    last_claimed_date = datetime.strptime(last_claimed, "%Y-%m-%d")
-    return (datetime.now() - last_claimed_date).days >= 1
-
-def claim_daily_reward(user_id, reward_amount=10):
-    """Allow the user to claim their daily reward if eligible."""
-    if check_daily_reward(user_id):
-        update_user_balance(user_id, reward_amount)
-        users_collection.update_one(
-            {"user_id": user_id},
-            {"$set": {"last_daily_reward": datetime.now().strftime("%Y-%m-%d")}},
-            upsert=True
-        )
-        log_event(user_id, "daily_reward", f"Claimed daily reward of {reward_amount} coins.")
+    # Read from MongoDB, not the profile cache: another worker may have just claimed.
+    today = datetime.now().strftime("%Y-%m-%d")
+    return users_collection.count_documents(_daily_reward_filter(user_id, today), limit=1) > 0
+
+def claim_daily_reward(user_id, reward_amount=10, notify=True):
+    """Allow the user to claim their daily reward if eligible (the bot button replies itself, notify=False)."""
+    # One conditional update decides and pays, so repeated or concurrent claims pay once.
+    today = datetime.now().strftime("%Y-%m-%d")
+    user = users_collection.find_one_and_update(
+        _daily_reward_filter(user_id, today),
+        {"$inc": {"balance": reward_amount}, "$set": {"last_daily_reward": today}},
+        projection={"_id": 0, "balance": 1, "referrals": 1},
+        return_document=ReturnDocument.BEFORE
+    )
+    if user is None:
+        return False
+    profile_cache.invalidate(user_id)
+    leaderboard_cache.on_user_change(user_id, user.get("balance", 0) + reward_amount, user.get("referrals", 0))
+    log_event(user_id, "balance_update", f"Balance updated by {reward_amount} coins.")
+    log_event(user_id, "daily_reward", f"Claimed daily reward of {reward_amount} coins.")
+    if notify:
         notify_user(user_id, f"You've claimed your daily reward of {reward_amount} coins!")
-        return True
-    return False
+    return True
 
 ### Performance Optimization ###
 
 def create_indexes():
-    """Ensure necessary indexes exist for optimal performance."""
-    users_collection.create_index([("balance", DESCENDING)])
-    users_collection.create_index([("referrals", DESCENDING)])
-    users_collection.create_index([("rank", ASCENDING)])
-    logs_collection.create_index([("timestamp", DESCENDING)])
-    print("Indexes created.")
+    """Ensure the indexes declared in src/db/indexes.py exist. Safe to run on every deploy."""
+    report = apply_indexes(db)
+    logging.info(f"Indexes ensured: {report}")
+    return report
 
 ### Wallet Management ###
 
 def transfer_balance(sender_id, receiver_id, amount):
     """Transfer balance from one user to another."""
-    sender_balance = get_user_balance(sender_id)
-    if sender_balance < amount:
-        raise ValueError("Insufficient balance.")
-    
-    # Deduct from sender and add to receiver.
-    update_user_balance(sender_id, -amount)
-    update_user_balance(receiver_id, amount)
+    # Conditional debit and credit; raises InsufficientBalance (a ValueError) when short.
+    for user in transfer_engine.transfer(sender_id, receiver_id, amount):
+        profile_cache.invalidate(user["user_id"])
+        leaderboard_cache.on_user_change(user["user_id"], user.get("balance", 0), user.get("referrals", 0))
+
+def transfer_many(transfers):
+    """Apply a batch of (sender_id, receiver_id, amount) transfers, e.g. payouts."""
+    transfers = list(transfers)
+    report = transfer_engine.transfer_many(transfers)
+    if report["applied"]:
+        profile_cache.invalidate(*{user_id for sender_id, receiver_id, _ in transfers
+                                   for user_id in (sender_id, receiver_id)})
+        leaderboard_cache.invalidate()
+    return report
 
 ## Utility Functions ###
 
 def create_user(user_id, username=None):
     """Create a new user entry in the database."""
-    existing_user = users_collection.find_one({"user_id": user_id})
-    if existing_user:
+    # A single upsert, so concurrent creates cannot produce duplicates.
+    result = users_collection.update_one(
+        {"user_id": user_id},
+        {"$setOnInsert": new_user_document(user_id, username=username)},
+        upsert=True
+    )
+    if result.upserted_id is None:
         raise ValueError("User already exists.")
-    users_collection.insert_one({
-        "user_id": user_id,
-        "username": username,
-        "balance": 0,
-        "referrals": 0,
-        "rank": None,
-        "last_daily_reward": None,
-        "referred_by": None,
-        "assigned_tasks": [],
-        "completed_tasks": []
-    })
+    profile_cache.invalidate(user_id)
+    leaderboard_cache.on_user_change(user_id, 0, 0)
     log_event(user_id, "user_created", "New user created.")
 
+def onboard_users(records):
+    """Create users in bulk from dicts (e.g. read_jsonl(path)); existing users are skipped."""
+    report = user_onboarder.onboard(records)
+    if report["created"]:
+        leaderboard_cache.invalidate()  # new users can fill a window that is not yet full
+    return report
+
 def delete_user(user_id):
     """Remove a user from the database."""
     users_collection.delete_one({"user_id": user_id})
+    profile_cache.invalidate(user_id)
+    leaderboard_cache.on_user_removed(user_id)
     log_event(user_id, "user_deleted", "User removed from the system.")
 
 def get_user_details(user_id):
     """Fetch all details of a user."""
-    user = users_collection.find_one({"user_id": user_id})
+    user = profile_cache.get(user_id)
     return user if user else None
 
 # Define UTC timezone
-utc = pytz.UTC
+utc = timezone.utc
+
+# Helper function: Send a reply through the rate-limited send queue (interactive lane)
+async def reply_text(update: Update, context: ContextTypes.DEFAULT_TYPE, text: str, **kwargs):
+    chat_id = update.effective_chat.id
+    if send_queue is not None and send_queue.running:
+        return await send_queue.send_message(chat_id, text, **kwargs)
+    return await context.bot.send_message(chat_id=chat_id, text=text, **kwargs)
+
+# Required channel; membership answers are cached (short TTL for "not a member")
+REQUIRED_CHANNEL = "@simplco"
+membership_cache = MembershipCache(
+    positive_ttl=float(os.getenv('MEMBERSHIP_POSITIVE_TTL', '3600')),
+    negative_ttl=float(os.getenv('MEMBERSHIP_NEGATIVE_TTL', '30'))
+)
 
 # Helper function: Check if user has joined the required channel
 async def has_joined_channel(context: ContextTypes.DEFAULT_TYPE, user_id: int) -> bool:
+    async def fetch():
+        member = await context.bot.get_chat_member(chat_id=REQUIRED_CHANNEL, user_id=user_id)
+        return member.status in MEMBER_STATUSES
+
     try:
-        member = await context.bot.get_chat_member(chat_id="@simplco", user_id=user_id)
-        return member.status in ['member', 'administrator', 'creator']
+        return await membership_cache.is_member(user_id, fetch)
     except Exception as e:
         logging.warning(f"Error checking channel membership for user {user_id}: {e}")
         return False
 
+# Keeps the membership cache fresh from chat_member updates (bot must be a channel admin)
+async def track_channel_membership(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    change = update.chat_member
+    if change.chat.username and f"@{change.chat.username}".lower() == REQUIRED_CHANNEL.lower():
+        new_member = change.new_chat_member
+        membership_cache.record(new_member.user.id, new_member.status in MEMBER_STATUSES)
+
 # Updated start command
 async def start(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    from telegram import InlineKeyboardButton, InlineKeyboardMarkup
+
     user_id = update.effective_user.id
     username = update.effective_user.username or f"User_{user_id}"
 
     # Ensure the user joins the required channel
     if not await has_joined_channel(context, user_id):
-        await context.bot.send_message(
-            chat_id=update.effective_chat.id,
-            text="Please join @simplco to access all bot features!",
+        await reply_text(
+            update, context,
+            "Please join @simplco to access all bot features!",
             reply_markup=InlineKeyboardMarkup([
                 [InlineKeyboardButton("Join Channel", url="https://t.me/simplco")]
             ])
@@ -367,21 +637,18 @@ async def start(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
         return
 
     # Initialize user record if not exists
-    user_record = users_collection.find_one({"user_id": user_id})
-    if not user_record:
-        users_collection.insert_one({
-            "user_id": user_id,
-            "username": username,
-            "balance": 0,
-            "wallet": 0,
-            "rank": None,
-            "joined_channel": True,
-            "last_claimed": None,
-            "tasks_completed": []
-        })
+    result = await users_async.update_one(
+        {"user_id": user_id},
+        {
+            "$setOnInsert": new_user_document(user_id, username=username, wallet=0),
+            "$set": {"joined_channel": True}
+        },
+        upsert=True
+    )
+    if result.upserted_id is not None:
         logging.info(f"New user registered: {username} (ID: {user_id})")
-    else:
-        users_collection.update_one({"user_id": user_id}, {"$set": {"joined_channel": True}})
+        await users_async.call(leaderboard_cache.on_user_change, user_id, 0, 0)
+    await users_async.call(profile_cache.invalidate, user_id)
 
     # Send main menu
     reply_markup = InlineKeyboardMarkup([
@@ -394,9 +661,9 @@ async def start(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
         [InlineKeyboardButton("Ranking", callback_data='ranking')]
     ])
 
-    await context.bot.send_message(
-        chat_id=update.effective_chat.id,
-        text="Welcome to the bot! Choose an option:",
+    await reply_text(
+        update, context,
+        "Welcome to the bot! Choose an option:",
         reply_markup=reply_markup
     )
 
@@ -416,107 +683,87 @@ async def button(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
 
     handler = handler_mapping.get(query.data)
     if handler:
-        await handler(update, context)
+        with track_handler(query.data):
+            await handler(update, context)
     else:
         fallback_message = "Unknown action. Please choose a valid option from the menu."
         logging.error(f"Unknown callback query: {query.data}")
-        await query.message.reply_text(fallback_message)
+        await reply_text(update, context, fallback_message)
 
 # Balance Handler
 async def balance(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     user_id = update.callback_query.from_user.id
 
-    # Fetch user data from MongoDB
-    user = users_collection.find_one({"user_id": user_id})
+    # Fetch user data (profile cache, falling back to MongoDB)
+    user = await users_async.call(profile_cache.get, user_id)
     if user:
         balance = user.get("balance", 0)
-        await update.callback_query.message.reply_text(f"Your current balance is {balance} $REBLCOINS.")
+        await reply_text(update, context, f"Your current balance is {balance} $REBLCOINS.")
     else:
-        await update.callback_query.message.reply_text("No user record found. Please register using /start.")
+        await reply_text(update, context, "No user record found. Please register using /start.")
 
 # Invite Friends Handler
 async def invite_friends(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     user = update.callback_query.from_user
     referral_id = user.username if user.username else str(user.id)
     referral_link = f"https://t.me/SimplQ_bot?start={referral_id}"
-    await update.callback_query.message.reply_text(f"Share this link with your friends: {referral_link}")
+    await reply_text(update, context, f"Share this link with your friends: {referral_link}")
 
 # Leaderboard Handler
 async def leaderboard(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     try:
-        top_users = users_collection.find().sort("balance", pymongo.DESCENDING).limit(10)
+        top_users = await users_async.call(leaderboard_cache.top, 10)
         leaderboard_text = "🏆 Leaderboard 🏆\n\n"
         for i, user in enumerate(top_users, 1):
             username = user.get('username', 'Anonymous')
             leaderboard_text += f"{i}. {username}: {user.get('balance', 0)} $REBLCOINS\n"
-        await update.callback_query.message.reply_text(leaderboard_text)
+        await reply_text(update, context, leaderboard_text)
     except Exception as e:
         logging.error(f"Error retrieving leaderboard: {e}")
-        await update.callback_query.message.reply_text("Error retrieving leaderboard data.")
+        await reply_text(update, context, "Error retrieving leaderboard data.")
 
 # Daily Rewards Handler
 async def daily_rewards(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     user_id = update.callback_query.from_user.id
-    today = utc.localize(datetime.combine(date.today(), datetime.min.time()))
-
-    user = users_collection.find_one({"user_id": user_id})
-    if not user:
-        await update.callback_query.message.reply_text("No user record found. Please register using /start.")
-        return
-
-    last_claimed = user.get("last_claimed")
-    if last_claimed:
-        last_claimed = utc.localize(last_claimed) if not last_claimed.tzinfo else last_claimed
-        if last_claimed.date() == today.date():
-            await update.callback_query.message.reply_text("You've already claimed your daily reward today.")
-            return
 
-    users_collection.update_one(
-        {"user_id": user_id},
-        {"$set": {"balance": user.get("balance", 0) + 10, "last_claimed": today}}
-    )
-    await update.callback_query.message.reply_text("You have successfully claimed 10 $REBLCOINS!")
+    # The same conditional update as the mini-app, on the executor: it also touches the caches.
+    if await users_async.call(claim_daily_reward, user_id, notify=False):
+        await reply_text(update, context, "You have successfully claimed 10 $REBLCOINS!")
+    elif await users_async.find_one({"user_id": user_id}, {"_id": 1}):
+        await reply_text(update, context, "You've already claimed your daily reward today.")
+    else:
+        await reply_text(update, context, "No user record found. Please register using /start.")
 
-# Ranking Handler (Optimized for scalability)
+# Ranking Handler (index-only count of the users ahead; no collection sort)
 async def ranking(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     user_id = update.callback_query.from_user.id
-    user_rank = list(users_collection.aggregate([
-        {"$setWindowFields": {
-            "partitionBy": None,
-            "sortBy": {"balance": -1},
-            "output": {
-                "rank": {"$rank": {}}
-            }
-        }},
-        {"$match": {"user_id": user_id}}
-    ]))
+    user_rank = await users_async.call(rank_lookup.get_rank, user_id)
 
     if user_rank:
-        user = user_rank[0]
-        rank = user.get("rank")
-        balance = user.get("balance", 0)
-        await update.callback_query.message.reply_text(f"Your rank: {rank}\nYour balance: {balance} $REBLCOINS.")
+        rank = user_rank["rank"]
+        balance = user_rank["balance"]
+        await reply_text(update, context, f"Your rank: {rank}\nYour balance: {balance} $REBLCOINS.")
     else:
-        await update.callback_query.message.reply_text("No user record found. Please register using /start.")
+        await reply_text(update, context, "No user record found. Please register using /start.")
 
 # Wallet Handler
 async def wallet(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     user_id = update.callback_query.from_user.id
 
     # Fetch user data
-    user = users_collection.find_one({"user_id": user_id})
+    user = await users_async.call(profile_cache.get, user_id)
     if user:
         wallet = user.get("wallet", 0)
         balance = user.get("balance", 0)
-        await update.callback_query.message.reply_text(f"Your wallet: {wallet}\nYour balance: {balance} $REBLCOINS.")
+        await reply_text(update, context, f"Your wallet: {wallet}\nYour balance: {balance} $REBLCOINS.")
     else:
-        await update.callback_query.message.reply_text("No user record found. Please register using /start.")
+        await reply_text(update, context, "No user record found. Please register using /start.")
 
 # Add Flask API endpoints to sync bot and mini-app data
 @app.route('/api/get_user/<int:user_id>', methods=['GET'])
 def get_user(user_id):
     """Fetch user details for mini-app."""
-    user = users_collection.find_one({"user_id": user_id})
+    user = profile_cache.get(user_id)
     if user:
         return {
             "user_id": user.get("user_id"),
@@ -524,12 +771,25 @@ def get_user(user_id):
             "balance": user.get("balance", 0),
             "wallet": user.get("wallet", 0),
             "rank": user.get("rank", None),
-            "tasks_completed": user.get("tasks_completed", []),
-            "last_claimed": user.get("last_claimed")
+            "tasks_completed": task_store.task_ids(user_id, "completed"),
+            "last_claimed": user.get("last_daily_reward")
         }, 200
     else:
         return {"error": "User not found"}, 404
 
+@app.route('/api/users/bulk', methods=['POST'])
+def onboard_users_api():
+    """Bulk-create users from a JSONL request body (one user object per line)."""
+    report = onboard_users(read_jsonl(request.stream))
+    return jsonify(report), 200
+
+@app.route('/api/referrals/<int:user_id>', methods=['GET'])
+def get_referrals(user_id):
+    """Downline size per level for the mini-app's referral view."""
+    levels = get_downline(user_id, request.args.get('levels', type=int))
+    return {"user_id": user_id, "levels": {str(level): count for level, count in levels.items()},
+            "total": sum(levels.values())}, 200
+
 @app.route('/api/update_user/<int:user_id>', methods=['POST'])
 def update_user(user_id):
     """Update user data from the mini-app."""
@@ -542,12 +802,17 @@ def update_user(user_id):
         if "wallet" in data:
             update_data["wallet"] = data["wallet"]
         if "tasks_completed" in data:
-            update_data["tasks_completed"] = data["tasks_completed"]
+            # Task history lives in user_tasks; the user keeps only counters
+            task_store.mark_completed(user_id, data["tasks_completed"])
         if "last_claimed" in data:
-            update_data["last_claimed"] = data["last_claimed"]
-
-        if update_data:
-            users_collection.update_one({"user_id": user_id}, {"$set": update_data})
+            update_data["last_daily_reward"] = data["last_claimed"]  # the one claim field
+
+        if update_data or "tasks_completed" in data:
+            if update_data:
+                users_collection.update_one({"user_id": user_id}, {"$set": update_data})
+            profile_cache.invalidate(user_id)
+            if "balance" in update_data:
+                leaderboard_cache.invalidate()
             return {"message": "User data updated successfully"}, 200
         else:
             return {"error": "No valid fields to update"}, 400
@@ -555,71 +820,120 @@ def update_user(user_id):
         logging.error(f"Error updating user {user_id}: {e}")
         return {"error": str(e)}, 500
 
-def daily_reminder():
-    """Send daily reminders to all users to claim rewards and complete tasks."""
-    users = users_collection.find()
-    for user in users:
-        user_id = user["user_id"]
-        user_email = user.get("email")
-        user_phone = user.get("phone_number")
-        message = "Don't forget to log in, claim your daily reward, and perform tasks!"
-        send_email(user_email, "Daily Reminder", message)
-        send_sms(user_phone, message)
-        send_push_notification(user.get("device_token"), "Reminder", message)
-
-scheduler = BackgroundScheduler()
-scheduler.add_job(daily_reminder, 'interval', days=1)  # Run daily
-scheduler.start()
+def _request_user_id():
+    """Resolve the caller from signed Telegram initData; None unless the signature is valid."""
+    tg_user = validate_init_data(request.headers.get('X-Telegram-Init-Data'), TELEGRAM_BOT_TOKEN)
+    return tg_user.get("id") if tg_user else None
+
+@app.route('/api/sync', methods=['GET'])
+def sync():
+    """Everything the mini-app dashboard needs in one response, with ETag revalidation."""
+    user_id = _request_user_id()
+    if user_id is None:
+        return {"error": "Unauthorized"}, 401
+    entry = sync_service.get(user_id)
+    if entry is None:
+        return {"error": "User not found"}, 404
+    payload, etag = entry
+    response = jsonify(payload)
+    response.set_etag(etag)
+    # Let the WebView cache the body but revalidate every poll
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response.make_conditional(request)
 
 #notifications
 def send_push_notification(token, title, body):
     """Send a push notification."""
-    # Initialize Firebase Admin SDK
-    cred = credentials.Certificate('/Users/mac/Documents/WORKSPACE/untitled folder/journal/private keys/firebase/rebltasks-d156e-c10cc3a3732e.json')
-    firebase_admin.initialize_app(cred)
-
-    # Create the message
-    message = messaging.Message(
-        notification=messaging.Notification(
-            title=title,
-            body=body
-        ),
-        token=token  # User's device token
-    )
-
-    # Send the message
-    response = messaging.send(message)
-    print(f"Push notification sent: {response}")
-
-    send_push_notification(user_device_token, "Daily Reminder", "Don't forget to log in and claim your reward!")
+    if not token or "push" not in notification_senders:
+        return 0
+    return notification_senders["push"].deliver([token], title, body)
+
+def send_email(address, subject, body):
+    """Send an email through the pooled SMTP sender."""
+    if not address or "email" not in notification_senders:
+        return 0
+    return notification_senders["email"].deliver([address], subject, body)
+
+def send_sms(phone_number, body):
+    """Send an SMS through the configured gateway."""
+    if not phone_number or "sms" not in notification_senders:
+        return 0
+    return notification_senders["sms"].deliver([phone_number], "", body)
 
-
-# Telegram Bot Setup
-async def start(update: Update, context: CallbackContext):
-    await update.message.reply_text("Welcome to ReblTasks!")
+def daily_reminder():
+    """Send daily reminders to all users to claim rewards and complete tasks."""
+    message = "Don't forget to log in, claim your daily reward, and perform tasks!"
+    run_id = f"daily_reminder:{date.today().isoformat()}"
+    report = asyncio.run(reminder_fanout.run(run_id, "Daily Reminder", message))
+    logging.info(f"Daily reminder {run_id}: {report}")
+    return report
 
 # Telegram Bot application setup
-application = ApplicationBuilder().token(os.getenv("TELEGRAM_BOT_TOKEN")).build()
-application.add_handler(CommandHandler("start", start))
-
-@app.route("/webhook", methods=["POST"])
-def webhook():
-    # Get the JSON update sent by Telegram
-    json_update = request.get_json()
-
-    # Convert the update to an Update object and add it to the bot's queue
-    update = Update.de_json(json_update, application.bot)
-    application.update_queue.put(update)
-    return "OK", 200
-
-if __name__ == "__main__":
+async def _start_send_queue(bot_application):
+    global send_queue
+    from src.outbound.send_queue import OutboundSendQueue
+    send_queue = OutboundSendQueue(
+        bot_application.bot,
+        global_rate=float(os.getenv('SEND_GLOBAL_RATE', '30')),
+        chat_rate=float(os.getenv('SEND_CHAT_RATE', '1'))
+    )
+    await send_queue.start()
+
+async def _stop_send_queue(bot_application):
+    if send_queue is not None:
+        await send_queue.stop()
+
+def get_application():
+    """Build the Telegram application on first use."""
+    global application, update_processor
+    if application is None:
+        from telegram.ext import ApplicationBuilder, CallbackQueryHandler, ChatMemberHandler, CommandHandler
+        if not TELEGRAM_BOT_TOKEN:
+            logging.critical("No Telegram Bot Token found. Please check your .env file.")
+            raise RuntimeError("TELEGRAM_BOT_TOKEN is not set.")
+        from src.dispatch.sharded import ShardedUpdateProcessor
+        init()
+        # Per-chat ordering, cross-chat parallelism
+        update_processor = ShardedUpdateProcessor(workers=int(os.getenv('UPDATE_WORKERS', '16')))
+        application = (
+            ApplicationBuilder()
+            .token(TELEGRAM_BOT_TOKEN)
+            # A local Bot API server (or the fake one in benchmarks/replay_webhook.py) can stand in
+            .base_url(os.getenv('TELEGRAM_API_BASE_URL', 'https://api.telegram.org/bot'))
+            .concurrent_updates(update_processor)
+            .post_init(_start_send_queue)
+            .post_shutdown(_stop_send_queue)
+            .build()
+        )
+        application.add_handler(CommandHandler("start", timed_handler("start")(start)))
+        application.add_handler(CallbackQueryHandler(button))
+        application.add_handler(ChatMemberHandler(
+            timed_handler("chat_member")(track_channel_membership), ChatMemberHandler.CHAT_MEMBER
+        ))
+    return application
+
+# Telegram updates are ingested by the ASGI webhook in src/api/main.py (api/webhook.py), or by
+# run_webhook in main(); both run the bot application. The Flask app serves the mini-app API only.
+
+def main():
+    """Run the bot as a long-lived webhook server with the background scheduler."""
     # Setup webhook URL dynamically using environment variable
     webhook_url = f"{os.getenv('WEBHOOK_URL')}/webhook"
-    
+
+    init()
+    create_indexes()
+    bot_application = get_application()
+    start_scheduler()
+
     # Run the bot with webhook on Vercel
-    application.run_webhook(
+    bot_application.run_webhook(
         listen="0.0.0.0",
         port=int(os.getenv("PORT", 5000)),
         url_path="webhook",
-        webhook_url=webhook_url
-    )
\ No newline at end of file
+        webhook_url=webhook_url,
+        allowed_updates=ALLOWED_UPDATES,
+        secret_token=WEBHOOK_SECRET
+    )
+
+if __name__ == "__main__":
+    main()
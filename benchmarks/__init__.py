@@ -0,0 +1,4 @@
+"""
+Standalone performance benchmarks. Each module can be run with
+``python -m benchmarks.<name>`` from the repository root.
+"""
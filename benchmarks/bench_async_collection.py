@@ -0,0 +1,64 @@
+"""
+Handler throughput under rising Mongo latency: blocking pymongo calls on the
+event loop versus AsyncCollection backed by a bounded executor.
+
+    python -m benchmarks.bench_async_collection --requests 200 --latencies 1 5 20 50
+"""
+import argparse
+import asyncio
+import time
+
+from src.db.async_collection import AsyncCollection, create_executor
+
+
+class SlowCollection:
+    """Collection stand-in whose find_one sleeps like a network round trip"""
+
+    def __init__(self, latency: float):
+        self.latency = latency
+
+    def find_one(self, filter, *args, **kwargs):
+        time.sleep(self.latency)
+        return {"user_id": filter.get("user_id"), "balance": 0}
+
+
+async def blocking_handler(collection, user_id):
+    return collection.find_one({"user_id": user_id})
+
+
+async def async_handler(collection, user_id):
+    return await collection.find_one({"user_id": user_id})
+
+
+async def _drive(handler, collection, requests):
+    started = time.perf_counter()
+    await asyncio.gather(*(handler(collection, i) for i in range(requests)))
+    return requests / (time.perf_counter() - started)
+
+
+def run(requests: int, latencies_ms, workers: int):
+    executor = create_executor(workers)
+    rows = []
+    for latency_ms in latencies_ms:
+        slow = SlowCollection(latency_ms / 1000)
+        blocking = asyncio.run(_drive(blocking_handler, slow, requests))
+        pooled = asyncio.run(_drive(async_handler, AsyncCollection(slow, executor), requests))
+        rows.append({"latency_ms": latency_ms, "blocking_rps": blocking, "executor_rps": pooled})
+    executor.shutdown()
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--requests', type=int, default=200)
+    parser.add_argument('--latencies', type=float, nargs='+', default=[1, 5, 20, 50])
+    parser.add_argument('--workers', type=int, default=32)
+    args = parser.parse_args()
+
+    print(f"{'latency (ms)':>12} {'blocking req/s':>15} {'executor req/s':>15}")
+    for row in run(args.requests, args.latencies, args.workers):
+        print(f"{row['latency_ms']:>12.0f} {row['blocking_rps']:>15.1f} {row['executor_rps']:>15.1f}")
+
+
+if __name__ == '__main__':
+    main()
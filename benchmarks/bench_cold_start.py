@@ -0,0 +1,104 @@
+"""
+Cold-start cost of the SimplRefQ module: import time (via ``python -X importtime``)
+and the latency of the first Flask request, each measured in a fresh interpreter.
+
+    python -m benchmarks.bench_cold_start [--runs 5] [--mongo-uri mongodb://localhost] [--json out.json]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+FIRST_REQUEST = r"""
+import json, os, sys, time
+started = time.perf_counter()
+import SimplRefQ
+imported = time.perf_counter()
+heavy = sorted(m for m in ("telegram", "requests", "apscheduler", "firebase_admin", "pytz") if m in sys.modules)
+if os.environ.get('BENCH_MONGOMOCK'):
+    import mongomock
+    client = mongomock.MongoClient()
+    client[SimplRefQ.DB_NAME].users.insert_one({"user_id": 1, "username": "bench", "balance": 1})
+    SimplRefQ.init(client, use_transactions=False)
+before_request = time.perf_counter()
+response = SimplRefQ.app.test_client().get('/api/get_user/1')
+finished = time.perf_counter()
+print(json.dumps({
+    "import_ms": (imported - started) * 1000,
+    "first_request_ms": (finished - before_request) * 1000,
+    "status": response.status_code,
+    "heavy_modules": heavy,
+}))
+"""
+
+
+def import_profile(top: int = 10):
+    """Run ``python -X importtime -c 'import SimplRefQ'`` and return the total and heaviest imports"""
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', 'import SimplRefQ'],
+        cwd=ROOT, capture_output=True, text=True, check=True
+    )
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        self_part, cumulative_us, name = line[len('import time:'):].split('|')
+        # Nested imports are indented; the first column after "|" holds the module itself
+        rows.append((int(cumulative_us), name[1:]))
+    total = next(cumulative for cumulative, name in rows if name == 'SimplRefQ')
+    # Direct imports of SimplRefQ only, so nested modules are not double counted
+    heaviest = sorted((r for r in rows if r[1].startswith('  ') and not r[1].startswith('   ')),
+                      reverse=True)[:top]
+    return {
+        "total_ms": total / 1000,
+        "heaviest": [{"module": name.strip(), "cumulative_ms": cumulative / 1000}
+                     for cumulative, name in heaviest],
+    }
+
+
+def first_request(mongo_uri=None):
+    env = dict(os.environ)
+    if mongo_uri:
+        env['MONGO_URI'] = mongo_uri
+    else:
+        env['BENCH_MONGOMOCK'] = '1'
+    result = subprocess.run([sys.executable, '-c', FIRST_REQUEST], cwd=ROOT, env=env,
+                            capture_output=True, text=True, check=True)
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def run(runs: int = 5, mongo_uri=None):
+    samples = [first_request(mongo_uri) for _ in range(runs)]
+    return {
+        "importtime": import_profile(),
+        "import_ms_median": statistics.median(s["import_ms"] for s in samples),
+        "first_request_ms_median": statistics.median(s["first_request_ms"] for s in samples),
+        "heavy_modules_on_import": samples[-1]["heavy_modules"],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--mongo-uri')
+    parser.add_argument('--json', help="Write the results to this file for tracking across releases")
+    args = parser.parse_args()
+
+    result = run(args.runs, args.mongo_uri)
+    print(f"import (importtime):  {result['importtime']['total_ms']:.1f} ms")
+    for row in result['importtime']['heaviest']:
+        print(f"    {row['module']:<30} {row['cumulative_ms']:8.1f} ms")
+    print(f"import (wall, median): {result['import_ms_median']:.1f} ms")
+    print(f"first request (median): {result['first_request_ms_median']:.1f} ms")
+    print(f"heavy modules loaded on import: {result['heavy_modules_on_import'] or 'none'}")
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(result, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,40 @@
+"""
+Leaderboard latency with and without LeaderboardCache.
+
+    python -m benchmarks.bench_leaderboard_cache --users 20000 --calls 200 [--mongo-uri mongodb://localhost]
+"""
+import argparse
+
+from benchmarks.common import get_database, seed_users, time_calls
+from src.leaderboard.cache import LEADERBOARD_PROJECTION, LeaderboardCache
+from src.leaderboard.ranking import RANK_SORT
+
+
+def run(users: int, calls: int, mongo_uri=None):
+    collection = get_database(mongo_uri).users
+    seed_users(collection, users)
+    collection.create_index(RANK_SORT)
+
+    uncached = time_calls(
+        lambda: list(collection.find({}, LEADERBOARD_PROJECTION).sort(RANK_SORT).limit(10)), calls)
+    cache = LeaderboardCache(collection, size=50)
+    cached = time_calls(lambda: cache.top(10), calls)
+    return {"uncached": uncached, "cached": cached, "cache_stats": cache.stats()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--users', type=int, default=20000)
+    parser.add_argument('--calls', type=int, default=200)
+    parser.add_argument('--mongo-uri')
+    args = parser.parse_args()
+
+    result = run(args.users, args.calls, args.mongo_uri)
+    for name in ('uncached', 'cached'):
+        row = result[name]
+        print(f"{name:>9}: mean {row['mean_ms']:.3f} ms  p50 {row['p50_ms']:.3f} ms  p95 {row['p95_ms']:.3f} ms")
+    print(f"cache: {result['cache_stats']}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,66 @@
+"""
+Onboarding throughput: per-user check-then-insert vs UserOnboarder bulk upserts.
+
+    python -m benchmarks.bench_onboarding --users 20000 [--batch-size 1000] [--mongo-uri mongodb://localhost]
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+
+from benchmarks.common import get_database
+from src.users.onboarding import UserOnboarder, new_user_document, read_jsonl
+
+
+def write_jsonl(path: str, count: int):
+    with open(path, 'w', encoding='utf-8') as handle:
+        for user_id in range(1, count + 1):
+            handle.write(json.dumps({"user_id": user_id, "username": f"user{user_id}"}) + "\n")
+
+
+def check_then_insert(users, logs, path: str):
+    # What create_user did before: a lookup, an insert and an audit insert per user
+    for record in read_jsonl(path):
+        if users.find_one({"user_id": record["user_id"]}, {"_id": 1}):
+            continue
+        users.insert_one(new_user_document(record["user_id"], username=record["username"]))
+        logs.insert_one({"user_id": record["user_id"], "event_type": "user_created"})
+
+
+def run(count: int, batch_size: int, mongo_uri=None):
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'users.jsonl')
+        write_jsonl(path, count)
+
+        db = get_database(mongo_uri, name='simplrefq_bench_onboard_legacy')
+        db.users.create_index("user_id", unique=True)
+        started = time.perf_counter()
+        check_then_insert(db.users, db.audit_logs, path)
+        legacy_seconds = time.perf_counter() - started
+
+        db = get_database(mongo_uri, name='simplrefq_bench_onboard_bulk')
+        db.users.create_index("user_id", unique=True)
+        onboarder = UserOnboarder(db.users, batch_size=batch_size)
+        bulk = onboarder.onboard(read_jsonl(path))
+        rerun = onboarder.onboard(read_jsonl(path))
+    return {"legacy_users_per_sec": count / legacy_seconds, "bulk": bulk, "rerun": rerun}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--users', type=int, default=20000)
+    parser.add_argument('--batch-size', type=int, default=1000)
+    parser.add_argument('--mongo-uri')
+    args = parser.parse_args()
+
+    result = run(args.users, args.batch_size, args.mongo_uri)
+    print(f"check-then-insert: {result['legacy_users_per_sec']:.0f} users/sec")
+    for name in ('bulk', 'rerun'):
+        row = result[name]
+        print(f"{name:>17}: {row['users_per_sec']:.0f} users/sec  "
+              f"({row['created']} created, {row['existing']} existing)")
+
+
+if __name__ == '__main__':
+    main()
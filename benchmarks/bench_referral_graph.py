@@ -0,0 +1,91 @@
+"""
+Referral downline queries on a synthetic tree: recursive per-level walk vs ancestor paths.
+
+    python -m benchmarks.bench_referral_graph --nodes 1000000 --calls 50 [--mongo-uri mongodb://localhost]
+
+A million nodes in mongomock takes a long time to seed; pass --mongo-uri for
+the full-size run, or lower --nodes for a quick local look.
+"""
+import argparse
+import random
+import time
+from datetime import datetime, timedelta
+
+from benchmarks.common import get_database, time_calls
+from src.referrals.graph import DEFAULT_MAX_DEPTH, ReferralGraph
+
+
+def seed_tree(edges, nodes: int, max_depth: int = DEFAULT_MAX_DEPTH, seed: int = 11,
+              batch_size: int = 20000):
+    """Preferential-attachment tree rooted at user 1: early users refer far more people"""
+    rng = random.Random(seed)
+    paths = {1: ([], 0)}
+    start = datetime(2026, 1, 1)
+    batch = []
+    for user_id in range(2, nodes + 1):
+        referrer_id = 1 + int((user_id - 1) * rng.random() ** 3)
+        ancestors, depth = paths[referrer_id]
+        path = ([referrer_id] + ancestors)[:max_depth]
+        paths[user_id] = (path, depth + 1)
+        batch.append({"user_id": user_id, "referrer_id": referrer_id, "ancestors": path,
+                      "depth": depth + 1, "created_at": start + timedelta(seconds=user_id)})
+        if len(batch) >= batch_size:
+            edges.insert_many(batch)
+            batch = []
+    if batch:
+        edges.insert_many(batch)
+
+
+def recursive_levels(edges, user_id, max_level: int = DEFAULT_MAX_DEPTH):
+    """The pre-graph approach: one referrer_id $in query per level"""
+    levels, frontier = {}, [user_id]
+    for level in range(1, max_level + 1):
+        frontier = [edge["user_id"] for edge in edges.find({"referrer_id": {"$in": frontier}},
+                                                            {"_id": 0, "user_id": 1})]
+        if not frontier:
+            break
+        levels[level] = len(frontier)
+    return levels
+
+
+def run(nodes: int, calls: int, mongo_uri=None):
+    edges = get_database(mongo_uri).referrals
+    graph = ReferralGraph(edges)
+    graph.create_indexes()
+    started = time.perf_counter()
+    seed_tree(edges, nodes)
+    seed_seconds = time.perf_counter() - started
+
+    rng = random.Random(5)
+    # Mid-sized downlines: users a little way below the root
+    sample = [rng.randint(2, 200) for _ in range(calls)]
+    picks = iter(sample * 2)
+    recursive = time_calls(lambda: recursive_levels(edges, next(picks)), calls)
+    picks = iter(sample * 2)
+    ancestor = time_calls(lambda: graph.downline_by_level(next(picks)), calls)
+    assert recursive_levels(edges, sample[0]) == graph.downline_by_level(sample[0])
+
+    next_id = iter(range(nodes + 1, nodes + 1 + calls))
+    adds = time_calls(lambda: graph.add(rng.randint(1, nodes), next(next_id)), calls)
+    top = time_calls(lambda: graph.top_referrers(datetime(2026, 1, 1) + timedelta(seconds=nodes // 2)), 5)
+    depth = time_calls(graph.tree_depth, calls)
+    return {"seed_seconds": seed_seconds, "recursive": recursive, "ancestor_paths": ancestor,
+            "add": adds, "top_referrers": top, "tree_depth": depth, "depth": graph.tree_depth()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--nodes', type=int, default=1000000)
+    parser.add_argument('--calls', type=int, default=50)
+    parser.add_argument('--mongo-uri')
+    args = parser.parse_args()
+
+    result = run(args.nodes, args.calls, args.mongo_uri)
+    print(f"seeded {args.nodes} nodes in {result['seed_seconds']:.1f} s, tree depth {result['depth']}")
+    for name in ('recursive', 'ancestor_paths', 'add', 'top_referrers', 'tree_depth'):
+        row = result[name]
+        print(f"{name:>14}: mean {row['mean_ms']:.3f} ms  p50 {row['p50_ms']:.3f} ms  p95 {row['p95_ms']:.3f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,87 @@
+"""
+Mini-app sync latency: separate per-widget queries vs /api/sync (200 and 304).
+
+    python -m benchmarks.bench_sync --users 20000 --calls 200 [--mongo-uri mongodb://localhost]
+"""
+from urllib.parse import urlencode
+import argparse
+import hashlib
+import hmac
+import json
+import os
+import random
+import time
+
+from benchmarks.common import get_database, seed_users, time_calls
+
+# Forced, never inherited: with --mongo-uri, get_database drops this database first
+os.environ['DB_NAME'] = 'simplrefq_bench'
+import SimplRefQ  # noqa: E402  (reads DB_NAME at import)
+
+BENCH_TOKEN = '123456:bench'
+
+
+def init_data_header(user_id: int) -> dict:
+    """X-Telegram-Init-Data signed the way Telegram signs mini-app launch data"""
+    fields = {"auth_date": str(int(time.time())), "user": json.dumps({"id": user_id})}
+    check = "\n".join(f"{key}={value}" for key, value in sorted(fields.items()))
+    secret = hmac.new(b"WebAppData", BENCH_TOKEN.encode(), hashlib.sha256).digest()
+    fields["hash"] = hmac.new(secret, check.encode(), hashlib.sha256).hexdigest()
+    return {'X-Telegram-Init-Data': urlencode(fields)}
+
+
+def run(users: int, calls: int, mongo_uri=None):
+    collection = get_database(mongo_uri, name=SimplRefQ.DB_NAME).users
+    seed_users(collection, users)
+    SimplRefQ.init(collection.database.client, use_transactions=False)
+    SimplRefQ.create_indexes()
+    # /api/sync serves the materialised rank; mongomock has no $setWindowFields
+    SimplRefQ.ranking_engine.run('bulk' if mongo_uri is None else None)
+    SimplRefQ.TELEGRAM_BOT_TOKEN = BENCH_TOKEN
+    http = SimplRefQ.app.test_client()
+    rng = random.Random(7)
+    # Signed ahead of time so the HMAC on the client side is not timed
+    headers = [init_data_header(rng.randint(1, users)) for _ in range(min(users, 1000))]
+
+    def separate_queries():
+        # What the dashboard needed before: profile, rank and global total, each uncached
+        user_id = rng.randint(1, users)
+        user = collection.find_one({"user_id": user_id}, {"_id": 0})
+        SimplRefQ.rank_lookup.rank_for(user["balance"], user["referrals"])
+        list(collection.aggregate([{"$group": {"_id": None, "total": {"$sum": "$balance"}}}]))
+
+    def sync_full():
+        http.get('/api/sync', headers=rng.choice(headers))
+
+    etag = http.get('/api/sync', headers=headers[0]).headers['ETag']
+
+    def sync_not_modified():
+        response = http.get('/api/sync', headers=dict(headers[0], **{'If-None-Match': etag}))
+        assert response.status_code == 304
+
+    return {
+        "separate": time_calls(separate_queries, calls),
+        "sync_200": time_calls(sync_full, calls),
+        "sync_304": time_calls(sync_not_modified, calls),
+        "cache_stats": SimplRefQ.profile_cache.stats(),
+        "sync_stats": SimplRefQ.sync_service.stats(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--users', type=int, default=20000)
+    parser.add_argument('--calls', type=int, default=200)
+    parser.add_argument('--mongo-uri')
+    args = parser.parse_args()
+
+    result = run(args.users, args.calls, args.mongo_uri)
+    for name in ('separate', 'sync_200', 'sync_304'):
+        row = result[name]
+        print(f"{name:>9}: mean {row['mean_ms']:.3f} ms  p50 {row['p50_ms']:.3f} ms  p95 {row['p95_ms']:.3f} ms")
+    print(f"profile cache: {result['cache_stats']}")
+    print(f"sync payloads: {result['sync_stats']}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,64 @@
+"""
+/tasks cost: dumping the whole collection vs paging the in-memory TaskCatalog.
+
+    python -m benchmarks.bench_task_catalog --tasks 100000 --calls 50 [--mongo-uri mongodb://localhost]
+"""
+import argparse
+import json
+import time
+from datetime import datetime
+
+from benchmarks.common import get_database, time_calls
+from src.tasks.catalog import TaskCatalog
+
+
+def seed_tasks(collection, count: int, batch_size: int = 10000):
+    now = datetime.now()
+    for start in range(0, count, batch_size):
+        collection.insert_many([
+            {"task_name": f"Task {i}", "reward": i % 50 + 1, "description": f"Do thing number {i}",
+             "created_at": now}
+            for i in range(start, min(start + batch_size, count))
+        ])
+
+
+def run(tasks: int, calls: int, page_size: int = 100, mongo_uri=None):
+    db = get_database(mongo_uri)
+    seed_tasks(db.tasks, tasks)
+
+    full_dump = time_calls(lambda: json.dumps(list(db.tasks.find()), default=str), max(1, calls // 10))
+
+    catalog = TaskCatalog(db.tasks, db.catalog_versions)
+    started = time.perf_counter()
+    catalog.reload()
+    load_ms = (time.perf_counter() - started) * 1000
+
+    # page() clamps limit to max_page_size, so walk to the middle a page at a time
+    middle, walked = None, 0
+    while walked < tasks // 2:
+        rows, middle = catalog.page(middle, min(catalog.max_page_size, tasks // 2 - walked))
+        walked += len(rows)
+    first_page = time_calls(lambda: "".join(catalog.iter_page_json(limit=page_size)), calls)
+    deep_page = time_calls(lambda: "".join(catalog.iter_page_json(after=middle, limit=page_size)), calls)
+    return {"full_dump": full_dump, "catalog_load_ms": load_ms,
+            "first_page": first_page, "deep_page": deep_page, "deep_page_offset": walked}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--tasks', type=int, default=100000)
+    parser.add_argument('--calls', type=int, default=50)
+    parser.add_argument('--page-size', type=int, default=100)
+    parser.add_argument('--mongo-uri')
+    args = parser.parse_args()
+
+    result = run(args.tasks, args.calls, args.page_size, args.mongo_uri)
+    for name in ('full_dump', 'first_page', 'deep_page'):
+        row = result[name]
+        print(f"{name:>10}: mean {row['mean_ms']:.3f} ms  p50 {row['p50_ms']:.3f} ms  p95 {row['p95_ms']:.3f} ms")
+    print(f"deep_page starts after task {result['deep_page_offset']}")
+    print(f"catalog load (once per change): {result['catalog_load_ms']:.0f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,104 @@
+"""
+Task completion under contention: read-check-write vs TaskCompletion's conditional claim.
+
+    python -m benchmarks.bench_task_completion --users 200 --attempts 4 --threads 16 [--mongo-uri mongodb://localhost]
+
+Every (user, task) pair is submitted ``--attempts`` times from concurrent
+threads; a correct implementation pays each reward exactly once. Run it
+against a real server: mongomock does not serialise concurrent updates to
+one document, so its payout figures are not meaningful.
+"""
+import argparse
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.common import get_database, seed_users
+from src.tasks.catalog import TaskCatalog
+from src.tasks.completion import TaskCompletion
+from src.tasks.store import ASSIGNED, UserTaskStore
+
+REWARD = 10
+
+
+def _prepare(db, users: int):
+    seed_users(db.users, users)
+    db.users.update_many({}, {"$set": {"balance": 0}})
+    store = UserTaskStore(db.user_tasks, db.users)
+    store.create_indexes()
+    task_id = str(db.tasks.insert_one({"task_name": "bench", "reward": REWARD}).inserted_id)
+    for user_id in range(1, users + 1):
+        store.assign(user_id, task_id)
+    return store, task_id
+
+
+def _read_check_write(db, store, catalog, user_id, task_id):
+    # The pre-change flow: look everything up, then write in separate steps
+    task = catalog.get(task_id)
+    if db.user_tasks.find_one({"user_id": user_id, "task_id": task_id, "status": ASSIGNED}) is None:
+        return
+    db.users.update_one({"user_id": user_id}, {"$inc": {"balance": task["reward"]}})
+    db.user_tasks.update_one({"user_id": user_id, "task_id": task_id}, {"$set": {"status": "completed"}})
+
+
+def _run_contended(func, users: int, attempts: int, threads: int) -> float:
+    work = [user_id for user_id in range(1, users + 1) for _ in range(attempts)]
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        for future in [pool.submit(func, user_id) for user_id in work]:
+            try:
+                future.result()
+            except ValueError:
+                pass  # already completed by a concurrent attempt
+    return time.perf_counter() - started
+
+
+def _paid(db) -> int:
+    return next(db.users.aggregate([{"$group": {"_id": None, "total": {"$sum": "$balance"}}}]))["total"]
+
+
+def run(users: int, attempts: int, threads: int, mongo_uri=None):
+    result = {"expected_paid": users * REWARD}
+
+    db = get_database(mongo_uri, name='simplrefq_bench_legacy')
+    store, task_id = _prepare(db, users)
+    catalog = TaskCatalog(db.tasks, db.task_versions)
+    elapsed = _run_contended(lambda user_id: _read_check_write(db, store, catalog, user_id, task_id),
+                             users, attempts, threads)
+    result["read_check_write"] = {"seconds": elapsed, "paid": _paid(db)}
+
+    db = get_database(mongo_uri, name='simplrefq_bench_atomic')
+    store, task_id = _prepare(db, users)
+    completion = TaskCompletion(db.user_tasks, db.users, TaskCatalog(db.tasks, db.task_versions))
+    elapsed = _run_contended(lambda user_id: completion.complete(user_id, task_id), users, attempts, threads)
+    result["conditional_claim"] = {"seconds": elapsed, "paid": _paid(db)}
+
+    db = get_database(mongo_uri, name='simplrefq_bench_batch')
+    store, task_id = _prepare(db, users)
+    completion = TaskCompletion(db.user_tasks, db.users, TaskCatalog(db.tasks, db.task_versions))
+    report = completion.complete_many((user_id, task_id) for user_id in range(1, users + 1)
+                                      for _ in range(attempts))
+    result["complete_many"] = {"seconds": report["duration_ms"] / 1000, "paid": _paid(db)}
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--users', type=int, default=200)
+    parser.add_argument('--attempts', type=int, default=4)
+    parser.add_argument('--threads', type=int, default=16)
+    parser.add_argument('--mongo-uri')
+    args = parser.parse_args()
+
+    if not args.mongo_uri:
+        print("note: mongomock is not atomic under threads; payouts below are indicative only")
+    result = run(args.users, args.attempts, args.threads, args.mongo_uri)
+    submitted = args.users * args.attempts
+    print(f"expected payout: {result['expected_paid']}")
+    for name in ('read_check_write', 'conditional_claim', 'complete_many'):
+        row = result[name]
+        print(f"{name:>17}: {submitted / row['seconds']:.0f} attempts/s  paid {row['paid']} "
+              f"({row['paid'] - result['expected_paid']:+d})")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,88 @@
+"""
+Transfers per second under contention: the legacy read-check-write transfer
+versus TransferEngine's conditional debit, plus a transfer_many payout run.
+
+    python -m benchmarks.bench_transfers --transfers 2000 --threads 16 --hot-users 10 [--mongo-uri ...]
+"""
+import argparse
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.common import get_database
+from src.ledger.transfers import InsufficientBalance, TransferEngine
+
+
+def legacy_transfer(users, logs, sender_id, receiver_id, amount):
+    """Pre-engine implementation: five round trips and a check-then-act race"""
+    sender = users.find_one({"user_id": sender_id})
+    if (sender.get("balance", 0) if sender else 0) < amount:
+        raise ValueError("Insufficient balance.")
+    for user_id, delta in ((sender_id, -amount), (receiver_id, amount)):
+        users.update_one({"user_id": user_id}, {"$inc": {"balance": delta}}, upsert=True)
+        logs.insert_one({"user_id": user_id, "event_type": "balance_update"})
+
+
+def _seed(db, hot_users, balance):
+    db.users.drop()
+    db.audit_logs.drop()
+    db.users.insert_many([{"user_id": i, "balance": balance, "referrals": 0} for i in range(hot_users)])
+
+
+def _contended(transfer, transfers, threads, hot_users, seed=7):
+    rng = random.Random(seed)
+    pairs = [tuple(rng.sample(range(hot_users), 2)) for _ in range(transfers)]
+
+    def one(pair):
+        try:
+            transfer(pair[0], pair[1], 10)
+            return 1
+        except (InsufficientBalance, ValueError):
+            return 0
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(threads) as pool:
+        applied = sum(pool.map(one, pairs))
+    elapsed = time.perf_counter() - started
+    return {"transfers_per_sec": transfers / elapsed, "applied": applied}
+
+
+def run(transfers, threads, hot_users, mongo_uri=None):
+    db = get_database(mongo_uri)
+    results = {}
+
+    _seed(db, hot_users, balance=50)
+    results["legacy"] = _contended(
+        lambda s, r, a: legacy_transfer(db.users, db.audit_logs, s, r, a), transfers, threads, hot_users)
+    results["legacy"]["negative_balances"] = db.users.count_documents({"balance": {"$lt": 0}})
+
+    _seed(db, hot_users, balance=50)
+    engine = TransferEngine(db.users)
+    results["engine"] = _contended(engine.transfer, transfers, threads, hot_users)
+    results["engine"]["negative_balances"] = db.users.count_documents({"balance": {"$lt": 0}})
+
+    _seed(db, 1, balance=transfers * 10)
+    payout = engine.transfer_many((0, 1000 + i, 10) for i in range(transfers))
+    results["transfer_many"] = {
+        "transfers_per_sec": transfers / (payout["duration_ms"] / 1000),
+        "applied": payout["applied"],
+        "writes": payout["writes"],
+    }
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--transfers', type=int, default=2000)
+    parser.add_argument('--threads', type=int, default=16)
+    parser.add_argument('--hot-users', type=int, default=10)
+    parser.add_argument('--mongo-uri')
+    args = parser.parse_args()
+
+    for name, row in run(args.transfers, args.threads, args.hot_users, args.mongo_uri).items():
+        print(f"{name:>13}: " + "  ".join(f"{k}={v:.1f}" if isinstance(v, float) else f"{k}={v}"
+                                          for k, v in row.items()))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,67 @@
+"""
+User document size and profile read latency before and after the task-array migration.
+
+    python -m benchmarks.bench_user_tasks --users 200 --tasks 20 --calls 200 [--mongo-uri mongodb://localhost]
+
+mongomock upserts are slow, so keep the defaults small unless --mongo-uri is given.
+"""
+import argparse
+import random
+
+import bson
+
+from benchmarks.common import get_database, seed_users, time_calls
+from src.cache.profile import PROFILE_PROJECTION
+from src.tasks.migrate import migrate_task_arrays
+from src.tasks.store import UserTaskStore
+
+
+def _mean_size(collection, projection=None, sample: int = 200) -> float:
+    documents = list(collection.find({}, projection).limit(sample))
+    return sum(len(bson.encode(document)) for document in documents) / max(len(documents), 1)
+
+
+def run(users: int, tasks: int, calls: int, mongo_uri=None):
+    db = get_database(mongo_uri)
+    seed_users(db.users, users)
+    db.users.create_index("user_id")
+    rng = random.Random(3)
+    db.users.update_many({}, {"$set": {
+        "assigned_tasks": [f"task{i}" for i in range(tasks // 10)],
+        "completed_tasks": [f"task{i}" for i in range(tasks // 10, tasks)],
+    }})
+
+    def read_full():
+        db.users.find_one({"user_id": rng.randint(1, users)})
+
+    def read_projected():
+        db.users.find_one({"user_id": rng.randint(1, users)}, PROFILE_PROJECTION)
+
+    before = {"doc_bytes": _mean_size(db.users), "read": time_calls(read_full, calls)}
+    UserTaskStore(db.user_tasks, db.users).create_indexes()
+    migration = migrate_task_arrays(db.users, db.user_tasks)
+    after = {"doc_bytes": _mean_size(db.users, PROFILE_PROJECTION), "read": time_calls(read_projected, calls)}
+    return {"before": before, "after": after, "migration": migration}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--users', type=int, default=200)
+    parser.add_argument('--tasks', type=int, default=20)
+    parser.add_argument('--calls', type=int, default=200)
+    parser.add_argument('--mongo-uri')
+    args = parser.parse_args()
+
+    result = run(args.users, args.tasks, args.calls, args.mongo_uri)
+    for name in ('before', 'after'):
+        row = result[name]
+        read = row['read']
+        print(f"{name:>6}: {row['doc_bytes']:.0f} B/doc  read mean {read['mean_ms']:.3f} ms  "
+              f"p50 {read['p50_ms']:.3f} ms  p95 {read['p95_ms']:.3f} ms")
+    migration = result['migration']
+    print(f"migration: {migration['users']} users, {migration['task_rows']} task rows "
+          f"in {migration['duration_ms']:.0f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,44 @@
+"""
+WalletManager construction cost, plus the one-off cost of each lazily built
+chain client and the sentiment model on first use.
+
+    python -m benchmarks.bench_wallet_manager [--constructions 20]
+"""
+import argparse
+import time
+
+
+def run(constructions: int):
+    started = time.perf_counter()
+    from src.wallet.wallet_manager import WalletManager
+    import_ms = (time.perf_counter() - started) * 1000
+
+    started = time.perf_counter()
+    managers = [WalletManager() for _ in range(constructions)]
+    construct_ms = (time.perf_counter() - started) * 1000 / constructions
+
+    first_use = {}
+    for attribute in ('web3', 'solana', 'stellar', 'tron', 'polygon', 'sentiment_analyzer'):
+        started = time.perf_counter()
+        try:
+            getattr(managers[0], attribute)
+            first_use[attribute] = (time.perf_counter() - started) * 1000
+        except Exception as e:
+            first_use[attribute] = f"unavailable ({e.__class__.__name__})"
+    return {"import_ms": import_ms, "construct_ms": construct_ms, "first_use_ms": first_use}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--constructions', type=int, default=20)
+    args = parser.parse_args()
+
+    result = run(args.constructions)
+    print(f"import:       {result['import_ms']:.1f} ms")
+    print(f"construction: {result['construct_ms']:.3f} ms per WalletManager()")
+    for name, value in result['first_use_ms'].items():
+        print(f"first use of {name:<18} " + (f"{value:.1f} ms" if isinstance(value, float) else value))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,53 @@
+"""
+Shared helpers for the benchmarks: database selection, seeding and timing.
+"""
+from typing import Callable, Dict, List, Optional
+import random
+import statistics
+import time
+
+
+def get_database(mongo_uri: Optional[str] = None, name: str = 'simplrefq_bench'):
+    """Return a real database when a URI is given, otherwise an in-memory mongomock one"""
+    if mongo_uri:
+        from pymongo import MongoClient
+        client = MongoClient(mongo_uri)
+        client.drop_database(name)
+        return client[name]
+    import mongomock
+    return mongomock.MongoClient()[name]
+
+
+def seed_users(collection, count: int, seed: int = 42, batch_size: int = 10000):
+    """Insert ``count`` synthetic users with skewed balances"""
+    rng = random.Random(seed)
+    batch: List[Dict] = []
+    for user_id in range(1, count + 1):
+        batch.append({
+            "user_id": user_id,
+            "username": f"user{user_id}",
+            "balance": int(rng.paretovariate(1.2) * 10),
+            "referrals": rng.randint(0, 20),
+            "rank": None,
+        })
+        if len(batch) >= batch_size:
+            collection.insert_many(batch)
+            batch = []
+    if batch:
+        collection.insert_many(batch)
+
+
+def time_calls(func: Callable, repeat: int) -> Dict:
+    """Call ``func`` ``repeat`` times and summarise latencies in milliseconds"""
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - started) * 1000)
+    samples.sort()
+    return {
+        "calls": repeat,
+        "mean_ms": statistics.fmean(samples),
+        "p50_ms": samples[len(samples) // 2],
+        "p95_ms": samples[min(len(samples) - 1, int(len(samples) * 0.95))],
+    }
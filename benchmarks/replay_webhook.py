@@ -0,0 +1,358 @@
+"""
+Replay Telegram updates against the webhook and measure latency end to end.
+
+    python -m benchmarks.replay_webhook --updates 5000 --rate 200 --concurrency 64 --users 10000 --skew 1.1
+    python -m benchmarks.replay_webhook --replay updates.jsonl --rate 50 --mongo-uri mongodb://localhost
+    python -m benchmarks.replay_webhook --url http://localhost:8000/webhook --api-port 8081 --updates 2000
+
+Updates are either synthetic (``/start`` plus a callback query for every
+``button`` action, users drawn from a Zipf distribution with exponent
+``--skew``; 0 is uniform) or read from a JSONL file of recorded updates,
+renumbered so the de-duplicator does not drop them. They are posted at
+Poisson arrival times of ``--rate`` per second with at most
+``--concurrency`` requests in flight; latencies are measured from the
+scheduled arrival, so a stalled server is not hidden by a stalled client.
+
+Bot API calls go to a fake Bot API on 127.0.0.1, so no network access is
+needed. Every handler sends exactly one reply, and the time from posting
+an update to the fake API receiving that chat's next sendMessage is the
+"reply" latency: webhook, update queue, handler, MongoDB, send queue and
+Bot API request. "ack" is the webhook response alone.
+
+By default the FastAPI webhook app from src/api/main.py runs in this
+process on mongomock (or ``--mongo-uri``) with seeded users. With
+``--url`` the updates go to a running deployment instead, which must be
+started with TELEGRAM_API_BASE_URL=http://127.0.0.1:<api-port>/bot.
+"""
+from collections import defaultdict, deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from itertools import accumulate
+from typing import Dict, Iterator, List, Optional
+from urllib.parse import parse_qs
+import argparse
+import asyncio
+import json
+import logging
+import os
+import random
+import threading
+import time
+
+from benchmarks.common import get_database, seed_users
+
+# Keys of the handler mapping in SimplRefQ.button
+BUTTON_ACTIONS = ('invite_friends', 'leaderboard', 'balance', 'wallet', 'ranking', 'daily_rewards')
+BOT_USER = {"id": 123456, "is_bot": True, "first_name": "Replay", "username": "replay_bot",
+            "can_join_groups": True, "can_read_all_group_messages": False, "supports_inline_queries": False}
+
+
+class FakeBotAPI:
+    """Answers Bot API calls locally and reports when each chat gets a reply"""
+
+    def __init__(self, port: int = 0, on_reply=None):
+        self.on_reply = on_reply
+        self.calls: Dict[str, int] = defaultdict(int)
+        self._lock = threading.Lock()
+        self._message_id = 0
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                length = int(self.headers.get('Content-Length') or 0)
+                body = self.rfile.read(length).decode()
+                if self.headers.get('Content-Type', '').startswith('application/json'):
+                    params = json.loads(body or '{}')
+                else:
+                    params = {key: values[0] for key, values in parse_qs(body).items()}
+                result = fake.handle(self.path.rsplit('/', 1)[-1], params)
+                payload = json.dumps({"ok": True, "result": result}).encode()
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            do_GET = do_POST
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', port), Handler)
+        self.server.daemon_threads = True
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.server.server_address[1]}/bot"
+
+    def start(self):
+        threading.Thread(target=self.server.serve_forever, name='fake-bot-api', daemon=True).start()
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def handle(self, method: str, params: Dict):
+        with self._lock:
+            self.calls[method] += 1
+        if method == 'getMe':
+            return BOT_USER
+        if method == 'getChatMember':
+            user_id = int(params.get('user_id', 0))
+            return {"status": "member", "user": {"id": user_id, "is_bot": False, "first_name": "User"}}
+        if method == 'sendMessage':
+            chat_id = int(params['chat_id'])
+            if self.on_reply:
+                self.on_reply(chat_id, time.perf_counter())
+            with self._lock:
+                self._message_id += 1
+                message_id = self._message_id
+            return {"message_id": message_id, "date": int(time.time()), "text": params.get('text', ''),
+                    "chat": {"id": chat_id, "type": "private"}, "from": BOT_USER}
+        return True
+
+
+def _user(user_id: int) -> Dict:
+    return {"id": user_id, "is_bot": False, "first_name": "User", "username": f"user{user_id}"}
+
+
+def start_update(update_id: int, user_id: int) -> Dict:
+    return {
+        "update_id": update_id,
+        "message": {
+            "message_id": update_id, "date": int(time.time()), "text": "/start",
+            "entities": [{"type": "bot_command", "offset": 0, "length": 6}],
+            "chat": {"id": user_id, "type": "private"}, "from": _user(user_id),
+        },
+    }
+
+
+def callback_update(update_id: int, user_id: int, action: str) -> Dict:
+    return {
+        "update_id": update_id,
+        "callback_query": {
+            "id": str(update_id), "from": _user(user_id), "chat_instance": str(user_id), "data": action,
+            "message": {"message_id": 1, "date": int(time.time()), "text": "menu",
+                        "chat": {"id": user_id, "type": "private"}, "from": BOT_USER},
+        },
+    }
+
+
+def synthetic_updates(count: int, users: int, skew: float, start_ratio: float, seed: int = 7) -> Iterator[Dict]:
+    """``count`` updates from ``users`` users; user ``k`` is picked with weight 1 / k ** skew"""
+    rng = random.Random(seed)
+    user_ids = range(1, users + 1)
+    cum_weights = list(accumulate(1 / k ** skew for k in user_ids))
+    for update_id in range(1, count + 1):
+        user_id = rng.choices(user_ids, cum_weights=cum_weights)[0]
+        if rng.random() < start_ratio:
+            yield start_update(update_id, user_id)
+        else:
+            yield callback_update(update_id, user_id, rng.choice(BUTTON_ACTIONS))
+
+
+def recorded_updates(path: str, count: Optional[int] = None) -> Iterator[Dict]:
+    """Updates from a JSONL file, cycled up to ``count`` and renumbered from 1"""
+    with open(path) as f:
+        recorded = [json.loads(line) for line in f if line.strip()]
+    total = count or len(recorded)
+    for update_id in range(1, total + 1):
+        update = dict(recorded[(update_id - 1) % len(recorded)])
+        update["update_id"] = update_id
+        yield update
+
+
+def chat_id_of(update: Dict) -> Optional[int]:
+    message = update.get("message") or (update.get("callback_query") or {}).get("message")
+    return message["chat"]["id"] if message else None
+
+
+def percentiles(samples: List[float]) -> Dict:
+    """p50/p95/p99 of millisecond samples"""
+    if not samples:
+        return {"count": 0, "p50_ms": None, "p95_ms": None, "p99_ms": None}
+    samples = sorted(samples)
+
+    def pick(q):
+        return samples[min(len(samples) - 1, int(len(samples) * q))]
+    return {"count": len(samples), "p50_ms": pick(0.50), "p95_ms": pick(0.95), "p99_ms": pick(0.99)}
+
+
+class ReplyTracker:
+    """Matches replies seen by the fake Bot API to the updates that caused them, per chat in order"""
+
+    def __init__(self):
+        self._pending: Dict[int, deque] = defaultdict(deque)
+        self._lock = threading.Lock()
+        self.latencies: List[float] = []
+        self.unexpected = 0
+
+    def expect(self, chat_id: int, sent_at: float):
+        with self._lock:
+            self._pending[chat_id].append(sent_at)
+
+    def forget(self, chat_id: int, sent_at: float):
+        with self._lock:
+            self._pending[chat_id].remove(sent_at)
+
+    def record(self, chat_id: int, received_at: float):
+        with self._lock:
+            pending = self._pending.get(chat_id)
+            if not pending:
+                self.unexpected += 1
+                return
+            self.latencies.append((received_at - pending.popleft()) * 1000)
+
+    @property
+    def outstanding(self) -> int:
+        with self._lock:
+            return sum(len(pending) for pending in self._pending.values())
+
+
+async def replay(client, url: str, updates: Iterator[Dict], rate: float, concurrency: int,
+                 tracker: ReplyTracker, secret_token: Optional[str] = None,
+                 drain_timeout: float = 30, seed: int = 7) -> Dict:
+    """Post ``updates`` at Poisson arrivals and wait for their replies"""
+    rng = random.Random(seed)
+    semaphore = asyncio.Semaphore(concurrency)
+    headers = {"X-Telegram-Bot-Api-Secret-Token": secret_token} if secret_token else {}
+    acks: List[float] = []
+    statuses: Dict[str, int] = defaultdict(int)
+    tasks = set()
+
+    async def post(update, scheduled):
+        chat_id = chat_id_of(update)
+        if chat_id is not None:
+            tracker.expect(chat_id, scheduled)
+        try:
+            response = await client.post(url, json=update, headers=headers)
+            status = str(response.status_code)
+        except Exception as e:
+            status = type(e).__name__
+        finally:
+            semaphore.release()
+        acks.append((time.perf_counter() - scheduled) * 1000)
+        statuses[status] += 1
+        if status != '200' and chat_id is not None:
+            tracker.forget(chat_id, scheduled)
+
+    started = time.perf_counter()
+    scheduled = started
+    for update in updates:
+        scheduled += rng.expovariate(rate)
+        delay = scheduled - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        await semaphore.acquire()
+        task = asyncio.create_task(post(update, scheduled))
+        tasks.add(task)
+        task.add_done_callback(tasks.discard)
+    if tasks:
+        await asyncio.gather(*tasks)
+    sent_for = time.perf_counter() - started
+
+    deadline = time.perf_counter() + drain_timeout
+    while tracker.outstanding and time.perf_counter() < deadline:
+        await asyncio.sleep(0.05)
+    elapsed = time.perf_counter() - started
+
+    total = sum(statuses.values())
+    errors = total - statuses.get('200', 0)
+    return {
+        "updates": total,
+        "statuses": dict(statuses),
+        "error_rate": errors / total if total else 0.0,
+        "replies": len(tracker.latencies),
+        "missing_replies": tracker.outstanding,
+        "unexpected_replies": tracker.unexpected,
+        "offered_rate": total / sent_for if sent_for else 0.0,
+        "throughput": len(tracker.latencies) / elapsed if elapsed else 0.0,
+        "duration_s": elapsed,
+        "ack": percentiles(acks),
+        "reply": percentiles(tracker.latencies),
+    }
+
+
+async def run_in_process(updates, args, tracker: ReplyTracker) -> Dict:
+    """Serve the webhook app in this process and replay against it over ASGI"""
+    import httpx
+    import SimplRefQ
+    from src.api.main import create_app
+
+    db = get_database(args.mongo_uri, name=SimplRefQ.DB_NAME)
+    seed_users(db.users, args.users)
+    SimplRefQ.init(db.client, use_transactions=False if args.mongo_uri is None else None)
+    SimplRefQ.create_indexes()
+    app = create_app(secret_token=args.secret)
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url='http://replay') as client:
+            return await replay(client, '/webhook', updates, args.rate, args.concurrency, tracker,
+                                args.secret, args.drain_timeout)
+
+
+async def run_remote(updates, args, tracker: ReplyTracker) -> Dict:
+    import httpx
+    async with httpx.AsyncClient(timeout=30) as client:
+        return await replay(client, args.url, updates, args.rate, args.concurrency, tracker,
+                            args.secret, args.drain_timeout)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--updates', type=int,
+                        help="number of updates to send (default 2000, or the whole --replay file)")
+    parser.add_argument('--rate', type=float, default=100, help="mean arrivals per second")
+    parser.add_argument('--concurrency', type=int, default=64, help="max requests in flight")
+    parser.add_argument('--users', type=int, default=10000, help="user population (and users seeded)")
+    parser.add_argument('--skew', type=float, default=1.0, help="Zipf exponent of user activity; 0 is uniform")
+    parser.add_argument('--start-ratio', type=float, default=0.1, help="share of /start among synthetic updates")
+    parser.add_argument('--replay', help="JSONL file of recorded updates instead of synthetic ones")
+    parser.add_argument('--url', help="webhook of a running deployment; default serves it in-process")
+    parser.add_argument('--secret', help="X-Telegram-Bot-Api-Secret-Token to send")
+    parser.add_argument('--mongo-uri', help="in-process mode only; default is mongomock")
+    parser.add_argument('--api-port', type=int, default=0, help="port of the fake Bot API (0 picks one)")
+    parser.add_argument('--lift-send-limits', action='store_true',
+                        help="in-process mode: disable the send queue's Telegram rate limits")
+    parser.add_argument('--drain-timeout', type=float, default=30, help="seconds to wait for outstanding replies")
+    parser.add_argument('--output', help="write the report as JSON to this path")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.WARNING)  # before SimplRefQ's INFO-level basicConfig
+
+    # SimplRefQ reads these at import, which happens in run_in_process. DB_NAME is
+    # forced, never inherited: with --mongo-uri, get_database drops that database first
+    os.environ['DB_NAME'] = 'simplrefq_bench'
+    os.environ.setdefault('TELEGRAM_BOT_TOKEN', '123456:replay')
+    tracker = ReplyTracker()
+    fake_api = FakeBotAPI(args.api_port, on_reply=tracker.record)
+    fake_api.start()
+    os.environ['TELEGRAM_API_BASE_URL'] = fake_api.base_url
+    if args.lift_send_limits:
+        os.environ['SEND_GLOBAL_RATE'] = os.environ['SEND_CHAT_RATE'] = '1000000'
+    print(f"fake Bot API at {fake_api.base_url}")
+
+    if args.replay:
+        updates = recorded_updates(args.replay, args.updates)
+    else:
+        updates = synthetic_updates(args.updates or 2000, args.users, args.skew, args.start_ratio)
+    try:
+        runner = run_remote if args.url else run_in_process
+        report = asyncio.run(runner(updates, args, tracker))
+    finally:
+        fake_api.stop()
+    report["bot_api_calls"] = dict(fake_api.calls)
+
+    print(f"{report['updates']} updates in {report['duration_s']:.1f} s "
+          f"(offered {report['offered_rate']:.1f}/s, replies {report['throughput']:.1f}/s)")
+    print(f"error rate {report['error_rate']:.2%}  statuses {report['statuses']}  "
+          f"missing replies {report['missing_replies']}")
+    for name in ('ack', 'reply'):
+        row = report[name]
+        if row["count"]:
+            print(f"{name:>5}: p50 {row['p50_ms']:.1f} ms  p95 {row['p95_ms']:.1f} ms  p99 {row['p99_ms']:.1f} ms")
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,211 @@
+"""
+Benchmark suite for the bot handlers and data paths, with regression checks.
+
+    python -m benchmarks.suite --sizes 10000 100000 1000000 --output results.json [--mongo-uri mongodb://localhost]
+    python -m benchmarks.suite --sizes 10000 --baseline results.json --max-regression 0.2 --threshold update_ranking=0.5
+
+Each size reseeds the same synthetic users (fixed seed) and times the
+Telegram ``leaderboard`` and ``ranking`` handlers, ``update_ranking``,
+``claim_daily_reward``, ``validate_task_completion``, ``transfer_balance``
+and ``daily_reminder``. Replies go to an in-process stub bot and reminders
+to stub senders with no provider rate limit, so only our own code and
+MongoDB are measured. With ``--baseline`` the run exits non-zero when an
+operation's p50 is slower than the baseline by more than its threshold.
+Without ``--mongo-uri`` the suite runs on mongomock, which is fine for
+comparing runs of the suite against each other but not for absolute numbers.
+"""
+from datetime import datetime, timezone
+from types import SimpleNamespace
+from typing import Dict, List, Optional
+import argparse
+import asyncio
+import json
+import logging
+import os
+import platform
+import random
+import sys
+
+from benchmarks.common import get_database, seed_users, time_calls
+from src.notifications.senders import StubSender
+
+# Forced, never inherited: with --mongo-uri, get_database drops this database first
+os.environ['DB_NAME'] = 'simplrefq_bench'
+import SimplRefQ  # noqa: E402  (reads DB_NAME at import)
+
+OPERATIONS = (
+    'leaderboard',
+    'ranking',
+    'update_ranking',
+    'claim_daily_reward',
+    'validate_task_completion',
+    'transfer_balance',
+    'daily_reminder',
+)
+# update_ranking and daily_reminder pass over every user; a few runs keep 1M affordable
+SCAN_CALLS = 3
+METRIC = 'p50_ms'
+
+
+class StubBot:
+    """Stands in for telegram.Bot; counts replies instead of calling the Bot API"""
+
+    def __init__(self):
+        self.sent = 0
+
+    async def send_message(self, chat_id, text, **kwargs):
+        self.sent += 1
+
+
+def _reset(db):
+    for name in ('users', 'user_tasks', 'tasks', 'audit_logs', 'notification_runs'):
+        db[name].delete_many({})
+    SimplRefQ.leaderboard_cache.invalidate()
+
+
+def _callback_update(user_id):
+    user = SimpleNamespace(id=user_id, username=f"user{user_id}")
+    return SimpleNamespace(callback_query=SimpleNamespace(from_user=user),
+                           effective_chat=SimpleNamespace(id=user_id))
+
+
+def run_size(db, size: int, calls: int) -> Dict[str, Dict]:
+    """Seed ``size`` users and time every operation against them"""
+    _reset(db)
+    seed_users(db.users, size)
+    db.users.update_many({}, {"$set": {"device_token": "bench-device"}})
+    rng = random.Random(size)
+    loop = asyncio.new_event_loop()
+    context = SimpleNamespace(bot=StubBot())
+    results = {}
+
+    def handler(callback):
+        return lambda: loop.run_until_complete(callback(_callback_update(rng.randint(1, size)), context))
+
+    results['leaderboard'] = time_calls(handler(SimplRefQ.leaderboard), calls)
+    results['ranking'] = time_calls(handler(SimplRefQ.ranking), calls)
+    results['update_ranking'] = time_calls(SimplRefQ.update_ranking, min(calls, SCAN_CALLS))
+
+    # Distinct users, so every call takes the "eligible" path and writes
+    claimants = iter(rng.sample(range(1, size + 1), calls))
+    results['claim_daily_reward'] = time_calls(lambda: SimplRefQ.claim_daily_reward(next(claimants)), calls)
+
+    SimplRefQ.create_task("benchmark", 10)
+    SimplRefQ.task_catalog.reload()
+    tasks, _ = SimplRefQ.task_catalog.page(None, 1)
+    task_id = tasks[0]["id"]
+    completers = rng.sample(range(1, size + 1), calls)
+    for user_id in completers:
+        SimplRefQ.task_store.assign(user_id, task_id)
+    completers = iter(completers)
+    results['validate_task_completion'] = time_calls(
+        lambda: SimplRefQ.validate_task_completion(next(completers), task_id), calls)
+
+    def transfer():
+        sender_id, receiver_id = rng.sample(range(1, size + 1), 2)
+        SimplRefQ.transfer_balance(sender_id, receiver_id, 1)
+    results['transfer_balance'] = time_calls(transfer, calls)
+
+    def reminder():
+        db.notification_runs.delete_many({})
+        report = SimplRefQ.daily_reminder()
+        assert report["sent"]["push"] == size, report
+    results['daily_reminder'] = time_calls(reminder, min(calls, SCAN_CALLS))
+
+    loop.close()
+    return results
+
+
+def run(sizes: List[int], calls: int, mongo_uri=None) -> Dict:
+    db = get_database(mongo_uri, name=SimplRefQ.DB_NAME)
+    SimplRefQ.init(db.client, use_transactions=False if mongo_uri is None else None)
+    SimplRefQ.create_indexes()
+    if mongo_uri is None:
+        SimplRefQ.ranking_engine.strategy = 'bulk'  # mongomock has no $setWindowFields
+    SimplRefQ.reminder_fanout.senders = {"push": StubSender(max_batch=500)}
+    SimplRefQ.reminder_fanout.rate_limits = {}
+    try:
+        results = {str(size): run_size(db, size, calls) for size in sizes}
+    finally:
+        SimplRefQ.task_catalog.stop()
+        SimplRefQ.audit_writer.close()
+    return {
+        "meta": {
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "backend": "mongodb" if mongo_uri else "mongomock",
+            "python": platform.python_version(),
+            "calls": calls,
+            "metric": METRIC,
+        },
+        "results": results,
+    }
+
+
+def compare(current: Dict, baseline: Dict, max_regression: float = 0.2,
+            thresholds: Optional[Dict[str, float]] = None) -> List[Dict]:
+    """Operations whose ``METRIC`` grew by more than their threshold (a ratio, 0.2 = 20%)"""
+    thresholds = thresholds or {}
+    regressions = []
+    for size, operations in current["results"].items():
+        for operation, stats in operations.items():
+            before = baseline.get("results", {}).get(size, {}).get(operation)
+            if not before or before[METRIC] <= 0:
+                continue
+            allowed = thresholds.get(operation, max_regression)
+            change = stats[METRIC] / before[METRIC] - 1
+            if change > allowed:
+                regressions.append({
+                    "size": size,
+                    "operation": operation,
+                    "baseline_ms": before[METRIC],
+                    "current_ms": stats[METRIC],
+                    "change": change,
+                    "allowed": allowed,
+                })
+    return regressions
+
+
+def _threshold(value: str):
+    operation, _, ratio = value.partition('=')
+    if operation not in OPERATIONS or not ratio:
+        raise argparse.ArgumentTypeError(f"expected <operation>=<ratio> with one of {', '.join(OPERATIONS)}")
+    return operation, float(ratio)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 100000, 1000000])
+    parser.add_argument('--calls', type=int, default=50)
+    parser.add_argument('--mongo-uri')
+    parser.add_argument('--output', help="write results as JSON to this path")
+    parser.add_argument('--baseline', help="results JSON from an earlier run to compare against")
+    parser.add_argument('--max-regression', type=float, default=0.2,
+                        help="allowed p50 slowdown as a ratio (default 0.2 = 20%%)")
+    parser.add_argument('--threshold', type=_threshold, action='append', default=[],
+                        help="per-operation override, e.g. update_ranking=0.5")
+    args = parser.parse_args()
+    logging.getLogger().setLevel(logging.WARNING)  # SimplRefQ logs every notification at INFO
+
+    report = run(args.sizes, args.calls, args.mongo_uri)
+    for size, operations in report["results"].items():
+        print(f"{size} users")
+        for operation, row in operations.items():
+            print(f"  {operation:>24}: mean {row['mean_ms']:.3f} ms  p50 {row['p50_ms']:.3f} ms  "
+                  f"p95 {row['p95_ms']:.3f} ms")
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(report, baseline, args.max_regression, dict(args.threshold))
+        for row in regressions:
+            print(f"REGRESSION {row['operation']} @ {row['size']} users: {row['baseline_ms']:.3f} -> "
+                  f"{row['current_ms']:.3f} ms ({row['change']:+.0%}, allowed {row['allowed']:+.0%})")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
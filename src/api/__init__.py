@@ -0,0 +1,3 @@
+"""
+ASGI entry points (served with ``uvicorn src.api.main:app``).
+"""
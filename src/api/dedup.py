@@ -0,0 +1,30 @@
+from collections import deque
+import threading
+
+
+class UpdateDeduplicator:
+    """Remembers the last ``window`` Telegram update_ids to drop webhook retries"""
+
+    def __init__(self, window: int = 10000):
+        self.window = window
+        self._order: deque = deque()
+        self._seen: set = set()
+        self._lock = threading.Lock()
+        self.duplicates = 0
+
+    def seen(self, update_id: int) -> bool:
+        """Record ``update_id``; returns True if it was already recorded"""
+        with self._lock:
+            if update_id in self._seen:
+                self.duplicates += 1
+                return True
+            self._seen.add(update_id)
+            self._order.append(update_id)
+            if len(self._order) > self.window:
+                self._seen.discard(self._order.popleft())
+            return False
+
+    def forget(self, update_id: int):
+        """Allow ``update_id`` to be accepted again, e.g. after it could not be queued"""
+        with self._lock:
+            self._seen.discard(update_id)
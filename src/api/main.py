@@ -0,0 +1,138 @@
+from typing import Callable, Optional
+from contextlib import asynccontextmanager
+import asyncio
+import json
+import logging
+import os
+import time
+
+from fastapi import FastAPI, Request, Response
+
+from src.api.dedup import UpdateDeduplicator
+from src.metrics.instrumentation import HTTP_LATENCY, metrics_payload, stats_collector
+
+logger = logging.getLogger(__name__)
+
+
+def _default_application():
+    import SimplRefQ
+    return SimplRefQ.get_application()
+
+
+async def _register_webhook(application, secret_token: Optional[str]):
+    import SimplRefQ
+    await SimplRefQ.register_webhook(application.bot, secret_token=secret_token)
+
+
+class UpdateForwarder:
+    """Moves acknowledged webhook payloads onto the bot's update queue.
+
+    The webhook handler only validates, de-duplicates and enqueues the raw
+    payload; parsing into ``telegram.Update`` and pushing onto
+    ``application.update_queue`` happen here, off the response path.
+    """
+
+    def __init__(self, application, max_pending: int = 10000):
+        self.application = application
+        self.intake: asyncio.Queue = asyncio.Queue(maxsize=max_pending)
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        await self.intake.join()
+        if self._task:
+            self._task.cancel()
+
+    async def _run(self):
+        from telegram import Update
+        while True:
+            payload = await self.intake.get()
+            try:
+                update = Update.de_json(payload, self.application.bot)
+                await self.application.update_queue.put(update)
+            except Exception as e:
+                logger.error(f"Dropping malformed update {payload.get('update_id')}: {e}")
+            finally:
+                self.intake.task_done()
+
+
+def create_app(application_factory: Callable = _default_application, dedup_window: int = 10000,
+               max_pending: int = 10000, secret_token: Optional[str] = None,
+               register_webhook: Optional[Callable] = None) -> FastAPI:
+    """Build the webhook app; the bot application is started with the ASGI lifespan.
+
+    ``register_webhook(application, secret_token)``, if given, is awaited once the
+    application has started, so Telegram learns the URL, ``allowed_updates`` and
+    the secret this app checks.
+    """
+    dedup = UpdateDeduplicator(dedup_window)
+
+    @asynccontextmanager
+    async def lifespan(app: FastAPI):
+        application = application_factory()
+        await application.initialize()
+        # post_init/post_shutdown are only invoked by run_webhook/run_polling, so call them here
+        if getattr(application, 'post_init', None):
+            await application.post_init(application)
+        await application.start()
+        if register_webhook:
+            await register_webhook(application, secret_token)
+        forwarder = UpdateForwarder(application, max_pending)
+        forwarder.start()
+        app.state.forwarder = forwarder
+        stats_collector.register_queue('webhook_intake', forwarder.intake.qsize)
+        try:
+            yield
+        finally:
+            await forwarder.stop()
+            await application.stop()
+            if getattr(application, 'post_shutdown', None):
+                await application.post_shutdown(application)
+            await application.shutdown()
+
+    app = FastAPI(lifespan=lifespan)
+    app.state.dedup = dedup
+
+    @app.middleware("http")
+    async def record_latency(request: Request, call_next):
+        started = time.perf_counter()
+        response = await call_next(request)
+        route = request.scope.get("route")
+        HTTP_LATENCY.labels('webhook', route.path if route else 'unmatched', request.method,
+                            str(response.status_code)).observe(time.perf_counter() - started)
+        return response
+
+    @app.get("/metrics")
+    async def metrics() -> Response:
+        body, content_type = metrics_payload()
+        return Response(body, media_type=content_type)
+
+    @app.post("/webhook")
+    @app.post("/api/webhook")
+    async def webhook(request: Request) -> Response:
+        if secret_token and request.headers.get("X-Telegram-Bot-Api-Secret-Token") != secret_token:
+            return Response(status_code=403)
+        try:
+            payload = json.loads(await request.body())
+            update_id = payload["update_id"]
+        except (ValueError, KeyError, TypeError):
+            return Response(status_code=400)
+        if not isinstance(update_id, int) or isinstance(update_id, bool):
+            return Response(status_code=400)
+
+        if dedup.seen(update_id):
+            return Response(status_code=200)
+        try:
+            app.state.forwarder.intake.put_nowait(payload)
+        except asyncio.QueueFull:
+            # Let Telegram retry later instead of blocking the response
+            dedup.forget(update_id)
+            return Response(status_code=503)
+        return Response(status_code=200)
+
+    return app
+
+
+app = create_app(secret_token=os.getenv('TELEGRAM_WEBHOOK_SECRET'), register_webhook=_register_webhook)
@@ -0,0 +1,109 @@
+from typing import Dict, Optional, Tuple
+from collections import OrderedDict
+import hashlib
+import json
+import threading
+import time
+
+
+class SyncService:
+    """Assembles the mini-app's ``/api/sync`` payload.
+
+    The per-user part comes from the profile cache, and the rank is the
+    materialised ``rank`` field written by ``RankingEngine`` (the
+    ``update_ranking`` job), so a sync never counts or sorts users. The
+    global balance is a ``$group`` aggregate recomputed at most every
+    ``stats_ttl`` seconds. Each user's payload and ETag are kept for
+    ``payload_ttl`` seconds and dropped whenever the profile cache drops or
+    replaces that user, so a revalidating poll that ends in a 304 is a dict
+    lookup.
+    """
+
+    def __init__(self, users_collection, profile_cache, stats_ttl: float = 60, payload_ttl: float = 5,
+                 max_entries: int = 10000):
+        self.users = users_collection
+        self.profiles = profile_cache
+        self.stats_ttl = stats_ttl
+        self.payload_ttl = payload_ttl
+        self.max_entries = max_entries
+        self._stats: Optional[Dict] = None
+        self._stats_expires = 0.0
+        self._lock = threading.Lock()
+        self._payloads: "OrderedDict[int, Tuple[Dict, str, float]]" = OrderedDict()
+        self._payloads_lock = threading.Lock()
+        self._generation = 0
+        self.hits = 0
+        self.misses = 0
+        profile_cache.listeners.append(self.invalidate)
+
+    def global_stats(self) -> Dict:
+        """Total balance across all users, cached for ``stats_ttl`` seconds"""
+        with self._lock:
+            if self._stats is None or self._stats_expires < time.monotonic():
+                result = list(self.users.aggregate([
+                    {"$group": {"_id": None, "total": {"$sum": "$balance"}, "users": {"$sum": 1}}}
+                ]))
+                total = result[0] if result else {"total": 0, "users": 0}
+                self._stats = {"globalBalance": total["total"], "users": total["users"]}
+                self._stats_expires = time.monotonic() + self.stats_ttl
+            return self._stats
+
+    def payload(self, user_id) -> Optional[Dict]:
+        user = self.profiles.get(user_id)
+        if user is None:
+            return None
+        completed = user.get("completed_tasks_count", 0)
+        assigned = user.get("assigned_tasks_count", 0)
+        wallet = user.get("wallet_address") or user.get("wallet")
+        return {
+            "balance": user.get("balance", 0),
+            "tasksCompleted": completed,
+            "progress": round(100 * completed / (completed + assigned)) if completed + assigned else 0,
+            "walletAddress": wallet if isinstance(wallet, str) else None,
+            "globalBalance": self.global_stats()["globalBalance"],
+            "leadershipRank": user.get("rank"),
+            "lastDailyReward": user.get("last_daily_reward"),
+        }
+
+    def get(self, user_id) -> Optional[Tuple[Dict, str]]:
+        """The user's payload and its ETag, or None if the user does not exist"""
+        with self._payloads_lock:
+            entry = self._payloads.get(user_id)
+            if entry is not None and entry[2] >= time.monotonic():
+                self._payloads.move_to_end(user_id)
+                self.hits += 1
+                return entry[0], entry[1]
+            generation = self._generation
+        self.misses += 1
+        payload = self.payload(user_id)
+        if payload is None:
+            return None
+        etag = self.etag(payload)
+        with self._payloads_lock:
+            # An invalidation while we were building means the payload may be stale: serve, don't keep
+            if generation == self._generation:
+                self._payloads[user_id] = (payload, etag, time.monotonic() + self.payload_ttl)
+                self._payloads.move_to_end(user_id)
+                while len(self._payloads) > self.max_entries:
+                    self._payloads.popitem(last=False)
+        return payload, etag
+
+    def invalidate(self, *user_ids):
+        with self._payloads_lock:
+            self._generation += 1
+            for user_id in user_ids:
+                self._payloads.pop(user_id, None)
+
+    @staticmethod
+    def etag(payload: Dict) -> str:
+        encoded = json.dumps(payload, sort_keys=True, default=str).encode()
+        return hashlib.sha1(encoded).hexdigest()
+
+    def stats(self) -> Dict:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "entries": len(self._payloads),
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+        }
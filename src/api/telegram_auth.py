@@ -0,0 +1,34 @@
+from typing import Dict, Optional
+from urllib.parse import parse_qsl
+import hashlib
+import hmac
+import json
+import time
+
+
+def validate_init_data(init_data: str, bot_token: str, max_age: int = 86400) -> Optional[Dict]:
+    """Validate Telegram WebApp ``initData`` and return its ``user`` object.
+
+    Implements the HMAC-SHA256 check from the Telegram Mini Apps docs:
+    the secret key is HMAC("WebAppData", bot_token) and the hash covers the
+    sorted ``key=value`` lines of every other field. Returns None when the
+    signature is wrong, the data is older than ``max_age`` or no user is set.
+    """
+    if not init_data or not bot_token:
+        return None
+    fields = dict(parse_qsl(init_data, keep_blank_values=True))
+    received_hash = fields.pop('hash', None)
+    if not received_hash:
+        return None
+
+    data_check_string = "\n".join(f"{key}={value}" for key, value in sorted(fields.items()))
+    secret_key = hmac.new(b"WebAppData", bot_token.encode(), hashlib.sha256).digest()
+    expected = hmac.new(secret_key, data_check_string.encode(), hashlib.sha256).hexdigest()
+    if not hmac.compare_digest(expected, received_hash):
+        return None
+    if max_age and time.time() - int(fields.get('auth_date', 0)) > max_age:
+        return None
+    try:
+        return json.loads(fields['user'])
+    except (KeyError, ValueError):
+        return None
@@ -0,0 +1,3 @@
+"""
+Audit log pipeline.
+"""
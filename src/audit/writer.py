@@ -0,0 +1,128 @@
+from typing import Dict, List, Optional
+from datetime import datetime
+import logging
+import queue
+import threading
+import time
+
+from pymongo.errors import BulkWriteError
+
+logger = logging.getLogger(__name__)
+
+_STOP = object()
+
+
+class _FlushRequest:
+    def __init__(self):
+        self.done = threading.Event()
+
+
+class AuditLogWriter:
+    """Buffers audit events and writes them to Mongo in batches.
+
+    ``log`` only enqueues, so callers never wait on a Mongo round trip. A
+    background thread drains the bounded queue with ``insert_many`` whenever
+    ``batch_size`` events are waiting or ``flush_interval`` seconds have passed
+    since the first buffered event. When the queue is full ``log`` blocks
+    (backpressure) instead of dropping events; ``close`` drains everything.
+    """
+
+    def __init__(self, logs_collection, max_queue: int = 10000, batch_size: int = 500,
+                 flush_interval: float = 1.0):
+        self.logs = logs_collection
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue: queue.Queue = queue.Queue(maxsize=max_queue)
+        self.written = 0
+        self.failed = 0
+        self._closed = False
+        # Held while checking _closed and enqueueing, so nothing lands behind close()'s _STOP
+        self._lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run, name='audit-log-writer', daemon=True)
+        self._thread.start()
+
+    def log(self, user_id, event_type: str, description: str, timeout: Optional[float] = None):
+        """Queue an audit event; blocks while the buffer is full"""
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("Audit log writer is closed.")
+            self._queue.put({
+                "user_id": user_id,
+                "event_type": event_type,
+                "description": description,
+                "timestamp": datetime.now()
+            }, timeout=timeout)
+
+    def log_many(self, events: List[Dict]):
+        """Queue pre-built event documents"""
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("Audit log writer is closed.")
+            for event in events:
+                event.setdefault("timestamp", datetime.now())
+                self._queue.put(event)
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Write everything queued so far; returns False on timeout"""
+        with self._lock:
+            if self._closed:
+                return True  # close() already drained the queue and nobody can add to it
+            request = _FlushRequest()
+            self._queue.put(request)
+        return request.done.wait(timeout)
+
+    def close(self):
+        """Flush pending events and stop the writer thread"""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._queue.put(_STOP)
+        self._thread.join()
+
+    @property
+    def pending(self) -> int:
+        return self._queue.qsize()
+
+    def _write(self, batch: List[Dict]):
+        if not batch:
+            return
+        try:
+            self.logs.insert_many(batch, ordered=False)
+            self.written += len(batch)
+        except BulkWriteError as e:
+            # With ordered=False the server still inserts every valid document
+            inserted = e.details.get('nInserted', 0)
+            self.written += inserted
+            self.failed += len(batch) - inserted
+            logger.error(f"Failed to write {len(batch) - inserted} audit events: {e}")
+        except Exception as e:
+            # PyMongoError, or e.g. bson InvalidDocument for an unencodable event; the thread lives on
+            self.failed += len(batch)
+            logger.error(f"Failed to write {len(batch)} audit events: {e}")
+
+    def _run(self):
+        batch: List[Dict] = []
+        deadline = None
+        while True:
+            timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                item = None
+
+            if item is None or item is _STOP or isinstance(item, _FlushRequest):
+                self._write(batch)
+                batch, deadline = [], None
+                if isinstance(item, _FlushRequest):
+                    item.done.set()
+                if item is _STOP:
+                    return
+                continue
+
+            batch.append(item)
+            if deadline is None:
+                deadline = time.monotonic() + self.flush_interval
+            if len(batch) >= self.batch_size:
+                self._write(batch)
+                batch, deadline = [], None
@@ -0,0 +1,3 @@
+"""
+In-process caches in front of Telegram API and MongoDB lookups.
+"""
@@ -0,0 +1,90 @@
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+from collections import OrderedDict
+import asyncio
+import time
+
+MEMBER_STATUSES = ('member', 'administrator', 'creator')
+
+
+class MembershipCache:
+    """TTL cache for "has this user joined the channel" checks.
+
+    Positive answers are kept for ``positive_ttl`` seconds and negative ones
+    for the much shorter ``negative_ttl``, so a user who joins after being
+    told to is let in quickly. ``record`` lets ``chat_member`` updates keep
+    entries fresh without an API call. Concurrent misses for the same user
+    share one lookup, and failed lookups are never cached; if the caller
+    running the shared lookup is cancelled, the others retry on their own.
+    """
+
+    def __init__(self, positive_ttl: float = 3600, negative_ttl: float = 30, max_entries: int = 100000):
+        self.positive_ttl = positive_ttl
+        self.negative_ttl = negative_ttl
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[int, Tuple[bool, float]]" = OrderedDict()
+        self._pending: Dict[int, asyncio.Future] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def _lookup(self, user_id) -> Optional[bool]:
+        entry = self._entries.get(user_id)
+        if entry is None:
+            return None
+        is_member, expires = entry
+        if expires < time.monotonic():
+            del self._entries[user_id]
+            return None
+        self._entries.move_to_end(user_id)
+        return is_member
+
+    def record(self, user_id, is_member: bool):
+        """Store a fresh answer, e.g. from a chat_member update"""
+        ttl = self.positive_ttl if is_member else self.negative_ttl
+        self._entries[user_id] = (is_member, time.monotonic() + ttl)
+        self._entries.move_to_end(user_id)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def is_member(self, user_id, fetch: Callable[[], Awaitable[bool]]) -> bool:
+        """Return the cached answer, calling ``fetch`` only on a miss"""
+        cached = self._lookup(user_id)
+        if cached is not None:
+            self.hits += 1
+            return cached
+        self.misses += 1
+        pending = self._pending.get(user_id)
+        if pending is not None:
+            try:
+                return await asyncio.shield(pending)
+            except asyncio.CancelledError:
+                if not pending.cancelled() or asyncio.current_task().cancelling():
+                    raise
+                # The caller running the shared lookup was cancelled; look up ourselves
+                return await self.is_member(user_id, fetch)
+
+        future = asyncio.get_running_loop().create_future()
+        self._pending[user_id] = future
+        try:
+            is_member = await fetch()
+            self.record(user_id, is_member)
+            future.set_result(is_member)
+            return is_member
+        except asyncio.CancelledError:
+            future.cancel()  # waiters retry instead of hanging on a future nobody resolves
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # Mark retrieved so an unawaited shared future does not warn
+            future.exception()
+            raise
+        finally:
+            del self._pending[user_id]
+
+    def stats(self) -> Dict:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "entries": len(self._entries),
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+        }
@@ -0,0 +1,107 @@
+from typing import Callable, Dict, List, Optional, Tuple
+from collections import OrderedDict
+import threading
+import time
+
+from bson import json_util
+
+# Legacy task arrays are excluded so unmigrated documents stay cheap to read
+PROFILE_PROJECTION = {"_id": 0, "assigned_tasks": 0, "completed_tasks": 0, "tasks_completed": 0}
+
+
+class ProfileCache:
+    """Read-through cache of user documents keyed by ``user_id``.
+
+    Lookups go to an in-process LRU with a short TTL, then to the optional
+    Redis tier, then to Mongo; whatever is loaded is stored in both tiers.
+    Every code path that writes a user document must call ``invalidate``
+    (or ``put`` with the new document) so later reads see the change;
+    ``listeners`` are called with the user ids on both, for caches built on
+    top of this one.
+    """
+
+    def __init__(self, users_collection, ttl: float = 10, max_entries: int = 10000,
+                 redis_client=None, redis_ttl: int = 300, key_prefix: str = 'user:'):
+        self.users = users_collection
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.redis = redis_client
+        self.redis_ttl = redis_ttl
+        self.key_prefix = key_prefix
+        self._entries: "OrderedDict[int, Tuple[Dict, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.listeners: List[Callable] = []
+        self.hits = 0
+        self.redis_hits = 0
+        self.misses = 0
+
+    def _local_get(self, user_id) -> Optional[Dict]:
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None:
+                return None
+            document, expires = entry
+            if expires < time.monotonic():
+                del self._entries[user_id]
+                return None
+            self._entries.move_to_end(user_id)
+            return document
+
+    def _local_put(self, user_id, document: Dict):
+        with self._lock:
+            self._entries[user_id] = (document, time.monotonic() + self.ttl)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def get(self, user_id) -> Optional[Dict]:
+        """Return a copy of the user's document, or None if the user does not exist"""
+        document = self._local_get(user_id)
+        if document is not None:
+            self.hits += 1
+            return dict(document)
+
+        if self.redis is not None:
+            raw = self.redis.get(f"{self.key_prefix}{user_id}")
+            if raw is not None:
+                self.redis_hits += 1
+                document = json_util.loads(raw)
+                self._local_put(user_id, document)
+                return dict(document)
+
+        self.misses += 1
+        document = self.users.find_one({"user_id": user_id}, PROFILE_PROJECTION)
+        if document is not None:
+            self._store(user_id, document)
+            return dict(document)
+        return None
+
+    def _store(self, user_id, document: Dict):
+        self._local_put(user_id, document)
+        if self.redis is not None:
+            self.redis.set(f"{self.key_prefix}{user_id}", json_util.dumps(document), ex=self.redis_ttl)
+
+    def put(self, user_id, document: Dict):
+        """Write-through: store an up-to-date document in every tier"""
+        self._store(user_id, document)
+        for listener in self.listeners:
+            listener(user_id)
+
+    def invalidate(self, *user_ids):
+        with self._lock:
+            for user_id in user_ids:
+                self._entries.pop(user_id, None)
+        if self.redis is not None and user_ids:
+            self.redis.delete(*(f"{self.key_prefix}{user_id}" for user_id in user_ids))
+        for listener in self.listeners:
+            listener(*user_ids)
+
+    def stats(self) -> Dict:
+        lookups = self.hits + self.redis_hits + self.misses
+        return {
+            "hits": self.hits,
+            "redis_hits": self.redis_hits,
+            "misses": self.misses,
+            "entries": len(self._entries),
+            "hit_ratio": (self.hits + self.redis_hits) / lookups if lookups else 0.0,
+        }
@@ -0,0 +1,3 @@
+"""
+MongoDB access helpers shared by the bot handlers and the Flask API.
+"""
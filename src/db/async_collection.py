@@ -0,0 +1,71 @@
+from typing import Any, Dict, List, Optional
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+import functools
+import os
+
+DEFAULT_MAX_WORKERS = int(os.getenv('MONGO_EXECUTOR_WORKERS', '32'))
+
+
+def create_executor(max_workers: int = DEFAULT_MAX_WORKERS) -> ThreadPoolExecutor:
+    """Create the bounded thread pool used to run blocking pymongo calls"""
+    return ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='mongo-io')
+
+
+class AsyncCollection:
+    """Awaitable facade over a pymongo collection.
+
+    Every call is shipped to a bounded executor so a slow Mongo round trip
+    only occupies a worker thread instead of the bot's event loop. Cursor
+    results are materialised inside the worker, so callers always get lists.
+    """
+
+    def __init__(self, collection, executor: Optional[ThreadPoolExecutor] = None):
+        self.collection = collection
+        self.executor = executor or create_executor()
+
+    async def call(self, func, *args, **kwargs):
+        """Run any blocking callable on this collection's executor"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, functools.partial(func, *args, **kwargs))
+
+    async def find_one(self, filter: Dict, *args, **kwargs) -> Optional[Dict]:
+        """Return the first matching document or None"""
+        return await self.call(self.collection.find_one, filter, *args, **kwargs)
+
+    async def find(self, filter: Optional[Dict] = None, projection: Optional[Dict] = None,
+                   sort: Optional[List] = None, limit: int = 0) -> List[Dict]:
+        """Run a find and return the matching documents as a list"""
+        def _find():
+            cursor = self.collection.find(filter or {}, projection)
+            if sort:
+                cursor = cursor.sort(sort)
+            if limit:
+                cursor = cursor.limit(limit)
+            return list(cursor)
+        return await self.call(_find)
+
+    async def aggregate(self, pipeline: List[Dict], **kwargs) -> List[Dict]:
+        """Run an aggregation pipeline and return its output as a list"""
+        return await self.call(lambda: list(self.collection.aggregate(pipeline, **kwargs)))
+
+    async def count_documents(self, filter: Dict, **kwargs) -> int:
+        return await self.call(self.collection.count_documents, filter, **kwargs)
+
+    async def insert_one(self, document: Dict, **kwargs):
+        return await self.call(self.collection.insert_one, document, **kwargs)
+
+    async def update_one(self, filter: Dict, update: Dict, **kwargs):
+        return await self.call(self.collection.update_one, filter, update, **kwargs)
+
+    async def update_many(self, filter: Dict, update: Dict, **kwargs):
+        return await self.call(self.collection.update_many, filter, update, **kwargs)
+
+    async def find_one_and_update(self, filter: Dict, update: Dict, **kwargs) -> Optional[Dict]:
+        return await self.call(self.collection.find_one_and_update, filter, update, **kwargs)
+
+    async def bulk_write(self, requests: List, **kwargs):
+        return await self.call(self.collection.bulk_write, requests, **kwargs)
+
+    async def delete_one(self, filter: Dict, **kwargs):
+        return await self.call(self.collection.delete_one, filter, **kwargs)
@@ -0,0 +1,167 @@
+"""
+Declared MongoDB indexes and a query-plan auditor.
+
+    python -m src.db.indexes [--apply] [--audit]
+
+``INDEXES`` lists every index the application relies on and ``QUERY_SHAPES``
+every hot query it issues; ``apply_indexes`` creates the former idempotently
+and ``audit_queries`` explains the latter, flagging collection scans and
+in-memory sorts. Both are meant to run at deploy time.
+"""
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional
+import argparse
+import logging
+import os
+import sys
+
+from pymongo import ASCENDING, DESCENDING, IndexModel
+from pymongo.errors import OperationFailure
+
+from src.leaderboard.cache import LEADERBOARD_PROJECTION
+from src.leaderboard.rank_lookup import RankLookup
+from src.leaderboard.ranking import RANK_SORT
+
+# Collection name -> index definitions (keys plus create_index options)
+INDEXES: Dict[str, List[Dict]] = {
+    "users": [
+        {"keys": [("user_id", ASCENDING)], "unique": True},
+        {"keys": RANK_SORT},
+        {"keys": [("rank_run", ASCENDING)], "sparse": True},
+    ],
+    "audit_logs": [
+        {"keys": [("user_id", ASCENDING), ("timestamp", DESCENDING)]},
+        {"keys": [("timestamp", DESCENDING)]},
+    ],
+    "user_tasks": [
+        {"keys": [("user_id", ASCENDING), ("task_id", ASCENDING)], "unique": True},
+        {"keys": [("user_id", ASCENDING), ("status", ASCENDING)]},
+    ],
+    "referrals": [
+        {"keys": [("user_id", ASCENDING)], "unique": True},
+        {"keys": [("ancestors", ASCENDING)]},
+        {"keys": [("referrer_id", ASCENDING)]},
+        {"keys": [("created_at", ASCENDING), ("referrer_id", ASCENDING)]},
+        {"keys": [("depth", DESCENDING)]},
+    ],
+}
+# The unique indexes correctness depends on (one user/edge/assignment per key);
+# init() ensures these on startup, the rest are created at deploy time
+UNIQUE_INDEXES: Dict[str, List[Dict]] = {
+    name: [spec for spec in specs if spec.get("unique")]
+    for name, specs in INDEXES.items()
+    if any(spec.get("unique") for spec in specs)
+}
+
+# Every hot query, in the form find(filter, projection).sort(sort).limit(limit)
+QUERY_SHAPES: List[Dict] = [
+    {"name": "user_by_id", "collection": "users", "filter": {"user_id": 1}},
+    {"name": "leaderboard_top", "collection": "users", "filter": {},
+     "projection": LEADERBOARD_PROJECTION, "sort": RANK_SORT, "limit": 50},
+    {"name": "rank_lookup", "collection": "users", "filter": RankLookup.ahead_filter(100, 5)},
+    {"name": "ranking_run_writes", "collection": "users", "filter": {"rank_run": 1}},
+    {"name": "notification_batch", "collection": "users", "filter": {"_id": {"$gt": 0}},
+     "sort": [("_id", ASCENDING)], "limit": 1000},
+    {"name": "user_logs", "collection": "audit_logs", "filter": {"user_id": 1},
+     "sort": [("timestamp", DESCENDING)], "limit": 50},
+    {"name": "user_task", "collection": "user_tasks", "filter": {"user_id": 1, "task_id": "t"}},
+    {"name": "user_tasks_by_status", "collection": "user_tasks",
+     "filter": {"user_id": 1, "status": "completed"}},
+    {"name": "referral_path", "collection": "referrals", "filter": {"user_id": 1}},
+    {"name": "referral_downline", "collection": "referrals", "filter": {"ancestors": 1}},
+    {"name": "referral_children", "collection": "referrals", "filter": {"referrer_id": {"$in": [1, 2]}}},
+    {"name": "referrals_in_window", "collection": "referrals",
+     "filter": {"created_at": {"$gte": datetime(2024, 1, 1)}}},
+    {"name": "referral_tree_depth", "collection": "referrals", "filter": {},
+     "sort": [("depth", DESCENDING)], "limit": 1},
+]
+
+# Plan stages that mean a query is not served by an index
+BAD_STAGES = {"COLLSCAN": "collection scan", "SORT": "in-memory sort"}
+
+
+def apply_indexes(db, indexes: Optional[Dict[str, List[Dict]]] = None) -> Dict:
+    """Create every declared index; existing identical indexes are left alone.
+
+    Returns, per collection, the index names ensured, any errors (e.g. a
+    unique index blocked by duplicate data) and indexes present on the
+    server that are not declared here.
+    """
+    report = {}
+    for collection_name, specs in (indexes or INDEXES).items():
+        collection = db[collection_name]
+        ensured, errors = [], []
+        for spec in specs:
+            options = {key: value for key, value in spec.items() if key != "keys"}
+            try:
+                ensured.extend(collection.create_indexes([IndexModel(spec["keys"], **options)]))
+            except OperationFailure as e:
+                logging.error(f"Could not create index {spec['keys']} on {collection_name}: {e}")
+                errors.append(str(e))
+        existing = set(collection.index_information())
+        report[collection_name] = {
+            "ensured": ensured,
+            "errors": errors,
+            "unmanaged": sorted(existing - set(ensured) - {"_id_"}),
+        }
+    return report
+
+
+def plan_stages(plan) -> List[str]:
+    """All stage names in an explain() plan tree, classic or slot-based"""
+    stages = []
+    if isinstance(plan, dict):
+        if "stage" in plan:
+            stages.append(plan["stage"])
+        for value in plan.values():
+            stages.extend(plan_stages(value))
+    elif isinstance(plan, list):
+        for value in plan:
+            stages.extend(plan_stages(value))
+    return stages
+
+
+def explain_shape(db, shape: Dict) -> Dict:
+    cursor = db[shape["collection"]].find(shape["filter"], shape.get("projection"))
+    if shape.get("sort"):
+        cursor = cursor.sort(shape["sort"])
+    if shape.get("limit"):
+        cursor = cursor.limit(shape["limit"])
+    return cursor.explain()
+
+
+def audit_queries(db, shapes: Iterable[Dict] = QUERY_SHAPES) -> List[Dict]:
+    """Explain every registered query; returns one finding per offending stage"""
+    findings = []
+    for shape in shapes:
+        winning_plan = explain_shape(db, shape).get("queryPlanner", {}).get("winningPlan", {})
+        for stage in plan_stages(winning_plan):
+            if stage in BAD_STAGES:
+                findings.append({"query": shape["name"], "collection": shape["collection"],
+                                 "stage": stage, "problem": BAD_STAGES[stage]})
+    return findings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--apply', action='store_true', help="create the declared indexes")
+    parser.add_argument('--audit', action='store_true', help="fail on COLLSCAN or in-memory SORT")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+
+    from pymongo import MongoClient
+    db = MongoClient(os.getenv('MONGO_URI'))[os.getenv('DB_NAME', 'Cluster0')]
+    failed = False
+    if args.apply:
+        for collection_name, result in apply_indexes(db).items():
+            logging.info(f"{collection_name}: {result}")
+            failed = failed or bool(result["errors"])
+    if args.audit:
+        for finding in audit_queries(db):
+            logging.error(f"{finding['query']} on {finding['collection']}: {finding['problem']}")
+            failed = True
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
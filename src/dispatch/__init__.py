@@ -0,0 +1,3 @@
+"""
+Update dispatching for the Telegram application.
+"""
@@ -0,0 +1,112 @@
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+import asyncio
+import logging
+import time
+
+from telegram.ext import BaseUpdateProcessor
+
+logger = logging.getLogger(__name__)
+
+
+def default_shard_key(update: object) -> Any:
+    """Chat id, falling back to user id, for ordering updates per conversation"""
+    chat = getattr(update, 'effective_chat', None)
+    if chat is not None:
+        return chat.id
+    user = getattr(update, 'effective_user', None)
+    if user is not None:
+        return user.id
+    return getattr(update, 'update_id', id(update))
+
+
+class _Shard:
+    def __init__(self):
+        self.queue: asyncio.Queue = asyncio.Queue()
+        self.processed = 0
+        self.total_wait = 0.0
+        self.total_run = 0.0
+        self.max_latency = 0.0
+        self.task: Optional[asyncio.Task] = None
+
+    def stats(self) -> Dict:
+        processed = self.processed or 1
+        return {
+            "queue_depth": self.queue.qsize(),
+            "processed": self.processed,
+            "avg_wait_ms": self.total_wait / processed * 1000,
+            "avg_run_ms": self.total_run / processed * 1000,
+            "max_latency_ms": self.max_latency * 1000,
+        }
+
+
+class ShardedUpdateProcessor(BaseUpdateProcessor):
+    """Runs updates from the same chat in order and different chats in parallel.
+
+    Each update is hashed by ``shard_key`` onto one of ``workers`` shard
+    queues, and every shard is drained by a single worker task. Updates for a
+    chat therefore keep their arrival order, while at most ``workers``
+    updates from different chats run at once. ``max_pending`` bounds the
+    number of updates queued or running across all shards.
+
+    Use with ``ApplicationBuilder().concurrent_updates(ShardedUpdateProcessor())``.
+    """
+
+    def __init__(self, workers: int = 16, max_pending: int = 10000,
+                 shard_key: Callable[[object], Any] = default_shard_key):
+        super().__init__(max_concurrent_updates=max_pending)
+        self.workers = workers
+        self.shard_key = shard_key
+        self._shards: List[_Shard] = []
+
+    async def initialize(self) -> None:
+        if self._shards:
+            return
+        self._shards = [_Shard() for _ in range(self.workers)]
+        for shard in self._shards:
+            shard.task = asyncio.create_task(self._work(shard))
+
+    async def shutdown(self) -> None:
+        for shard in self._shards:
+            await shard.queue.join()
+            shard.task.cancel()
+        self._shards = []
+
+    def shard_for(self, update: object) -> int:
+        return hash(self.shard_key(update)) % self.workers
+
+    async def do_process_update(self, update: object, coroutine: Awaitable[Any]) -> None:
+        done = asyncio.get_running_loop().create_future()
+        self._shards[self.shard_for(update)].queue.put_nowait((coroutine, done, time.perf_counter()))
+        await done
+
+    async def _work(self, shard: _Shard):
+        while True:
+            coroutine, done, queued_at = await shard.queue.get()
+            started = time.perf_counter()
+            try:
+                await coroutine
+            except asyncio.CancelledError:
+                if asyncio.current_task().cancelling():
+                    raise  # shutdown is stopping this worker
+                # Only the update was cancelled (e.g. it awaited a cancelled task); keep the shard alive
+                logger.error("Update processing was cancelled")
+            except Exception as e:
+                # Application.process_update already routes handler errors to error handlers
+                logger.error(f"Update processing failed: {e}")
+            finally:
+                finished = time.perf_counter()
+                shard.processed += 1
+                shard.total_wait += started - queued_at
+                shard.total_run += finished - started
+                shard.max_latency = max(shard.max_latency, finished - queued_at)
+                if not done.done():
+                    done.set_result(None)
+                shard.queue.task_done()
+
+    def stats(self) -> Dict:
+        shards = [shard.stats() for shard in self._shards]
+        return {
+            "workers": self.workers,
+            "queue_depth": sum(s["queue_depth"] for s in shards),
+            "shards": shards,
+        }
@@ -0,0 +1,3 @@
+"""
+Leaderboard ranking, rank lookup and caching.
+"""
@@ -0,0 +1,141 @@
+from typing import Dict, List, Optional
+import json
+import threading
+import time
+
+from src.leaderboard.ranking import RANK_SORT
+
+LEADERBOARD_PROJECTION = {"_id": 0, "user_id": 1, "username": 1, "balance": 1, "referrals": 1}
+
+
+class InMemoryLeaderboardBackend:
+    """Holds the cached top-N in process; entries expire after ``ttl`` seconds"""
+
+    def __init__(self, ttl: float = 300):
+        self.ttl = ttl
+        self._entries: Optional[List[Dict]] = None
+        self._expires_at = 0.0
+        self._lock = threading.Lock()
+
+    def get(self) -> Optional[List[Dict]]:
+        with self._lock:
+            if self._entries is not None and time.monotonic() >= self._expires_at:
+                self._entries = None
+            return self._entries
+
+    def set(self, entries: List[Dict]):
+        with self._lock:
+            self._entries = entries
+            self._expires_at = time.monotonic() + self.ttl
+
+    def clear(self):
+        with self._lock:
+            self._entries = None
+
+
+class RedisLeaderboardBackend:
+    """Shares the cached top-N between processes through Redis"""
+
+    def __init__(self, redis_client=None, url: Optional[str] = None, key: str = 'leaderboard:top',
+                 ttl: int = 300):
+        if redis_client is None:
+            import redis
+            redis_client = redis.Redis.from_url(url)
+        self.redis = redis_client
+        self.key = key
+        self.ttl = ttl
+
+    def get(self) -> Optional[List[Dict]]:
+        raw = self.redis.get(self.key)
+        return json.loads(raw) if raw is not None else None
+
+    def set(self, entries: List[Dict]):
+        self.redis.set(self.key, json.dumps(entries), ex=self.ttl)
+
+    def clear(self):
+        self.redis.delete(self.key)
+
+
+class LeaderboardCache:
+    """Top-N leaderboard served from a cache and invalidated by writes.
+
+    The cache holds the best ``size`` users; any page that fits inside that
+    window is served without touching Mongo. Writers report balance/referral
+    changes through ``on_user_change``, which only drops the cached window
+    when the change could alter it: the user is already listed, the new
+    score reaches the current cut-off, or the window is not yet full.
+    A load that overlaps an invalidation is returned but not stored, so it
+    cannot put pre-invalidation standings back into the cache.
+    """
+
+    def __init__(self, users_collection, size: int = 50, backend=None):
+        self.users = users_collection
+        self.size = size
+        self.backend = backend or InMemoryLeaderboardBackend()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    def _load(self) -> List[Dict]:
+        generation = self._generation
+        cursor = self.users.find({}, LEADERBOARD_PROJECTION).sort(RANK_SORT).limit(self.size)
+        entries = list(cursor)
+        with self._lock:
+            if generation == self._generation:
+                self.backend.set(entries)
+        return entries
+
+    def top(self, limit: int = 10, offset: int = 0) -> List[Dict]:
+        """Return ``limit`` users starting at ``offset`` in leaderboard order"""
+        if offset + limit > self.size:
+            self.misses += 1
+            cursor = self.users.find({}, LEADERBOARD_PROJECTION).sort(RANK_SORT).skip(offset).limit(limit)
+            return list(cursor)
+        entries = self.backend.get()
+        if entries is None:
+            self.misses += 1
+            entries = self._load()
+        else:
+            self.hits += 1
+        return entries[offset:offset + limit]
+
+    def on_user_change(self, user_id, balance, referrals=0):
+        """Invalidate the cached window if this user's new score can affect it"""
+        entries = self.backend.get()
+        if entries is None:
+            return
+        affected = (
+            len(entries) < self.size
+            or any(entry.get("user_id") == user_id for entry in entries)
+            or self._score(balance, referrals) >= self._score(entries[-1].get("balance", 0),
+                                                              entries[-1].get("referrals", 0))
+        )
+        if affected:
+            self.invalidate()
+
+    def on_user_removed(self, user_id):
+        """Invalidate the cached window if it lists this (deleted) user"""
+        entries = self.backend.get()
+        if entries is not None and any(entry.get("user_id") == user_id for entry in entries):
+            self.invalidate()
+
+    def invalidate(self):
+        with self._lock:
+            self._generation += 1
+            self.invalidations += 1
+            self.backend.clear()
+
+    @staticmethod
+    def _score(balance, referrals):
+        return (balance or 0, referrals or 0)
+
+    def stats(self) -> Dict:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "invalidations": self.invalidations,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+        }
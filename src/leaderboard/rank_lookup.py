@@ -0,0 +1,45 @@
+from typing import Dict, Optional
+
+from src.leaderboard.ranking import RANK_SORT
+
+# Compound index that lets the rank count walk index keys only
+RANK_INDEX = RANK_SORT
+
+
+class RankLookup:
+    """Answers "what is my rank" without sorting the whole collection.
+
+    A user's rank is one plus the number of users with a strictly greater
+    (balance, referrals) tuple; users tied on both fields share a rank. With
+    the compound ``RANK_INDEX`` in place that count is an index-only
+    COUNT_SCAN over the keys of the users ahead. It needs no sort and reads
+    no documents, but it is O(rank), not constant: a user near the bottom
+    walks nearly the whole index.
+    """
+
+    def __init__(self, users_collection):
+        self.users = users_collection
+
+    @staticmethod
+    def ahead_filter(balance, referrals) -> Dict:
+        """Filter matching every user ranked strictly above the given tuple"""
+        return {"$or": [
+            {"balance": {"$gt": balance}},
+            {"balance": balance, "referrals": {"$gt": referrals}},
+        ]}
+
+    def rank_for(self, balance, referrals) -> int:
+        return self.users.count_documents(self.ahead_filter(balance, referrals)) + 1
+
+    def get_rank(self, user_id) -> Optional[Dict]:
+        """Return the user's rank, balance and referrals, or None if unknown"""
+        user = self.users.find_one({"user_id": user_id}, {"_id": 0, "balance": 1, "referrals": 1})
+        if not user:
+            return None
+        balance = user.get("balance", 0)
+        referrals = user.get("referrals", 0)
+        return {
+            "rank": self.rank_for(balance, referrals),
+            "balance": balance,
+            "referrals": referrals,
+        }
@@ -0,0 +1,96 @@
+from typing import Dict, List, Optional
+import time
+
+from pymongo import UpdateOne
+
+# A rank is decided by balance, then referrals; users tied on both share it
+RANK_KEY = [("balance", -1), ("referrals", -1)]
+# Leaderboard order: the rank key, then user_id so tied users list in a stable order
+RANK_SORT = RANK_KEY + [("user_id", 1)]
+
+
+class RankingEngine:
+    """Materialises the ``rank`` field on every user document.
+
+    Ranks are shared on ties (1, 2, 2, 4), the same numbers ``RankLookup``
+    computes on demand. Two strategies are available:
+
+    * ``merge`` computes ranks server-side with ``$setWindowFields`` and writes
+      back only the changed documents with ``$merge`` (MongoDB 5.0+).
+    * ``bulk`` streams a projected, sorted cursor and sends unordered
+      ``UpdateOne`` batches through ``bulk_write`` for changed ranks only.
+
+    ``auto`` picks ``merge`` when the server supports it.
+    """
+
+    def __init__(self, users_collection, batch_size: int = 1000, strategy: str = 'auto'):
+        if strategy not in ('auto', 'merge', 'bulk'):
+            raise ValueError(f"Unknown ranking strategy: {strategy}")
+        self.users = users_collection
+        self.batch_size = batch_size
+        self.strategy = strategy
+
+    def _resolve_strategy(self) -> str:
+        if self.strategy != 'auto':
+            return self.strategy
+        version = self.users.database.client.server_info().get('versionArray', [0])
+        return 'merge' if version[0] >= 5 else 'bulk'
+
+    def merge_pipeline(self, run_id: int) -> List[Dict]:
+        """Aggregation pipeline that rewrites only ranks that moved"""
+        return [
+            {"$setWindowFields": {
+                "sortBy": dict(RANK_KEY),
+                "output": {"new_rank": {"$rank": {}}}
+            }},
+            {"$match": {"$expr": {"$ne": ["$rank", "$new_rank"]}}},
+            {"$project": {"_id": 1, "rank": "$new_rank", "rank_run": {"$literal": run_id}}},
+            {"$merge": {
+                "into": self.users.name,
+                "on": "_id",
+                "whenMatched": "merge",
+                "whenNotMatched": "discard"
+            }}
+        ]
+
+    def _run_merge(self) -> Dict:
+        run_id = time.time_ns()
+        self.users.aggregate(self.merge_pipeline(run_id), allowDiskUse=True)
+        writes = self.users.count_documents({"rank_run": run_id})
+        return {"scanned": self.users.estimated_document_count(), "writes": writes}
+
+    def _run_bulk(self) -> Dict:
+        scanned = writes = 0
+        batch: List[UpdateOne] = []
+        rank, previous = 0, None
+        projection = {"_id": 1, "rank": 1, "balance": 1, "referrals": 1}
+        cursor = self.users.find({}, projection).sort(RANK_SORT).batch_size(self.batch_size)
+        for position, user in enumerate(cursor, 1):
+            scanned += 1
+            key = (user.get("balance", 0), user.get("referrals", 0))
+            if key != previous:
+                rank, previous = position, key
+            if user.get("rank") == rank:
+                continue
+            batch.append(UpdateOne({"_id": user["_id"]}, {"$set": {"rank": rank}}))
+            if len(batch) >= self.batch_size:
+                writes += self._flush(batch)
+                batch = []
+        if batch:
+            writes += self._flush(batch)
+        return {"scanned": scanned, "writes": writes}
+
+    def _flush(self, batch: List[UpdateOne]) -> int:
+        result = self.users.bulk_write(batch, ordered=False)
+        return result.modified_count
+
+    def run(self, strategy: Optional[str] = None) -> Dict:
+        """Recompute ranks and return a report with timing and write count"""
+        chosen = strategy or self._resolve_strategy()
+        started = time.perf_counter()
+        stats = self._run_merge() if chosen == 'merge' else self._run_bulk()
+        stats.update({
+            "strategy": chosen,
+            "duration_ms": (time.perf_counter() - started) * 1000,
+        })
+        return stats
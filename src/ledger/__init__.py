@@ -0,0 +1,3 @@
+"""
+Balance transfers between users.
+"""
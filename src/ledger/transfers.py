@@ -0,0 +1,193 @@
+from typing import Dict, Iterable, List, Optional, Tuple
+from collections import defaultdict
+import time
+
+from pymongo import ReturnDocument, UpdateOne
+from pymongo.errors import BulkWriteError, PyMongoError
+
+SCORE_PROJECTION = {"_id": 0, "user_id": 1, "balance": 1, "referrals": 1}
+
+
+class InsufficientBalance(ValueError):
+    """Raised when the sender cannot cover a transfer"""
+
+
+def supports_transactions(client) -> bool:
+    """True when the deployment is a replica set or sharded cluster"""
+    try:
+        hello = client.admin.command('hello')
+    except PyMongoError:
+        return False
+    return bool(hello.get('setName')) or hello.get('msg') == 'isdbgrid'
+
+
+class TransferEngine:
+    """Moves balance between users without a read-then-write race.
+
+    The debit is a single conditional ``$inc`` filtered on
+    ``balance >= amount``, so concurrent transfers can never overdraw. On a
+    replica set the debit and credit run in one multi-document transaction;
+    on a standalone server a failed credit is compensated by refunding the
+    sender.
+    """
+
+    def __init__(self, users_collection, audit_writer=None, use_transactions: bool = False,
+                 batch_size: int = 1000):
+        self.users = users_collection
+        self.audit = audit_writer
+        self.use_transactions = use_transactions
+        self.batch_size = batch_size
+
+    def _in_session(self, func):
+        if not self.use_transactions:
+            return func(None)
+        with self.users.database.client.start_session() as session:
+            return session.with_transaction(func)
+
+    def _debit(self, user_id, amount, session=None) -> Optional[Dict]:
+        user = self.users.find_one_and_update(
+            {"user_id": user_id, "balance": {"$gte": amount}},
+            {"$inc": {"balance": -amount}},
+            projection=SCORE_PROJECTION,
+            return_document=ReturnDocument.BEFORE,
+            session=session
+        )
+        if user is not None:
+            user["balance"] -= amount
+        return user
+
+    def _credit(self, user_id, amount, session=None) -> Dict:
+        return self.users.find_one_and_update(
+            {"user_id": user_id},
+            {"$inc": {"balance": amount}},
+            projection=SCORE_PROJECTION,
+            upsert=True,
+            return_document=ReturnDocument.AFTER,
+            session=session
+        )
+
+    @staticmethod
+    def _validate(sender_id, receiver_id, amount):
+        if amount <= 0:
+            raise ValueError("Transfer amount must be positive.")
+        if sender_id == receiver_id:
+            raise ValueError("Cannot transfer balance to yourself.")
+
+    def transfer(self, sender_id, receiver_id, amount) -> Tuple[Dict, Dict]:
+        """Transfer ``amount`` and return the updated sender and receiver scores"""
+        self._validate(sender_id, receiver_id, amount)
+
+        def apply(session):
+            sender = self._debit(sender_id, amount, session)
+            if sender is None:
+                raise InsufficientBalance("Insufficient balance.")
+            try:
+                receiver = self._credit(receiver_id, amount, session)
+            except PyMongoError:
+                if session is None:
+                    self._credit(sender_id, amount)
+                raise
+            return sender, receiver
+
+        sender, receiver = self._in_session(apply)
+        if self.audit:
+            self.audit.log_many([
+                {"user_id": sender_id, "event_type": "balance_update",
+                 "description": f"Balance updated by {-amount} coins."},
+                {"user_id": receiver_id, "event_type": "balance_update",
+                 "description": f"Balance updated by {amount} coins."},
+            ])
+        return sender, receiver
+
+    def transfer_many(self, transfers: Iterable[Tuple]) -> Dict:
+        """Apply many (sender, receiver, amount) transfers in batches.
+
+        Each sender is debited once per batch for the sum of its transfers,
+        all or nothing; credits for the accepted transfers are then applied
+        with unordered ``bulk_write``. Without transactions, transfers whose
+        credit fails are refunded to the sender, as in ``transfer``. Funds
+        received within a batch cannot be spent in that same batch.
+        """
+        started = time.perf_counter()
+        report = {"applied": 0, "rejected": [], "writes": 0}
+        batch: List[Tuple] = []
+        for item in transfers:
+            batch.append(item)
+            if len(batch) >= self.batch_size:
+                self._apply_batch(batch, report)
+                batch = []
+        if batch:
+            self._apply_batch(batch, report)
+        report["duration_ms"] = (time.perf_counter() - started) * 1000
+        return report
+
+    def _apply_batch(self, batch: List[Tuple], report: Dict):
+        by_sender: Dict = defaultdict(list)
+        for sender_id, receiver_id, amount in batch:
+            try:
+                self._validate(sender_id, receiver_id, amount)
+            except ValueError as e:
+                report["rejected"].append((sender_id, receiver_id, amount, str(e)))
+                continue
+            by_sender[sender_id].append((receiver_id, amount))
+
+        def apply(session):
+            accepted, rejected, writes = [], [], 0
+            for sender_id, items in by_sender.items():
+                total = sum(amount for _, amount in items)
+                writes += 1
+                if self._debit(sender_id, total, session) is None:
+                    rejected.extend((sender_id, r, a, "Insufficient balance.") for r, a in items)
+                else:
+                    accepted.extend((sender_id, r, a) for r, a in items)
+
+            credits: Dict = defaultdict(int)
+            for _, receiver_id, amount in accepted:
+                credits[receiver_id] += amount
+            if credits:
+                receivers = list(credits)
+                try:
+                    self.users.bulk_write(
+                        [UpdateOne({"user_id": r}, {"$inc": {"balance": credits[r]}}, upsert=True)
+                         for r in receivers],
+                        ordered=False,
+                        session=session
+                    )
+                except BulkWriteError as e:
+                    if session is not None:
+                        raise
+                    # Standalone server: refund the transfers whose credit failed, keep the rest
+                    failed = {receivers[error["index"]] for error in e.details.get("writeErrors", [])}
+                    refunded = [t for t in accepted if t[1] in failed]
+                    self._refund(refunded)
+                    accepted = [t for t in accepted if t[1] not in failed]
+                    rejected.extend((s, r, a, "Credit failed.") for s, r, a in refunded)
+                except PyMongoError:
+                    if session is None:
+                        self._refund(accepted)
+                    raise
+                writes += len(credits)
+            return accepted, rejected, writes
+
+        accepted, rejected, writes = self._in_session(apply)
+        report["applied"] += len(accepted)
+        report["rejected"].extend(rejected)
+        report["writes"] += writes
+        if self.audit:
+            self.audit.log_many([
+                {"user_id": user_id, "event_type": "balance_update",
+                 "description": f"Balance updated by {change} coins."}
+                for sender_id, receiver_id, amount in accepted
+                for user_id, change in ((sender_id, -amount), (receiver_id, amount))
+            ])
+
+    def _refund(self, transfers: List[Tuple]):
+        """Give debited senders their coins back (the standalone-server compensation)"""
+        refunds: Dict = defaultdict(int)
+        for sender_id, _, amount in transfers:
+            refunds[sender_id] += amount
+        if refunds:
+            self.users.bulk_write(
+                [UpdateOne({"user_id": s}, {"$inc": {"balance": a}}) for s, a in refunds.items()],
+                ordered=False
+            )
@@ -0,0 +1,3 @@
+"""
+Prometheus metrics for the bot handlers, HTTP routes, MongoDB commands and background work.
+"""
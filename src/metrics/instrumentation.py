@@ -0,0 +1,178 @@
+from contextlib import contextmanager
+from typing import Callable, Dict, Tuple
+import functools
+import threading
+import time
+
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, Counter, Histogram, generate_latest
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+from pymongo import monitoring
+
+LATENCY_BUCKETS = (.001, .0025, .005, .01, .025, .05, .1, .25, .5, 1, 2.5, 5, 10)
+JOB_BUCKETS = (.1, .5, 1, 5, 15, 30, 60, 120, 300, 600, 1800, 3600)
+
+HANDLER_LATENCY = Histogram(
+    'simplrefq_telegram_handler_seconds', 'Telegram update handler latency', ['handler'],
+    buckets=LATENCY_BUCKETS)
+HANDLER_ERRORS = Counter(
+    'simplrefq_telegram_handler_errors_total', 'Telegram handlers that raised', ['handler'])
+HTTP_LATENCY = Histogram(
+    'simplrefq_http_request_seconds', 'HTTP request latency by route', ['app', 'route', 'method', 'status'],
+    buckets=LATENCY_BUCKETS)
+MONGO_COMMAND_LATENCY = Histogram(
+    'simplrefq_mongo_command_seconds', 'MongoDB command latency', ['collection', 'command'],
+    buckets=LATENCY_BUCKETS)
+MONGO_COMMAND_FAILURES = Counter(
+    'simplrefq_mongo_command_failures_total', 'MongoDB commands that failed', ['collection', 'command'])
+JOB_DURATION = Histogram(
+    'simplrefq_scheduler_job_seconds', 'Scheduled job run time', ['job'], buckets=JOB_BUCKETS)
+JOB_FAILURES = Counter(
+    'simplrefq_scheduler_job_failures_total', 'Scheduled job runs that raised', ['job'])
+
+
+@contextmanager
+def track_handler(name: str):
+    """Time one Telegram handler invocation and count it if it raises"""
+    started = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        HANDLER_ERRORS.labels(name).inc()
+        raise
+    finally:
+        HANDLER_LATENCY.labels(name).observe(time.perf_counter() - started)
+
+
+def timed_handler(name: str):
+    """Decorator form of ``track_handler`` for async handlers"""
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            with track_handler(name):
+                return await func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def timed_job(name: str, func: Callable) -> Callable:
+    """Wrap a scheduler job so every run is timed and failures are counted"""
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        except Exception:
+            JOB_FAILURES.labels(name).inc()
+            raise
+        finally:
+            JOB_DURATION.labels(name).observe(time.perf_counter() - started)
+    return wrapper
+
+
+class MongoCommandTimer(monitoring.CommandListener):
+    """pymongo listener recording per-collection, per-command latency"""
+
+    def __init__(self):
+        self._started: Dict[Tuple, Tuple[str, str]] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _collection(event) -> str:
+        target = event.command.get(event.command_name)
+        if isinstance(target, str):
+            return target
+        # getMore carries the cursor id; the collection is a separate field
+        return event.command.get('collection', '-') if event.command_name == 'getMore' else '-'
+
+    def started(self, event):
+        with self._lock:
+            self._started[(event.connection_id, event.request_id)] = (
+                self._collection(event), event.command_name)
+
+    def _finish(self, event):
+        with self._lock:
+            return self._started.pop((event.connection_id, event.request_id), ('-', event.command_name))
+
+    def succeeded(self, event):
+        collection, command = self._finish(event)
+        MONGO_COMMAND_LATENCY.labels(collection, command).observe(event.duration_micros / 1e6)
+
+    def failed(self, event):
+        collection, command = self._finish(event)
+        MONGO_COMMAND_LATENCY.labels(collection, command).observe(event.duration_micros / 1e6)
+        MONGO_COMMAND_FAILURES.labels(collection, command).inc()
+
+
+class StatsCollector:
+    """Exports queue depths and cache statistics read from ``stats()`` at scrape time.
+
+    Sources are plain callables so nothing is sampled between scrapes; a
+    source that is not ready yet (or raises) is skipped for that scrape.
+    """
+
+    def __init__(self):
+        self._queues: Dict[str, Callable[[], int]] = {}
+        self._caches: Dict[str, Callable[[], Dict]] = {}
+
+    def register_queue(self, name: str, depth: Callable[[], int]):
+        self._queues[name] = depth
+
+    def register_cache(self, name: str, stats: Callable[[], Dict]):
+        self._caches[name] = stats
+
+    def collect(self):
+        depths = GaugeMetricFamily('simplrefq_queue_depth', 'Items waiting in an in-process queue', labels=['queue'])
+        for name, depth in self._queues.items():
+            try:
+                depths.add_metric([name], depth())
+            except Exception:
+                continue
+        yield depths
+
+        ratios = GaugeMetricFamily('simplrefq_cache_hit_ratio', 'Cache hit ratio since start', labels=['cache'])
+        lookups = CounterMetricFamily('simplrefq_cache_lookups', 'Cache lookups by result',
+                                      labels=['cache', 'result'])
+        for name, stats in self._caches.items():
+            try:
+                values = stats()
+            except Exception:
+                continue
+            ratios.add_metric([name], values.get('hit_ratio', 0.0))
+            lookups.add_metric([name, 'hit'], values.get('hits', 0) + values.get('redis_hits', 0))
+            lookups.add_metric([name, 'miss'], values.get('misses', 0))
+        yield ratios
+        yield lookups
+
+
+stats_collector = StatsCollector()
+REGISTRY.register(stats_collector)
+
+
+def metrics_payload() -> Tuple[bytes, str]:
+    """Body and content type for a /metrics response"""
+    return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
+
+
+def instrument_flask(app, name: str = 'flask'):
+    """Time every Flask request by route template and serve /metrics"""
+    from flask import Response, g, request
+
+    @app.before_request
+    def _start_timer():
+        g.metrics_started = time.perf_counter()
+
+    @app.after_request
+    def _record_latency(response):
+        started = g.pop('metrics_started', None)
+        if started is not None:
+            route = request.url_rule.rule if request.url_rule else 'unmatched'
+            HTTP_LATENCY.labels(name, route, request.method, str(response.status_code)).observe(
+                time.perf_counter() - started)
+        return response
+
+    @app.route('/metrics', methods=['GET'])
+    def metrics():
+        body, content_type = metrics_payload()
+        return Response(body, content_type=content_type)
+
+    return app
@@ -0,0 +1,3 @@
+"""
+Notification senders and the batched fan-out pipeline.
+"""
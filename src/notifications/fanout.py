@@ -0,0 +1,164 @@
+from typing import Dict, List, Optional
+from datetime import datetime
+import asyncio
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+# Channel name -> user document field holding the address for that channel
+CHANNEL_FIELDS = {
+    "push": "device_token",
+    "email": "email",
+    "sms": "phone_number",
+}
+
+
+class AsyncTokenBucket:
+    """Token bucket limiting a channel to ``rate`` deliveries per second"""
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        self.rate = rate
+        self.capacity = capacity or rate
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self, amount: float = 1):
+        """Wait until ``amount`` deliveries fit the rate.
+
+        A chunk larger than the bucket waits for a full bucket and then
+        leaves it in debt, so later chunks wait for the whole cost to refill.
+        """
+        needed = min(amount, self.capacity)
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= needed:
+                    self.tokens -= amount
+                    return
+                await asyncio.sleep((needed - self.tokens) / self.rate)
+
+
+class NotificationFanout:
+    """Streams users and fans a message out to push, email and SMS senders.
+
+    Stage one reads users from a projected cursor ordered by ``_id`` in
+    batches; stage two chunks each batch per channel and hands the chunks to
+    that channel's sender, bounded by a shared concurrency limit and a
+    per-channel token bucket; stage three records a checkpoint once the
+    batch is done. Re-running with the same ``run_id`` resumes after the last
+    checkpointed user, and a finished run is not sent twice.
+    """
+
+    def __init__(self, users_collection, checkpoints_collection, senders: Dict,
+                 rate_limits: Optional[Dict[str, float]] = None, batch_size: int = 1000,
+                 concurrency: int = 8):
+        self.users = users_collection
+        self.checkpoints = checkpoints_collection
+        self.senders = senders
+        self.batch_size = batch_size
+        self.concurrency = concurrency
+        self.rate_limits = rate_limits or {}
+
+    def _projection(self) -> Dict:
+        projection = {"_id": 1, "user_id": 1}
+        for channel in self.senders:
+            projection[CHANNEL_FIELDS[channel]] = 1
+        return projection
+
+    def _read_batch(self, after_id) -> List[Dict]:
+        query = {"_id": {"$gt": after_id}} if after_id is not None else {}
+        return list(self.users.find(query, self._projection()).sort("_id", 1).limit(self.batch_size))
+
+    async def _producer(self, after_id, batches: asyncio.Queue):
+        try:
+            while True:
+                batch = await asyncio.to_thread(self._read_batch, after_id)
+                if not batch:
+                    await batches.put(None)
+                    return
+                await batches.put(batch)
+                after_id = batch[-1]["_id"]
+        except Exception as e:
+            # Hand the error to the consumer instead of leaving it waiting forever
+            await batches.put(e)
+
+    async def _send_chunk(self, channel, chunk, title, body, semaphore, buckets, report):
+        sender = self.senders[channel]
+        if channel in buckets:
+            await buckets[channel].acquire(len(chunk))
+        async with semaphore:
+            try:
+                delivered = await asyncio.to_thread(sender.deliver, chunk, title, body)
+            except Exception as e:
+                logger.error(f"{channel} delivery of {len(chunk)} messages failed: {e}")
+                delivered = 0
+        report["sent"][channel] += delivered
+        report["failed"][channel] += len(chunk) - delivered
+
+    async def run(self, run_id: str, title: str, body: str) -> Dict:
+        """Deliver ``title``/``body`` to every user, resuming ``run_id`` if it was interrupted"""
+        started = time.perf_counter()
+        checkpoint = await asyncio.to_thread(self.checkpoints.find_one, {"_id": run_id})
+        if checkpoint and checkpoint.get("status") == "done":
+            return {"run_id": run_id, "status": "done", "skipped": True}
+
+        after_id = checkpoint.get("last_id") if checkpoint else None
+        report = {
+            "run_id": run_id,
+            "resumed_from": after_id,
+            "users": checkpoint.get("users", 0) if checkpoint else 0,
+            "sent": {channel: 0 for channel in self.senders},
+            "failed": {channel: 0 for channel in self.senders},
+        }
+        if checkpoint:
+            for key in ("sent", "failed"):
+                for channel, count in checkpoint.get(key, {}).items():
+                    report[key][channel] = report[key].get(channel, 0) + count
+
+        semaphore = asyncio.Semaphore(self.concurrency)
+        buckets = {channel: AsyncTokenBucket(rate) for channel, rate in self.rate_limits.items()
+                   if channel in self.senders}
+        batches: asyncio.Queue = asyncio.Queue(maxsize=2)
+        producer = asyncio.create_task(self._producer(after_id, batches))
+
+        try:
+            while True:
+                batch = await batches.get()
+                if batch is None:
+                    break
+                if isinstance(batch, Exception):
+                    raise batch
+                sends = []
+                for channel, sender in self.senders.items():
+                    field = CHANNEL_FIELDS[channel]
+                    recipients = [user[field] for user in batch if user.get(field)]
+                    step = getattr(sender, 'max_batch', 1)
+                    for i in range(0, len(recipients), step):
+                        sends.append(self._send_chunk(channel, recipients[i:i + step], title, body,
+                                                      semaphore, buckets, report))
+                await asyncio.gather(*sends)
+                report["users"] += len(batch)
+                await asyncio.to_thread(self._checkpoint, run_id, batch[-1]["_id"], report, "running")
+        finally:
+            producer.cancel()
+
+        await asyncio.to_thread(self._checkpoint, run_id, None, report, "done")
+        report["status"] = "done"
+        report["duration_ms"] = (time.perf_counter() - started) * 1000
+        return report
+
+    def _checkpoint(self, run_id, last_id, report, status):
+        update = {
+            "status": status,
+            "users": report["users"],
+            "sent": report["sent"],
+            "failed": report["failed"],
+            "updated_at": datetime.now(),
+        }
+        if last_id is not None:
+            update["last_id"] = last_id
+        self.checkpoints.update_one({"_id": run_id}, {"$set": update}, upsert=True)
@@ -0,0 +1,146 @@
+from typing import Dict, List, Optional
+from email.message import EmailMessage
+import logging
+import queue
+import smtplib
+import threading
+
+logger = logging.getLogger(__name__)
+
+
+class StubSender:
+    """In-memory sender for tests and benchmarks; records every delivery"""
+
+    def __init__(self, max_batch: int = 1, fail_for: Optional[set] = None):
+        self.max_batch = max_batch
+        self.fail_for = fail_for or set()
+        self.sent: List[Dict] = []
+        self._lock = threading.Lock()
+
+    def deliver(self, recipients: List[str], title: str, body: str) -> int:
+        delivered = [r for r in recipients if r not in self.fail_for]
+        with self._lock:
+            self.sent.extend({"to": r, "title": title, "body": body} for r in delivered)
+        return len(delivered)
+
+
+class FCMSender:
+    """Firebase Cloud Messaging multicast sender sharing one initialised app"""
+
+    max_batch = 500  # FCM multicast limit
+
+    _app = None
+    _app_lock = threading.Lock()
+
+    def __init__(self, credentials_path: str):
+        self.credentials_path = credentials_path
+
+    def _get_app(self):
+        with FCMSender._app_lock:
+            if FCMSender._app is None:
+                import firebase_admin
+                from firebase_admin import credentials
+                FCMSender._app = firebase_admin.initialize_app(
+                    credentials.Certificate(self.credentials_path), name='notifications')
+            return FCMSender._app
+
+    def deliver(self, recipients: List[str], title: str, body: str) -> int:
+        from firebase_admin import messaging
+        message = messaging.MulticastMessage(
+            notification=messaging.Notification(title=title, body=body),
+            tokens=recipients
+        )
+        response = messaging.send_each_for_multicast(message, app=self._get_app())
+        return response.success_count
+
+
+class SMTPEmailSender:
+    """Sends email over a small pool of persistent SMTP connections"""
+
+    max_batch = 50
+
+    def __init__(self, host: str, port: int = 587, username: Optional[str] = None,
+                 password: Optional[str] = None, from_addr: Optional[str] = None, pool_size: int = 4):
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.from_addr = from_addr or username
+        self._pool: queue.LifoQueue = queue.LifoQueue(maxsize=pool_size)
+        for _ in range(pool_size):
+            self._pool.put(None)
+
+    def _connect(self) -> smtplib.SMTP:
+        connection = smtplib.SMTP(self.host, self.port, timeout=30)
+        connection.starttls()
+        if self.username:
+            connection.login(self.username, self.password)
+        return connection
+
+    def deliver(self, recipients: List[str], title: str, body: str) -> int:
+        connection = self._pool.get()
+        delivered = 0
+        try:
+            if connection is None:
+                connection = self._connect()
+            for address in recipients:
+                message = EmailMessage()
+                message['From'] = self.from_addr
+                message['To'] = address
+                message['Subject'] = title
+                message.set_content(body)
+                try:
+                    connection.send_message(message)
+                    delivered += 1
+                except smtplib.SMTPRecipientsRefused as e:
+                    logger.warning(f"Email to {address} refused: {e}")
+        except (smtplib.SMTPException, OSError) as e:
+            # SMTPServerDisconnected, socket errors, ...: never hand a broken connection back
+            logger.error(f"SMTP connection failed: {e}")
+            if connection is not None:
+                connection.close()
+            connection = None
+        finally:
+            self._pool.put(connection)
+        return delivered
+
+
+class HTTPSMSSender:
+    """Posts SMS messages to an HTTP gateway over a pooled requests session"""
+
+    max_batch = 100
+
+    def __init__(self, url: str, api_key: Optional[str] = None, pool_size: int = 8):
+        import requests
+        from requests.adapters import HTTPAdapter
+        self.url = url
+        self.session = requests.Session()
+        self.session.mount('https://', HTTPAdapter(pool_connections=1, pool_maxsize=pool_size))
+        if api_key:
+            self.session.headers['Authorization'] = f"Bearer {api_key}"
+
+    def deliver(self, recipients: List[str], title: str, body: str) -> int:
+        response = self.session.post(self.url, json={"to": recipients, "message": body}, timeout=30)
+        response.raise_for_status()
+        return len(recipients)
+
+
+def senders_from_env(env=None) -> Dict:
+    """Build the senders for every channel configured in the environment"""
+    import os
+    env = env if env is not None else os.environ
+    senders: Dict = {}
+    credentials_path = env.get('FIREBASE_CREDENTIALS')
+    if credentials_path and os.path.exists(credentials_path):
+        senders["push"] = FCMSender(credentials_path)
+    if env.get('SMTP_HOST'):
+        senders["email"] = SMTPEmailSender(
+            env['SMTP_HOST'],
+            port=int(env.get('SMTP_PORT', 587)),
+            username=env.get('SMTP_USERNAME'),
+            password=env.get('SMTP_PASSWORD'),
+            from_addr=env.get('SMTP_FROM')
+        )
+    if env.get('SMS_GATEWAY_URL'):
+        senders["sms"] = HTTPSMSSender(env['SMS_GATEWAY_URL'], api_key=env.get('SMS_GATEWAY_KEY'))
+    return senders
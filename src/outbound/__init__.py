@@ -0,0 +1,3 @@
+"""
+Outbound Telegram messaging.
+"""
@@ -0,0 +1,230 @@
+from typing import Any, Deque, Dict, Optional, Tuple
+from collections import deque
+import asyncio
+import logging
+import time
+
+from telegram.error import RetryAfter
+
+logger = logging.getLogger(__name__)
+
+# Priority lanes, drained in this order
+INTERACTIVE = 0
+BULK = 1
+LANES = (INTERACTIVE, BULK)
+
+
+class TokenBucket:
+    """Non-blocking token bucket; the caller decides how long to wait"""
+
+    def __init__(self, rate: float, capacity: float = 1):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def delay(self, now: float) -> float:
+        """Seconds until one token is available (0 if available now)"""
+        self._refill(now)
+        return 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+    def take(self, now: float):
+        self._refill(now)
+        self.tokens -= 1
+
+    def is_idle(self, now: float) -> bool:
+        self._refill(now)
+        return self.tokens >= self.capacity
+
+
+class _Job:
+    __slots__ = ("chat_id", "text", "kwargs", "priority", "future", "attempts")
+
+    def __init__(self, chat_id, text, kwargs, priority, future):
+        self.chat_id = chat_id
+        self.priority = priority
+        self.text = text
+        self.kwargs = kwargs
+        self.future = future
+        self.attempts = 0
+
+
+class OutboundSendQueue:
+    """Schedules ``bot.send_message`` calls within Telegram's rate limits.
+
+    A global bucket caps the bot at ``global_rate`` messages per second;
+    every chat has its own bucket (``chat_rate`` for private chats,
+    ``group_rate`` for groups, i.e. negative chat ids). The dispatcher always
+    serves the interactive lane before the bulk lane, and within a lane
+    skips chats that are still throttled so one busy chat cannot stall the
+    rest. A 429 ``RetryAfter`` pauses all sending for the requested time and
+    puts the message back at the front of its lane.
+    """
+
+    def __init__(self, bot, global_rate: float = 30, chat_rate: float = 1, group_rate: float = 20 / 60,
+                 chat_burst: float = 3, max_in_flight: int = 32, max_retries: int = 3, scan_limit: int = 256):
+        self.bot = bot
+        self.global_bucket = TokenBucket(global_rate, capacity=global_rate)
+        self.chat_rate = chat_rate
+        self.group_rate = group_rate
+        self.chat_burst = chat_burst
+        self.max_retries = max_retries
+        self.scan_limit = scan_limit
+        self._lanes: Dict[int, Deque[_Job]] = {lane: deque() for lane in LANES}
+        self._chat_buckets: Dict[Any, TokenBucket] = {}
+        self._in_flight = asyncio.Semaphore(max_in_flight)
+        self._tasks: set = set()
+        self._wakeup = asyncio.Event()
+        self._dispatcher: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._paused_until = 0.0
+        self._started_at = 0.0
+        self.sent = 0
+        self.failed = 0
+        self.rate_limited = 0
+
+    @property
+    def running(self) -> bool:
+        return self._dispatcher is not None and not self._dispatcher.done()
+
+    async def start(self):
+        self._loop = asyncio.get_running_loop()
+        self._started_at = time.monotonic()
+        self._dispatcher = asyncio.create_task(self._run())
+
+    async def stop(self, drain: bool = True, timeout: Optional[float] = 30):
+        """Stop dispatching; by default wait up to ``timeout`` seconds for queued messages to go out.
+
+        Sends still running at the deadline are cancelled, and messages still
+        queued when dispatching stops get their futures cancelled.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        expired = False
+        while drain and (any(self._lanes.values()) or self._tasks):
+            if deadline is not None and time.monotonic() >= deadline:
+                expired = True
+                logger.warning(f"Send queue did not drain within {timeout}s; dropping "
+                               f"{sum(map(len, self._lanes.values()))} queued messages")
+                break
+            await asyncio.sleep(0.01)
+        if self._dispatcher:
+            self._dispatcher.cancel()
+        if self._tasks:
+            if expired:
+                for task in self._tasks:
+                    task.cancel()
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+        for lane in self._lanes.values():
+            while lane:
+                job = lane.popleft()
+                if not job.future.done():
+                    job.future.cancel()
+
+    def send_message(self, chat_id, text: str, priority: int = INTERACTIVE, **kwargs) -> asyncio.Future:
+        """Queue a message; the returned future resolves to the sent Message"""
+        future = asyncio.get_running_loop().create_future()
+        self._lanes[priority].append(_Job(chat_id, text, kwargs, priority, future))
+        self._wakeup.set()
+        return future
+
+    def submit_threadsafe(self, chat_id, text: str, priority: int = BULK, **kwargs):
+        """Queue a message from another thread; returns a concurrent.futures.Future"""
+        async def enqueue():
+            return await self.send_message(chat_id, text, priority, **kwargs)
+        return asyncio.run_coroutine_threadsafe(enqueue(), self._loop)
+
+    def _bucket(self, chat_id) -> TokenBucket:
+        bucket = self._chat_buckets.get(chat_id)
+        if bucket is None:
+            if len(self._chat_buckets) > 50000:
+                now = time.monotonic()
+                self._chat_buckets = {k: b for k, b in self._chat_buckets.items() if not b.is_idle(now)}
+            is_group = isinstance(chat_id, str) or chat_id < 0
+            rate = self.group_rate if is_group else self.chat_rate
+            bucket = self._chat_buckets[chat_id] = TokenBucket(rate, capacity=self.chat_burst)
+        return bucket
+
+    def _next_ready(self) -> Tuple[Optional[_Job], Optional[float]]:
+        now = time.monotonic()
+        if self._paused_until > now:
+            return None, self._paused_until - now
+        wait = self.global_bucket.delay(now)
+        if wait:
+            return None, wait
+        soonest = None
+        for lane in LANES:
+            queue = self._lanes[lane]
+            for index, job in enumerate(queue):
+                if index >= self.scan_limit:
+                    break
+                delay = self._bucket(job.chat_id).delay(now)
+                if delay == 0:
+                    del queue[index]
+                    self.global_bucket.take(now)
+                    self._bucket(job.chat_id).take(now)
+                    return job, None
+                soonest = delay if soonest is None else min(soonest, delay)
+        return None, soonest
+
+    async def _run(self):
+        while True:
+            job, wait = self._next_ready()
+            if job is None:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=wait)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            await self._in_flight.acquire()
+            task = asyncio.create_task(self._send(job))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _send(self, job: _Job):
+        try:
+            message = await self.bot.send_message(chat_id=job.chat_id, text=job.text, **job.kwargs)
+            self.sent += 1
+            if not job.future.done():
+                job.future.set_result(message)
+        except RetryAfter as e:
+            self.rate_limited += 1
+            job.attempts += 1
+            retry_after = e.retry_after.total_seconds() if hasattr(e.retry_after, 'total_seconds') else e.retry_after
+            self._paused_until = max(self._paused_until, time.monotonic() + retry_after)
+            if job.attempts > self.max_retries:
+                self._fail(job, e)
+            else:
+                logger.warning(f"Telegram rate limit hit; pausing sends for {retry_after}s")
+                self._lanes[job.priority].appendleft(job)
+        except asyncio.CancelledError:
+            if not job.future.done():
+                job.future.cancel()
+            raise
+        except Exception as e:
+            # Network errors, bad kwargs...: still resolve the future so no caller hangs
+            self._fail(job, e)
+        finally:
+            self._in_flight.release()
+            self._wakeup.set()
+
+    def _fail(self, job: _Job, error: Exception):
+        self.failed += 1
+        logger.error(f"Failed to send message to {job.chat_id}: {error}")
+        if not job.future.done():
+            job.future.set_exception(error)
+
+    def stats(self) -> Dict:
+        elapsed = time.monotonic() - self._started_at if self._started_at else 0
+        return {
+            "sent": self.sent,
+            "failed": self.failed,
+            "rate_limited": self.rate_limited,
+            "queue_depth": {"interactive": len(self._lanes[INTERACTIVE]), "bulk": len(self._lanes[BULK])},
+            "in_flight": len(self._tasks),
+            "sent_per_sec": self.sent / elapsed if elapsed else 0.0,
+        }
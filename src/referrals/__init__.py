@@ -0,0 +1,3 @@
+"""
+Multi-level referral graph kept as materialised ancestor paths.
+"""
@@ -0,0 +1,32 @@
+"""
+Backfill the referral graph from ``users.referred_by``.
+
+    python -m src.referrals.backfill [--batch-size 10000]
+
+Run once when deploying the referral graph (and safely again afterwards):
+edges that already exist are left alone, so only referrals recorded
+before the graph existed are added.
+"""
+import argparse
+import logging
+import os
+
+from src.referrals.graph import ReferralGraph
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--batch-size', type=int, default=10000)
+    args = parser.parse_args()
+
+    from pymongo import MongoClient
+    db = MongoClient(os.getenv('MONGO_URI'))[os.getenv('DB_NAME', 'Cluster0')]
+    graph = ReferralGraph(db['referrals'])
+    graph.create_indexes()
+    report = graph.rebuild_from_users(db['users'], args.batch_size)
+    logging.basicConfig(level=logging.INFO)
+    logging.info(f"Referral graph backfill: {report}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,162 @@
+from datetime import datetime
+from typing import Dict, List, Optional
+import time
+
+from pymongo import DESCENDING, InsertOne, UpdateOne
+from pymongo.errors import BulkWriteError, DuplicateKeyError
+
+from src.db.indexes import INDEXES, apply_indexes
+
+DEFAULT_MAX_DEPTH = 10
+
+
+class ReferralGraph:
+    """Referral tree stored as one edge document per referred user.
+
+    Each document holds ``referrer_id``, ``ancestors`` (nearest first, capped
+    at ``max_depth`` entries) and ``depth``, the exact distance to the root.
+    Adding a referral copies the referrer's path, so downline questions up to
+    ``max_depth`` levels become one aggregate over the multikey ``ancestors``
+    index instead of a recursive walk. Checks that must see past the cap
+    (cycles, re-parenting a downline) follow ``referrer_id`` instead. The
+    unique ``user_id`` index makes "referred at most once" hold under
+    concurrency.
+    """
+
+    def __init__(self, edges_collection, max_depth: int = DEFAULT_MAX_DEPTH):
+        self.edges = edges_collection
+        self.max_depth = max_depth
+
+    def create_indexes(self) -> Dict:
+        """Create the ``referrals`` indexes declared in src/db/indexes.py"""
+        return apply_indexes(self.edges.database, {self.edges.name: INDEXES["referrals"]})
+
+    def _path(self, user_id) -> Dict:
+        edge = self.edges.find_one({"user_id": user_id}, {"_id": 0, "ancestors": 1, "depth": 1})
+        return edge or {"ancestors": [], "depth": 0}
+
+    def _has_ancestor(self, path: Dict, user_id) -> bool:
+        """Whether ``user_id`` is anywhere above ``path``, including beyond the capped list"""
+        while True:
+            if user_id in path["ancestors"]:
+                return True
+            if path["depth"] <= len(path["ancestors"]):
+                return False
+            # The stored list was capped: continue from its topmost entry
+            path = self._path(path["ancestors"][-1])
+
+    def add(self, referrer_id, referred_id, at: Optional[datetime] = None) -> Dict:
+        """Record that ``referrer_id`` referred ``referred_id``; returns the new edge"""
+        if referrer_id == referred_id:
+            raise ValueError("A user cannot refer themselves.")
+        parent = self._path(referrer_id)
+        if self._has_ancestor(parent, referred_id):
+            raise ValueError("Referral would create a cycle.")
+        edge = {
+            "user_id": referred_id,
+            "referrer_id": referrer_id,
+            "ancestors": ([referrer_id] + parent["ancestors"])[:self.max_depth],
+            "depth": parent["depth"] + 1,
+            "created_at": at or datetime.now(),
+        }
+        try:
+            self.edges.insert_one(edge)
+        except DuplicateKeyError:
+            raise ValueError("User has already been referred by someone else.")
+        edge.pop("_id", None)
+        self._reparent_downline(referred_id, edge)
+        return edge
+
+    def _reparent_downline(self, user_id, edge: Dict):
+        """A user who already had referrals just got a referrer: recompute their downline's paths.
+
+        Walks ``referrer_id`` one level at a time, so descendants deeper than
+        ``max_depth`` (absent from the capped ``ancestors``) get exact depths too.
+        """
+        frontier = {user_id: edge}
+        while frontier:
+            requests, children = [], {}
+            for child in self.edges.find({"referrer_id": {"$in": list(frontier)}},
+                                         {"user_id": 1, "referrer_id": 1}):
+                parent = frontier[child["referrer_id"]]
+                path = {"ancestors": ([child["referrer_id"]] + parent["ancestors"])[:self.max_depth],
+                        "depth": parent["depth"] + 1}
+                requests.append(UpdateOne({"_id": child["_id"]}, {"$set": path}))
+                children[child["user_id"]] = path
+            if requests:
+                self.edges.bulk_write(requests, ordered=False)
+            frontier = children
+
+    def downline_by_level(self, user_id, max_level: Optional[int] = None) -> Dict[int, int]:
+        """Number of users at each level below ``user_id`` (1 = direct referrals)"""
+        max_level = min(max_level or self.max_depth, self.max_depth)
+        rows = self.edges.aggregate([
+            {"$match": {"ancestors": user_id}},
+            {"$project": {"_id": 0, "ancestors": {"$slice": ["$ancestors", max_level]}}},
+            {"$unwind": {"path": "$ancestors", "includeArrayIndex": "position"}},
+            {"$match": {"ancestors": user_id}},
+            {"$group": {"_id": "$position", "count": {"$sum": 1}}},
+        ])
+        return {row["_id"] + 1: row["count"] for row in sorted(rows, key=lambda row: row["_id"])}
+
+    def downline_depth(self, user_id) -> int:
+        """Levels in ``user_id``'s subtree, capped at ``max_depth``"""
+        levels = self.downline_by_level(user_id)
+        return max(levels) if levels else 0
+
+    def tree_depth(self) -> int:
+        """Depth of the deepest referral chain in the whole graph"""
+        deepest = list(self.edges.find({}, {"_id": 0, "depth": 1}).sort("depth", DESCENDING).limit(1))
+        return deepest[0]["depth"] if deepest else 0
+
+    def top_referrers(self, since: datetime, until: Optional[datetime] = None, limit: int = 10) -> List[Dict]:
+        """Users with the most direct referrals created in ``[since, until)``"""
+        window = {"$gte": since}
+        if until is not None:
+            window["$lt"] = until
+        return [
+            {"user_id": row["_id"], "referrals": row["referrals"]}
+            for row in self.edges.aggregate([
+                {"$match": {"created_at": window}},
+                {"$group": {"_id": "$referrer_id", "referrals": {"$sum": 1}}},
+                {"$sort": {"referrals": -1, "_id": 1}},
+                {"$limit": limit},
+            ])
+        ]
+
+    def rebuild_from_users(self, users_collection, batch_size: int = 10000) -> Dict:
+        """Backfill edges from ``users.referred_by`` (one-off, for data predating the graph)"""
+        started = time.perf_counter()
+        parents = {user["user_id"]: user["referred_by"] for user in users_collection.find(
+            {"referred_by": {"$ne": None}}, {"_id": 0, "user_id": 1, "referred_by": 1})}
+        paths: Dict = {}
+
+        def path(user_id) -> Dict:
+            # Iterative walk up to the first known node, then fill in on the way down
+            chain = []
+            while user_id in parents and user_id not in paths and user_id not in chain:
+                chain.append(user_id)
+                user_id = parents[user_id]
+            known = paths.get(user_id, {"ancestors": [], "depth": 0})
+            for node in reversed(chain):
+                known = {"ancestors": ([parents[node]] + known["ancestors"])[:self.max_depth],
+                         "depth": known["depth"] + 1}
+                paths[node] = known
+            return paths.get(chain[0]) if chain else known
+
+        inserted, batch = 0, []
+        now = datetime.now()
+        for user_id, referrer_id in parents.items():
+            batch.append(InsertOne(dict(path(user_id), user_id=user_id, referrer_id=referrer_id, created_at=now)))
+            if len(batch) >= batch_size:
+                inserted += self._insert_ignoring_existing(batch)
+                batch = []
+        if batch:
+            inserted += self._insert_ignoring_existing(batch)
+        return {"edges": inserted, "duration_ms": (time.perf_counter() - started) * 1000}
+
+    def _insert_ignoring_existing(self, requests: List) -> int:
+        try:
+            return self.edges.bulk_write(requests, ordered=False).inserted_count
+        except BulkWriteError as e:
+            return e.details["nInserted"]
@@ -0,0 +1,3 @@
+"""
+Per-user task assignments and completions, stored outside the user document.
+"""
@@ -0,0 +1,172 @@
+from bisect import bisect_right
+from datetime import datetime
+from typing import Callable, Dict, Iterable, List, Optional
+import hashlib
+import json
+import logging
+import time
+
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+
+from src.tasks.store import ASSIGNED, COUNT_FIELDS, UserTaskStore
+
+logger = logging.getLogger(__name__)
+
+DUPLICATE_KEY = 11000
+# Operators a cohort filter coming from the API may not use
+FORBIDDEN_OPERATORS = {"$where", "$function", "$accumulator", "$expr"}
+
+
+def check_cohort_filter(cohort) -> Dict:
+    """Reject cohort filters that would run server-side JavaScript or expressions"""
+    if isinstance(cohort, dict):
+        for key, value in cohort.items():
+            if key in FORBIDDEN_OPERATORS:
+                raise ValueError(f"Operator {key} is not allowed in a cohort filter.")
+            check_cohort_filter(value)
+    elif isinstance(cohort, list):
+        for value in cohort:
+            check_cohort_filter(value)
+    return cohort
+
+
+class CohortAssigner:
+    """Assigns one task to a whole cohort in batches, resumably.
+
+    The cohort is either an explicit list of user ids or a filter on the
+    users collection; both are walked in ``user_id`` order. Each batch is one
+    unordered upsert ``bulk_write`` into ``user_tasks`` (existing rows are
+    left untouched, like ``$addToSet``) plus one ``update_many`` bumping the
+    counter of users who actually got the task. The run document in
+    ``runs_collection`` records the last user processed; a batch that was
+    in flight when a run died is rewritten and recounted on resume, so
+    counters stay exact.
+    """
+
+    def __init__(self, users_collection, task_store: UserTaskStore, runs_collection,
+                 batch_size: int = 1000):
+        self.users = users_collection
+        self.store = task_store
+        self.runs = runs_collection
+        self.batch_size = batch_size
+
+    def _batch(self, after, user_ids: Optional[List], cohort: Optional[Dict], until=None) -> List:
+        if user_ids is not None:
+            start = bisect_right(user_ids, after) if after is not None else 0
+            batch = user_ids[start:start + self.batch_size]
+            return [user_id for user_id in batch if until is None or user_id <= until]
+        bounds = {}
+        if after is not None:
+            bounds["$gt"] = after
+        if until is not None:
+            bounds["$lte"] = until
+        query = {"$and": [cohort, {"user_id": bounds}]} if bounds else cohort
+        cursor = self.users.find(query, {"_id": 0, "user_id": 1}).sort("user_id", 1).limit(self.batch_size)
+        return [user["user_id"] for user in cursor]
+
+    def _write_batch(self, task_id, batch: List, run_id) -> List:
+        """Upsert the rows; returns the user ids that did not have the task yet"""
+        requests = [
+            UpdateOne(
+                {"user_id": user_id, "task_id": task_id},
+                {"$setOnInsert": {"status": ASSIGNED, "assigned_at": datetime.now(), "assign_run": run_id}},
+                upsert=True
+            )
+            for user_id in batch
+        ]
+        try:
+            upserted = self.store.user_tasks.bulk_write(requests, ordered=False).upserted_ids
+        except BulkWriteError as e:
+            # A concurrent assign of the same (user, task) loses the upsert race harmlessly
+            if any(error["code"] != DUPLICATE_KEY for error in e.details["writeErrors"]):
+                raise
+            upserted = {row["index"]: row["_id"] for row in e.details["upserted"]}
+        if not upserted:
+            return []
+        # Resolve by _id rather than op index, which not every driver/mock reports faithfully
+        rows = self.store.user_tasks.find({"_id": {"$in": list(upserted.values())}}, {"_id": 0, "user_id": 1})
+        return [row["user_id"] for row in rows]
+
+    @staticmethod
+    def cohort_key(user_ids: Optional[List], cohort: Optional[Dict]) -> str:
+        """Fingerprint of the cohort, stored on the run so a resume must target the same users"""
+        encoded = json.dumps({"user_ids": user_ids, "cohort": cohort}, sort_keys=True, default=str)
+        return hashlib.sha1(encoded.encode()).hexdigest()
+
+    def check_resume(self, run_id: str, task_id, user_ids: Optional[Iterable] = None,
+                     cohort: Optional[Dict] = None) -> Optional[Dict]:
+        """The existing run document, or None; raises ValueError if it is for another task or cohort"""
+        run = self.runs.find_one({"_id": run_id})
+        if run is None:
+            return None
+        if run["task_id"] != task_id:
+            raise ValueError(f"Run {run_id} assigns task {run['task_id']}, not {task_id}.")
+        user_ids = sorted(set(user_ids)) if user_ids is not None else None
+        if run.get("cohort_key") not in (None, self.cohort_key(user_ids, cohort)):
+            raise ValueError(f"Run {run_id} was started for a different cohort.")
+        return run
+
+    def assign(self, run_id: str, task_id, user_ids: Optional[Iterable] = None,
+               cohort: Optional[Dict] = None,
+               progress: Optional[Callable[[Dict], None]] = None) -> Dict:
+        """Assign ``task_id`` to the cohort, resuming ``run_id`` if it was interrupted"""
+        if (user_ids is None) == (cohort is None):
+            raise ValueError("Pass exactly one of user_ids or cohort.")
+        started = time.perf_counter()
+        user_ids = sorted(set(user_ids)) if user_ids is not None else None
+
+        run = self.check_resume(run_id, task_id, user_ids, cohort)
+        if run and run.get("status") == "done":
+            return dict(run, skipped=True)
+        if run is None:
+            run = {
+                "_id": run_id,
+                "task_id": task_id,
+                "cohort_key": self.cohort_key(user_ids, cohort),
+                "total": len(user_ids) if user_ids is not None else self.users.count_documents(cohort),
+                "processed": 0,
+                "assigned": 0,
+                "already_assigned": 0,
+                "after": None,
+                "status": "running",
+                "started_at": datetime.now(),
+            }
+            self.runs.insert_one(run)
+        elif run.get("pending") is not None:
+            # The previous attempt died mid-batch: its rows may exist without counters
+            interrupted = self._batch(run["after"], user_ids, cohort, until=run["pending"])
+            self._write_batch(task_id, interrupted, run_id)
+            self.store.refresh_counts_many(interrupted)
+            new_count = self.store.user_tasks.count_documents(
+                {"user_id": {"$in": interrupted}, "task_id": task_id, "assign_run": run_id})
+            self._advance(run, interrupted, new_count)
+
+        while True:
+            batch = self._batch(run["after"], user_ids, cohort)
+            if not batch:
+                break
+            self.runs.update_one({"_id": run_id}, {"$set": {"pending": batch[-1]}})
+            new = self._write_batch(task_id, batch, run_id)
+            if new:
+                self.users.update_many({"user_id": {"$in": new}}, {"$inc": {COUNT_FIELDS[ASSIGNED]: 1}})
+            self._advance(run, batch, new_count=len(new))
+            if progress:
+                progress(dict(run))
+
+        self.runs.update_one({"_id": run_id}, {"$set": {"status": "done", "finished_at": datetime.now()}})
+        run["status"] = "done"
+        run["duration_ms"] = (time.perf_counter() - started) * 1000
+        logger.info(f"Bulk assignment {run_id}: {run['assigned']} assigned, "
+                    f"{run['already_assigned']} already had task {task_id}")
+        return run
+
+    def _advance(self, run: Dict, batch: List, new_count: int):
+        run["after"] = batch[-1] if batch else run["after"]
+        run["processed"] += len(batch)
+        run["assigned"] += new_count
+        run["already_assigned"] += len(batch) - new_count
+        self.runs.update_one({"_id": run["_id"]}, {
+            "$set": {key: run[key] for key in ("after", "processed", "assigned", "already_assigned")},
+            "$unset": {"pending": ""},
+        })
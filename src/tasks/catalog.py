@@ -0,0 +1,139 @@
+from bisect import bisect_right
+from typing import Dict, Iterator, List, Optional, Tuple
+import json
+import logging
+import threading
+import time
+
+from pymongo.errors import PyMongoError
+
+logger = logging.getLogger(__name__)
+
+TASK_PROJECTION = {"task_name": 1, "reward": 1, "description": 1, "created_at": 1}
+CATALOG_VERSION_ID = "tasks"
+
+
+def _serialize(task: Dict) -> Dict:
+    created_at = task.get("created_at")
+    return {
+        "id": str(task["_id"]),
+        "task_name": task.get("task_name"),
+        "reward": task.get("reward"),
+        "description": task.get("description"),
+        "created_at": created_at.isoformat() if hasattr(created_at, "isoformat") else created_at,
+    }
+
+
+class _Snapshot:
+    """Immutable view of the catalog; swapped whole on every reload"""
+
+    def __init__(self, tasks: List[Dict], version):
+        tasks.sort(key=lambda task: task["id"])
+        self.ids = [task["id"] for task in tasks]
+        self.by_id = {task["id"]: task for task in tasks}
+        # Pre-encoded once so serving a page is only string joins
+        self.encoded = [json.dumps(task) for task in tasks]
+        self.version = version
+
+
+class TaskCatalog:
+    """In-memory copy of the ``tasks`` collection with cursor pagination.
+
+    The catalog is loaded on first use and replaced wholesale when it changes.
+    With ``change_stream`` (replica sets only) ``start`` follows the tasks
+    change stream; otherwise it polls a version counter in
+    ``versions_collection``, which writers bump through ``bump_version``.
+    Readers never touch Mongo once the catalog is loaded.
+    """
+
+    def __init__(self, tasks_collection, versions_collection, change_stream: bool = False,
+                 poll_interval: float = 30, max_page_size: int = 500):
+        self.tasks = tasks_collection
+        self.versions = versions_collection
+        self.change_stream = change_stream
+        self.poll_interval = poll_interval
+        self.max_page_size = max_page_size
+        self._snapshot: Optional[_Snapshot] = None
+        self._load_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.reloads = 0
+
+    def _current_version(self):
+        document = self.versions.find_one({"_id": CATALOG_VERSION_ID}, {"version": 1})
+        return document["version"] if document else 0
+
+    def reload(self) -> _Snapshot:
+        with self._load_lock:
+            version = self._current_version()
+            tasks = [_serialize(task) for task in self.tasks.find({}, TASK_PROJECTION)]
+            self._snapshot = _Snapshot(tasks, version)
+            self.reloads += 1
+            return self._snapshot
+
+    def _view(self) -> _Snapshot:
+        snapshot = self._snapshot
+        return snapshot if snapshot is not None else self.reload()
+
+    def bump_version(self):
+        """Record a catalog change for other processes and reload this one"""
+        self.versions.update_one({"_id": CATALOG_VERSION_ID}, {"$inc": {"version": 1}}, upsert=True)
+        self.reload()
+
+    def get(self, task_id) -> Optional[Dict]:
+        return self._view().by_id.get(str(task_id))
+
+    def __len__(self) -> int:
+        return len(self._view().ids)
+
+    def _page_bounds(self, after: Optional[str], limit: int) -> Tuple[_Snapshot, int, int]:
+        snapshot = self._view()
+        limit = max(1, min(limit, self.max_page_size))
+        start = bisect_right(snapshot.ids, after) if after else 0
+        return snapshot, start, min(start + limit, len(snapshot.ids))
+
+    def page(self, after: Optional[str] = None, limit: int = 100) -> Tuple[List[Dict], Optional[str]]:
+        """Tasks ordered by id after the ``after`` cursor, plus the next cursor (None at the end)"""
+        snapshot, start, end = self._page_bounds(after, limit)
+        next_cursor = snapshot.ids[end - 1] if end < len(snapshot.ids) else None
+        return [snapshot.by_id[task_id] for task_id in snapshot.ids[start:end]], next_cursor
+
+    def iter_page_json(self, after: Optional[str] = None, limit: int = 100) -> Iterator[str]:
+        """Stream the same page as ``page`` as JSON text chunks"""
+        snapshot, start, end = self._page_bounds(after, limit)
+        next_cursor = snapshot.ids[end - 1] if end < len(snapshot.ids) else None
+        yield '{"tasks": ['
+        for index in range(start, end):
+            yield snapshot.encoded[index] if index == start else "," + snapshot.encoded[index]
+        yield f'], "next_cursor": {json.dumps(next_cursor)}}}'
+
+    def start(self):
+        """Keep the catalog fresh in a background thread"""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='task-catalog', daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        self._view()
+        if self.change_stream:
+            try:
+                self._follow_change_stream()
+                return
+            except PyMongoError as e:
+                logger.warning(f"Task change stream failed ({e}); polling the catalog version instead.")
+        while not self._stop.wait(self.poll_interval):
+            try:
+                if self._current_version() != self._view().version:
+                    self.reload()
+            except PyMongoError as e:
+                logger.warning(f"Task catalog refresh failed: {e}")
+
+    def _follow_change_stream(self):
+        with self.tasks.watch(max_await_time_ms=int(self.poll_interval * 1000)) as stream:
+            self.reload()  # pick up anything written before the stream opened
+            while not self._stop.is_set():
+                if stream.try_next() is not None:
+                    self.reload()
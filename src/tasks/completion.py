@@ -0,0 +1,188 @@
+from typing import Dict, Iterable, List, Tuple
+from collections import defaultdict
+from datetime import datetime
+import time
+
+from bson import ObjectId
+from pymongo import ReturnDocument, UpdateOne
+from pymongo.errors import PyMongoError
+
+from src.ledger.transfers import SCORE_PROJECTION
+from src.tasks.store import ASSIGNED, COMPLETED, COUNT_FIELDS
+
+
+class TaskNotAssigned(ValueError):
+    """Raised when a task is not (or no longer) assigned to the user"""
+
+
+class TaskCompletion:
+    """Completes tasks exactly once and credits their reward.
+
+    The ``user_tasks`` row is claimed with one conditional
+    ``find_one_and_update`` (``status: assigned`` -> ``completed``), so of any
+    number of concurrent attempts only one can win. The winner then applies
+    reward and counters to the user in a single ``$inc``. Rewards come from
+    the in-memory ``TaskCatalog``. On a replica set both writes share a
+    transaction; on a standalone server a failed credit reopens the task.
+    """
+
+    def __init__(self, user_tasks, users, catalog, audit_writer=None, use_transactions: bool = False,
+                 batch_size: int = 1000):
+        self.user_tasks = user_tasks
+        self.users = users
+        self.catalog = catalog
+        self.audit = audit_writer
+        self.use_transactions = use_transactions
+        self.batch_size = batch_size
+
+    def _in_session(self, func):
+        if not self.use_transactions:
+            return func(None)
+        with self.users.database.client.start_session() as session:
+            return session.with_transaction(func)
+
+    def _reward(self, task_id) -> int:
+        task = self.catalog.get(task_id)
+        if task is None:
+            raise ValueError("Task does not exist.")
+        return task["reward"]
+
+    @staticmethod
+    def _credit_update(reward, completed: int = 1) -> Dict:
+        return {"$inc": {"balance": reward, COUNT_FIELDS[ASSIGNED]: -completed,
+                         COUNT_FIELDS[COMPLETED]: completed}}
+
+    def _reopen(self, query: Dict):
+        self.user_tasks.update_many(query, {"$set": {"status": ASSIGNED},
+                                            "$unset": {"completed_at": "", "reward": "", "completion_batch": ""}})
+
+    def complete(self, user_id, task_id) -> Dict:
+        """Complete one task; returns the user's updated score fields and the reward"""
+        reward = self._reward(task_id)
+
+        def apply(session):
+            claimed = self.user_tasks.find_one_and_update(
+                {"user_id": user_id, "task_id": task_id, "status": ASSIGNED},
+                {"$set": {"status": COMPLETED, "completed_at": datetime.now(), "reward": reward}},
+                projection={"_id": 1},
+                session=session
+            )
+            if claimed is None:
+                raise TaskNotAssigned("Task not assigned to this user.")
+            try:
+                return self.users.find_one_and_update(
+                    {"user_id": user_id},
+                    self._credit_update(reward),
+                    projection=SCORE_PROJECTION,
+                    upsert=True,
+                    return_document=ReturnDocument.AFTER,
+                    session=session
+                )
+            except PyMongoError:
+                if session is None:
+                    self._reopen({"_id": claimed["_id"]})
+                raise
+
+        user = self._in_session(apply)
+        if self.audit:
+            self.audit.log_many([
+                {"user_id": user_id, "event_type": "balance_update",
+                 "description": f"Balance updated by {reward} coins."},
+                {"user_id": user_id, "event_type": "task_completed",
+                 "description": f"Completed task {task_id} for {reward} coins."},
+            ])
+        return dict(user, reward=reward)
+
+    def complete_many(self, completions: Iterable[Tuple]) -> Dict:
+        """Complete many (user_id, task_id) pairs, e.g. from a verification job.
+
+        Each batch costs three round trips whatever its size: a conditional
+        bulk claim tagged with a batch token, a read of the rows that token
+        won, and one bulk ``$inc`` per credited user. Items that are not a
+        ``(user_id, task_id)`` pair are rejected as ``(item, None, reason)``.
+        """
+        started = time.perf_counter()
+        report = {"completed": 0, "rejected": [], "credited_users": set()}
+        batch: List[Tuple] = []
+        for item in completions:
+            if not self._is_pair(item):
+                report["rejected"].append((item, None, "Malformed completion; expected [user_id, task_id]."))
+                continue
+            batch.append(tuple(item))
+            if len(batch) >= self.batch_size:
+                self._apply_batch(batch, report)
+                batch = []
+        if batch:
+            self._apply_batch(batch, report)
+        report["credited_users"] = sorted(report["credited_users"])
+        report["duration_ms"] = (time.perf_counter() - started) * 1000
+        return report
+
+    @staticmethod
+    def _is_pair(item) -> bool:
+        if not isinstance(item, (tuple, list)) or len(item) != 2:
+            return False
+        user_id, task_id = item
+        return (isinstance(user_id, int) and not isinstance(user_id, bool)
+                and isinstance(task_id, (str, int)) and not isinstance(task_id, bool))
+
+    def _apply_batch(self, batch: List[Tuple], report: Dict):
+        rewards = {}
+        for user_id, task_id in batch:
+            if (user_id, task_id) in rewards:
+                report["rejected"].append((user_id, task_id, "Duplicate completion in batch."))
+                continue
+            try:
+                rewards[(user_id, task_id)] = self._reward(task_id)
+            except ValueError as e:
+                report["rejected"].append((user_id, task_id, str(e)))
+        if not rewards:
+            return
+        token = ObjectId()
+        now = datetime.now()
+        user_ids = list({user_id for user_id, _ in rewards})
+
+        def apply(session):
+            self.user_tasks.bulk_write([
+                UpdateOne(
+                    {"user_id": user_id, "task_id": task_id, "status": ASSIGNED},
+                    {"$set": {"status": COMPLETED, "completed_at": now, "reward": reward,
+                              "completion_batch": token}}
+                )
+                for (user_id, task_id), reward in rewards.items()
+            ], ordered=False, session=session)
+            won = {(row["user_id"], row["task_id"]) for row in self.user_tasks.find(
+                {"user_id": {"$in": user_ids}, "completion_batch": token},
+                {"_id": 0, "user_id": 1, "task_id": 1}, session=session)}
+            credits: Dict = defaultdict(lambda: [0, 0])
+            for key in won:
+                credits[key[0]][0] += rewards[key]
+                credits[key[0]][1] += 1
+            if credits:
+                try:
+                    self.users.bulk_write([
+                        UpdateOne({"user_id": user_id}, self._credit_update(reward, count), upsert=True)
+                        for user_id, (reward, count) in credits.items()
+                    ], ordered=False, session=session)
+                except PyMongoError:
+                    if session is None:
+                        self._reopen({"user_id": {"$in": user_ids}, "completion_batch": token})
+                    raise
+            return won
+
+        won = self._in_session(apply)
+        for key in rewards:
+            if key not in won:
+                report["rejected"].append((key[0], key[1], "Task not assigned to this user."))
+        report["completed"] += len(won)
+        report["credited_users"].update(user_id for user_id, _ in won)
+        if self.audit and won:
+            # The same events complete() writes for each credit
+            events = []
+            for user_id, task_id in won:
+                reward = rewards[(user_id, task_id)]
+                events.append({"user_id": user_id, "event_type": "balance_update",
+                               "description": f"Balance updated by {reward} coins."})
+                events.append({"user_id": user_id, "event_type": "task_completed",
+                               "description": f"Completed task {task_id} for {reward} coins."})
+            self.audit.log_many(events)
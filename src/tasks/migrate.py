@@ -0,0 +1,85 @@
+"""
+Move task arrays off user documents into ``user_tasks``.
+
+    python -m src.tasks.migrate [--batch-size 1000] [--dry-run]
+
+Idempotent and resumable: only users still carrying an array are selected,
+task rows are upserted, and each user's arrays are dropped only after their
+rows are written, so an interrupted run simply picks up the remainder.
+Counters are recomputed from ``user_tasks`` rather than the arrays, so rows
+assigned since the deploy (already counted by ``UserTaskStore``) are kept.
+"""
+from typing import Dict, List
+import argparse
+import logging
+import os
+import time
+
+from pymongo import UpdateOne
+
+from src.tasks.store import ASSIGNED, COMPLETED, LEGACY_TASK_FIELDS, UserTaskStore
+
+
+def _legacy_filter() -> Dict:
+    return {"$or": [{field: {"$exists": True}} for field in LEGACY_TASK_FIELDS]}
+
+
+def _convert(user: Dict, task_rows: List, user_updates: List):
+    completed = set(user.get("completed_tasks") or []) | set(user.get("tasks_completed") or [])
+    assigned = set(user.get("assigned_tasks") or []) - completed
+    for status, task_ids in ((ASSIGNED, assigned), (COMPLETED, completed)):
+        for task_id in task_ids:
+            task_rows.append(UpdateOne(
+                {"user_id": user["user_id"], "task_id": task_id},
+                {"$setOnInsert": {"status": status, "migrated": True}},
+                upsert=True
+            ))
+    user_updates.append(UpdateOne(
+        {"_id": user["_id"]},
+        {"$unset": {field: "" for field in LEGACY_TASK_FIELDS}}
+    ))
+
+
+def migrate_task_arrays(users, user_tasks, batch_size: int = 1000, dry_run: bool = False) -> Dict:
+    """Convert every user still holding task arrays; returns counts and duration"""
+    started = time.perf_counter()
+    projection = {"user_id": 1, **{field: 1 for field in LEGACY_TASK_FIELDS}}
+    report = {"users": 0, "task_rows": 0, "batches": 0}
+    store = UserTaskStore(user_tasks, users)
+    while True:
+        batch = list(users.find(_legacy_filter(), projection).limit(batch_size))
+        if not batch:
+            break
+        task_rows: List = []
+        user_updates: List = []
+        for user in batch:
+            _convert(user, task_rows, user_updates)
+        report["users"] += len(batch)
+        report["task_rows"] += len(task_rows)
+        report["batches"] += 1
+        if dry_run:
+            break
+        if task_rows:
+            user_tasks.bulk_write(task_rows, ordered=False)
+        store.refresh_counts_many([user["user_id"] for user in batch])
+        users.bulk_write(user_updates, ordered=False)
+    report["duration_ms"] = (time.perf_counter() - started) * 1000
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--batch-size', type=int, default=1000)
+    parser.add_argument('--dry-run', action='store_true', help="convert only the first batch, write nothing")
+    args = parser.parse_args()
+
+    from pymongo import MongoClient
+    db = MongoClient(os.getenv('MONGO_URI'))[os.getenv('DB_NAME', 'Cluster0')]
+    UserTaskStore(db['user_tasks'], db['users']).create_indexes()
+    report = migrate_task_arrays(db['users'], db['user_tasks'], args.batch_size, args.dry_run)
+    logging.basicConfig(level=logging.INFO)
+    logging.info(f"Task array migration: {report}")
+
+
+if __name__ == '__main__':
+    main()
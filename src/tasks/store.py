@@ -0,0 +1,111 @@
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional
+
+from pymongo import UpdateOne
+from pymongo.errors import DuplicateKeyError
+
+from src.db.indexes import INDEXES, apply_indexes
+
+ASSIGNED = "assigned"
+COMPLETED = "completed"
+
+# Counters kept on the user document in place of the task arrays
+COUNT_FIELDS = {ASSIGNED: "assigned_tasks_count", COMPLETED: "completed_tasks_count"}
+LEGACY_TASK_FIELDS = ("assigned_tasks", "completed_tasks", "tasks_completed")
+
+
+class UserTaskStore:
+    """Task history in a ``user_tasks`` collection, one document per (user, task).
+
+    The user document only carries ``assigned_tasks_count`` and
+    ``completed_tasks_count``, which are adjusted in the same call as the
+    ``user_tasks`` write that changes them.
+    """
+
+    def __init__(self, user_tasks, users):
+        self.user_tasks = user_tasks
+        self.users = users
+
+    def create_indexes(self) -> Dict:
+        """Create the ``user_tasks`` indexes declared in src/db/indexes.py"""
+        return apply_indexes(self.user_tasks.database, {self.user_tasks.name: INDEXES["user_tasks"]})
+
+    def assign(self, user_id, task_id) -> bool:
+        """Assign a task; returns False if the user already has it"""
+        try:
+            result = self.user_tasks.update_one(
+                {"user_id": user_id, "task_id": task_id},
+                {"$setOnInsert": {"status": ASSIGNED, "assigned_at": datetime.now()}},
+                upsert=True
+            )
+        except DuplicateKeyError:
+            return False  # a concurrent assign won the upsert
+        if result.upserted_id is None:
+            return False
+        self.users.update_one({"user_id": user_id}, {"$inc": {COUNT_FIELDS[ASSIGNED]: 1}}, upsert=True)
+        return True
+
+    def complete(self, user_id, task_id) -> bool:
+        """Move an assigned task to completed; returns False if it was not assigned"""
+        result = self.user_tasks.update_one(
+            {"user_id": user_id, "task_id": task_id, "status": ASSIGNED},
+            {"$set": {"status": COMPLETED, "completed_at": datetime.now()}}
+        )
+        if not result.modified_count:
+            return False
+        self.users.update_one(
+            {"user_id": user_id},
+            {"$inc": {COUNT_FIELDS[ASSIGNED]: -1, COUNT_FIELDS[COMPLETED]: 1}}
+        )
+        return True
+
+    def mark_completed(self, user_id, task_ids: Iterable) -> Dict:
+        """Record tasks as completed regardless of assignment (mini-app sync) and recount"""
+        now = datetime.now()
+        requests = [
+            UpdateOne(
+                {"user_id": user_id, "task_id": task_id},
+                {"$set": {"status": COMPLETED}, "$setOnInsert": {"completed_at": now}},
+                upsert=True
+            )
+            for task_id in task_ids
+        ]
+        if requests:
+            self.user_tasks.bulk_write(requests, ordered=False)
+        return self.refresh_counts(user_id)
+
+    def refresh_counts(self, user_id) -> Dict:
+        """Recompute the user's counters from ``user_tasks``"""
+        counts = {field: 0 for field in COUNT_FIELDS.values()}
+        for row in self.user_tasks.aggregate([
+            {"$match": {"user_id": user_id}},
+            {"$group": {"_id": "$status", "count": {"$sum": 1}}},
+        ]):
+            if row["_id"] in COUNT_FIELDS:
+                counts[COUNT_FIELDS[row["_id"]]] = row["count"]
+        self.users.update_one({"user_id": user_id}, {"$set": counts}, upsert=True)
+        return counts
+
+    def refresh_counts_many(self, user_ids: List):
+        """Recompute counters for many users with one aggregate and one bulk write"""
+        counts = {user_id: {field: 0 for field in COUNT_FIELDS.values()} for user_id in user_ids}
+        for row in self.user_tasks.aggregate([
+            {"$match": {"user_id": {"$in": list(user_ids)}}},
+            {"$group": {"_id": {"user_id": "$user_id", "status": "$status"}, "count": {"$sum": 1}}},
+        ]):
+            if row["_id"]["status"] in COUNT_FIELDS:
+                counts[row["_id"]["user_id"]][COUNT_FIELDS[row["_id"]["status"]]] = row["count"]
+        if counts:
+            self.users.bulk_write([UpdateOne({"user_id": user_id}, {"$set": fields})
+                                   for user_id, fields in counts.items()], ordered=False)
+
+    def is_assigned(self, user_id, task_id) -> bool:
+        return self.user_tasks.find_one(
+            {"user_id": user_id, "task_id": task_id, "status": ASSIGNED}, {"_id": 1}) is not None
+
+    def task_ids(self, user_id, status: Optional[str] = None, limit: int = 0) -> List:
+        query = {"user_id": user_id}
+        if status:
+            query["status"] = status
+        cursor = self.user_tasks.find(query, {"_id": 0, "task_id": 1}).limit(limit)
+        return [row["task_id"] for row in cursor]
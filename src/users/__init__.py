@@ -0,0 +1,3 @@
+"""
+User document defaults and bulk onboarding.
+"""
@@ -0,0 +1,164 @@
+"""
+Bulk, idempotent user onboarding from JSONL or any iterable of records.
+
+    python -m src.users.onboarding users.jsonl [--batch-size 1000]
+
+Each line is a JSON object with at least ``user_id``. Users that already
+exist are left untouched, so an import can simply be re-run after a failure.
+"""
+from datetime import datetime, timezone
+from typing import Dict, IO, Iterable, Iterator, Optional, Union
+import argparse
+import json
+import logging
+import os
+import time
+
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+
+DUPLICATE_KEY = 11000
+
+# Fields every new user starts with
+USER_DEFAULTS = {
+    "username": None,
+    "balance": 0,
+    "referrals": 0,
+    "rank": None,
+    "last_daily_reward": None,
+    "referred_by": None,
+    "assigned_tasks_count": 0,
+    "completed_tasks_count": 0,
+}
+# Fields an import may set besides the defaults; created_at is an ISO 8601 string (UTC if naive)
+IMPORT_FIELDS = {"username", "email", "phone_number", "device_token", "wallet_address", "created_at"}
+
+
+def new_user_document(user_id, **fields) -> Dict:
+    """A complete new-user document: defaults, then ``fields``"""
+    return dict(USER_DEFAULTS, user_id=user_id, **fields)
+
+
+def _parse_timestamp(value) -> Optional[datetime]:
+    if isinstance(value, datetime):
+        parsed = value
+    elif isinstance(value, str):
+        try:
+            parsed = datetime.fromisoformat(value)
+        except ValueError:
+            return None
+    else:
+        return None
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+def read_jsonl(source: Union[str, IO]) -> Iterator[Optional[Dict]]:
+    """Yield one record per non-blank line; None for lines that are not a JSON object"""
+    handle = open(source, encoding='utf-8') if isinstance(source, str) else source
+    try:
+        for line in handle:
+            if isinstance(line, bytes):
+                line = line.decode('utf-8')
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError:
+                yield None
+                continue
+            yield record if isinstance(record, dict) else None
+    finally:
+        if isinstance(source, str):
+            handle.close()
+
+
+class UserOnboarder:
+    """Creates users in unordered upsert batches.
+
+    Every record becomes ``UpdateOne({"user_id": id}, {"$setOnInsert": doc},
+    upsert=True)``, so existing users (and concurrent ``/start``s) are never
+    overwritten or duplicated. Each batch queues a single ``users_created``
+    audit event listing the new ``user_ids`` through the batched audit writer.
+    """
+
+    def __init__(self, users_collection, audit_writer=None, batch_size: int = 1000):
+        self.users = users_collection
+        self.audit = audit_writer
+        self.batch_size = batch_size
+
+    @staticmethod
+    def _document(record) -> Optional[Dict]:
+        if not isinstance(record, dict) or not isinstance(record.get("user_id"), int):
+            return None
+        fields = {key: value for key, value in record.items() if key in IMPORT_FIELDS}
+        if "created_at" in fields:
+            fields["created_at"] = _parse_timestamp(fields["created_at"])
+            if fields["created_at"] is None:
+                return None
+        return new_user_document(record["user_id"], **fields)
+
+    def _write_batch(self, documents: Dict[int, Dict], report: Dict):
+        requests = [UpdateOne({"user_id": user_id}, {"$setOnInsert": document}, upsert=True)
+                    for user_id, document in documents.items()]
+        try:
+            upserted = self.users.bulk_write(requests, ordered=False).upserted_ids
+        except BulkWriteError as e:
+            # Lost upsert races against a concurrent insert of the same user
+            if any(error["code"] != DUPLICATE_KEY for error in e.details["writeErrors"]):
+                raise
+            upserted = {row["index"]: row["_id"] for row in e.details["upserted"]}
+        created = []
+        if upserted:
+            created = [user["user_id"] for user in self.users.find(
+                {"_id": {"$in": list(upserted.values())}}, {"_id": 0, "user_id": 1})]
+        report["created"] += len(created)
+        report["existing"] += len(documents) - len(created)
+        if self.audit and created:
+            self.audit.log_many([{"user_id": None, "event_type": "users_created", "user_ids": created,
+                                  "description": f"{len(created)} new users created by bulk import."}])
+
+    def onboard(self, records: Iterable) -> Dict:
+        """Create every valid record's user; returns counts and users/sec"""
+        started = time.perf_counter()
+        report = {"read": 0, "created": 0, "existing": 0, "invalid": 0}
+        batch: Dict[int, Dict] = {}
+        for record in records:
+            report["read"] += 1
+            document = self._document(record)
+            if document is None:
+                report["invalid"] += 1
+                continue
+            if document["user_id"] in batch:
+                report["existing"] += 1  # repeated within the batch: first record wins
+                continue
+            batch[document["user_id"]] = document
+            if len(batch) >= self.batch_size:
+                self._write_batch(batch, report)
+                batch = {}
+        if batch:
+            self._write_batch(batch, report)
+        elapsed = time.perf_counter() - started
+        report["duration_ms"] = elapsed * 1000
+        report["users_per_sec"] = report["read"] / elapsed if elapsed else 0.0
+        return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('path', help="JSONL file, one user object per line")
+    parser.add_argument('--batch-size', type=int, default=1000)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+
+    from pymongo import MongoClient
+    from src.audit.writer import AuditLogWriter
+    db = MongoClient(os.getenv('MONGO_URI'))[os.getenv('DB_NAME', 'Cluster0')]
+    audit_writer = AuditLogWriter(db['audit_logs'])
+    report = UserOnboarder(db['users'], audit_writer, args.batch_size).onboard(read_jsonl(args.path))
+    audit_writer.close()
+    logging.info(f"Onboarded {args.path}: {report['created']} created, {report['existing']} existing, "
+                 f"{report['invalid']} invalid, {report['users_per_sec']:.0f} users/sec")
+
+
+if __name__ == '__main__':
+    main()
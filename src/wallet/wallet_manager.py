@@ -1,30 +1,88 @@
-from typing import Dict, List, Optional
+from typing import Any, Callable, Dict, List, Optional
 from mnemonic import Mnemonic
 from hdwallet import HDWallet
-from web3 import Web3
-from solana.rpc.api import Client
-from stellar_sdk import Server, Keypair
-from tronpy import Tron
 import json
 import os
+import threading
 from datetime import datetime
 import numpy as np
-from sklearn.cluster import KMeans
-from transformers import pipeline
+
+# Chain clients and the sentiment model are expensive to build, so they are
+# created on first use and shared by every WalletManager in the process.
+_shared_clients: Dict[Any, Any] = {}
+_shared_lock = threading.Lock()
+
+
+def _shared(key, factory: Callable[[], Any]) -> Any:
+    """Return the process-wide instance for ``key``, building it once"""
+    client = _shared_clients.get(key)
+    if client is None:
+        with _shared_lock:
+            client = _shared_clients.get(key)
+            if client is None:
+                client = _shared_clients[key] = factory()
+    return client
+
+
+def _web3_client(url: Optional[str]):
+    from web3 import Web3
+    return Web3(Web3.HTTPProvider(url))
+
+
+def _solana_client(url: Optional[str]):
+    from solana.rpc.api import Client
+    return Client(url)
+
+
+def _stellar_server(url: Optional[str]):
+    from stellar_sdk import Server
+    return Server(horizon_url=url)
+
+
+def _tron_client():
+    from tronpy import Tron
+    return Tron(network='mainnet')
+
+
+def _sentiment_pipeline():
+    from transformers import pipeline
+    return pipeline("sentiment-analysis")
+
 
 class WalletManager:
     def __init__(self):
         self.mnemonic = Mnemonic("english")
         self.wallets: Dict[str, Dict] = {}
         self.user_engagement: Dict[str, Dict] = {}
-        self.sentiment_analyzer = pipeline("sentiment-analysis")
-        
-        # Initialize blockchain connections
-        self.web3 = Web3(Web3.HTTPProvider(os.getenv('ETH_RPC_URL')))
-        self.solana = Client(os.getenv('SOLANA_RPC_URL'))
-        self.stellar = Server(horizon_url=os.getenv('STELLAR_HORIZON_URL'))
-        self.tron = Tron(network='mainnet')
-        self.polygon = Web3(Web3.HTTPProvider(os.getenv('POLYGON_RPC_URL')))
+
+    # Blockchain connections, created lazily on first use of each chain
+    @property
+    def web3(self):
+        url = os.getenv('ETH_RPC_URL')
+        return _shared(('ethereum', url), lambda: _web3_client(url))
+
+    @property
+    def solana(self):
+        url = os.getenv('SOLANA_RPC_URL')
+        return _shared(('solana', url), lambda: _solana_client(url))
+
+    @property
+    def stellar(self):
+        url = os.getenv('STELLAR_HORIZON_URL')
+        return _shared(('stellar', url), lambda: _stellar_server(url))
+
+    @property
+    def tron(self):
+        return _shared(('tron', 'mainnet'), _tron_client)
+
+    @property
+    def polygon(self):
+        url = os.getenv('POLYGON_RPC_URL')
+        return _shared(('polygon', url), lambda: _web3_client(url))
+
+    @property
+    def sentiment_analyzer(self):
+        return _shared('sentiment-analysis', _sentiment_pipeline)
 
     def create_wallet(self, user_id: str, blockchain: str) -> Dict:
         """Create a new wallet for a specific blockchain"""
@@ -42,10 +100,12 @@ class WalletManager:
             wallet_data['address'] = wallet.p2pkh_address()
             wallet_data['private_key'] = wallet.private_key()
         elif blockchain == 'solana':
+            from stellar_sdk import Keypair
             keypair = Keypair.random()
             wallet_data['address'] = keypair.public_key
             wallet_data['private_key'] = keypair.secret
         elif blockchain == 'stellar':
+            from stellar_sdk import Keypair
             keypair = Keypair.random()
             wallet_data['address'] = keypair.public_key
             wallet_data['private_key'] = keypair.secret
@@ -107,6 +167,7 @@ class WalletManager:
         
         # Use K-means clustering to identify activity patterns
         if len(user_data['activity_pattern']) > 0:
+            from sklearn.cluster import KMeans
             X = np.array(user_data['activity_pattern']).reshape(-1, 1)
             kmeans = KMeans(n_clusters=2).fit(X)
             pattern_score = np.mean(kmeans.score(X))
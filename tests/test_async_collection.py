@@ -0,0 +1,55 @@
+import asyncio
+import time
+
+import mongomock
+import pytest
+
+from src.db.async_collection import AsyncCollection, create_executor
+
+
+class SlowCollection:
+    def __init__(self, latency):
+        self.latency = latency
+
+    def find_one(self, filter, *args, **kwargs):
+        time.sleep(self.latency)
+        return {"user_id": filter["user_id"]}
+
+
+@pytest.fixture
+def users():
+    collection = mongomock.MongoClient().db.users
+    collection.insert_many([
+        {"user_id": 1, "balance": 50},
+        {"user_id": 2, "balance": 30},
+        {"user_id": 3, "balance": 70},
+    ])
+    return AsyncCollection(collection, create_executor(4))
+
+
+@pytest.mark.asyncio
+async def test_find_one_and_update(users):
+    await users.update_one({"user_id": 1}, {"$inc": {"balance": 5}})
+    user = await users.find_one({"user_id": 1})
+    assert user["balance"] == 55
+
+
+@pytest.mark.asyncio
+async def test_find_sort_limit_returns_list(users):
+    top = await users.find(sort=[("balance", -1)], limit=2)
+    assert [u["user_id"] for u in top] == [3, 1]
+
+
+@pytest.mark.asyncio
+async def test_aggregate_returns_list(users):
+    result = await users.aggregate([{"$group": {"_id": None, "total": {"$sum": "$balance"}}}])
+    assert result[0]["total"] == 150
+
+
+@pytest.mark.asyncio
+async def test_slow_calls_do_not_block_event_loop():
+    collection = AsyncCollection(SlowCollection(0.05), create_executor(8))
+    started = time.perf_counter()
+    await asyncio.gather(*(collection.find_one({"user_id": i}) for i in range(8)))
+    # Eight 50ms round trips overlap instead of running back to back
+    assert time.perf_counter() - started < 0.25
@@ -0,0 +1,89 @@
+import queue
+import threading
+import time
+
+from bson.errors import InvalidDocument
+import mongomock
+import pytest
+
+from src.audit.writer import AuditLogWriter
+
+
+class RecordingCollection:
+    def __init__(self, block=None):
+        self.batches = []
+        self.block = block
+
+    def insert_many(self, documents, ordered=True):
+        if self.block:
+            self.block.wait()
+        assert ordered is False
+        self.batches.append(list(documents))
+
+
+@pytest.fixture
+def logs():
+    return mongomock.MongoClient().db.audit_logs
+
+
+def test_events_are_written_in_batches():
+    collection = RecordingCollection()
+    writer = AuditLogWriter(collection, batch_size=3, flush_interval=60)
+    for i in range(7):
+        writer.log(i, "balance_update", "Balance updated by 1 coins.")
+    writer.close()
+    assert [len(batch) for batch in collection.batches] == [3, 3, 1]
+    assert writer.written == 7
+
+
+def test_time_threshold_flushes_partial_batch(logs):
+    writer = AuditLogWriter(logs, batch_size=100, flush_interval=0.05)
+    writer.log(1, "daily_reward", "Claimed daily reward of 10 coins.")
+    time.sleep(0.3)
+    assert logs.count_documents({}) == 1
+    writer.close()
+
+
+def test_flush_and_close_lose_nothing(logs):
+    writer = AuditLogWriter(logs, batch_size=100, flush_interval=60)
+    writer.log(1, "user_created", "New user created.")
+    assert writer.flush(timeout=1)
+    assert logs.count_documents({"event_type": "user_created"}) == 1
+    writer.log(2, "user_created", "New user created.")
+    writer.close()
+    assert logs.count_documents({}) == 2
+    with pytest.raises(RuntimeError):
+        writer.log(3, "user_created", "New user created.")
+    with pytest.raises(RuntimeError):
+        writer.log_many([{"user_id": 3, "event_type": "user_created", "description": "New user created."}])
+    assert writer.flush(timeout=1)  # returns at once instead of waiting on the stopped thread
+
+
+def test_full_queue_applies_backpressure():
+    release = threading.Event()
+    writer = AuditLogWriter(RecordingCollection(block=release), max_queue=1, batch_size=1)
+    writer.log(1, "a", "first")   # picked up by the writer, which then blocks
+    time.sleep(0.05)
+    writer.log(2, "b", "second")  # fills the queue
+    with pytest.raises(queue.Full):
+        writer.log(3, "c", "third", timeout=0.05)
+    release.set()
+    writer.close()
+    assert writer.written == 2
+
+
+def test_unencodable_event_does_not_stop_the_writer():
+    class FailingOnce(RecordingCollection):
+        def insert_many(self, documents, ordered=True):
+            if not self.batches:
+                self.batches.append(None)
+                raise InvalidDocument("cannot encode object")
+            super().insert_many(documents, ordered)
+
+    collection = FailingOnce()
+    writer = AuditLogWriter(collection, batch_size=1, flush_interval=60)
+    writer.log(1, "bad", object())
+    writer.log(2, "good", "still written")
+    assert writer.flush(timeout=1)
+    writer.close()
+    assert (writer.failed, writer.written) == (1, 1)
@@ -0,0 +1,21 @@
+from benchmarks.suite import compare
+
+
+def _report(**p50s):
+    return {"results": {"10000": {op: {"p50_ms": value} for op, value in p50s.items()}}}
+
+
+def test_slowdown_within_threshold_passes():
+    assert compare(_report(leaderboard=1.1), _report(leaderboard=1.0), max_regression=0.2) == []
+
+
+def test_slowdown_beyond_threshold_is_reported():
+    regressions = compare(_report(leaderboard=1.5, ranking=1.0), _report(leaderboard=1.0, ranking=1.0))
+    assert [(r["operation"], r["size"]) for r in regressions] == [("leaderboard", "10000")]
+    assert round(regressions[0]["change"], 2) == 0.5
+
+
+def test_per_operation_threshold_and_missing_baseline():
+    current = _report(update_ranking=1.4, daily_reminder=9.0)
+    baseline = _report(update_ranking=1.0)
+    assert compare(current, baseline, max_regression=0.2, thresholds={"update_ranking": 0.5}) == []
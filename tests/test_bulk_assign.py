@@ -0,0 +1,74 @@
+import mongomock
+import pytest
+
+from src.tasks.bulk_assign import CohortAssigner, check_cohort_filter
+from src.tasks.store import UserTaskStore
+
+
+@pytest.fixture
+def db():
+    db = mongomock.MongoClient().db
+    db.users.insert_many([{"user_id": i, "balance": i, "assigned_tasks_count": 0} for i in range(1, 26)])
+    UserTaskStore(db.user_tasks, db.users).create_indexes()
+    return db
+
+
+@pytest.fixture
+def assigner(db):
+    return CohortAssigner(db.users, UserTaskStore(db.user_tasks, db.users), db.assign_runs, batch_size=10)
+
+
+def test_cohort_filter_assigns_in_batches(assigner, db):
+    UserTaskStore(db.user_tasks, db.users).assign(20, "launch")
+    updates = []
+    report = assigner.assign("run-1", "launch", cohort={"balance": {"$gte": 11}}, progress=updates.append)
+    assert report["total"] == 15
+    assert report["assigned"] == 14 and report["already_assigned"] == 1
+    assert [update["processed"] for update in updates] == [10, 15]
+    assert db.user_tasks.count_documents({"task_id": "launch"}) == 15
+    assert db.users.find_one({"user_id": 20})["assigned_tasks_count"] == 1
+    assert db.users.find_one({"user_id": 5})["assigned_tasks_count"] == 0
+    assert assigner.assign("run-1", "launch", cohort={"balance": {"$gte": 11}})["skipped"]
+
+
+def test_id_list_is_idempotent(assigner, db):
+    assigner.assign("a", "t", user_ids=[3, 1, 2, 3])
+    report = assigner.assign("b", "t", user_ids=[1, 2, 3, 4])
+    assert report["assigned"] == 1 and report["already_assigned"] == 3
+    assert db.users.find_one({"user_id": 1})["assigned_tasks_count"] == 1
+
+
+def test_resume_after_crash_mid_batch(assigner, db):
+    calls = {"n": 0}
+    original = assigner.users.update_many
+
+    def crash_on_second_batch(*args, **kwargs):
+        calls["n"] += 1
+        if calls["n"] == 2:
+            raise RuntimeError("process killed")
+        return original(*args, **kwargs)
+
+    assigner.users.update_many = crash_on_second_batch
+    with pytest.raises(RuntimeError):
+        assigner.assign("run", "t", cohort={})
+    assigner.users.update_many = original
+
+    report = assigner.assign("run", "t", cohort={})
+    assert report["processed"] == 25 and report["assigned"] == 25
+    assert db.users.count_documents({"assigned_tasks_count": 1}) == 25
+
+
+def test_cohort_filter_rejects_javascript():
+    with pytest.raises(ValueError):
+        check_cohort_filter({"$or": [{"$where": "sleep(1000)"}]})
+    assert check_cohort_filter({"balance": {"$gt": 5}}) == {"balance": {"$gt": 5}}
+
+
+def test_resume_must_match_task_and_cohort(assigner, db):
+    assigner.runs.insert_one({"_id": "run", "task_id": "t", "after": 5, "status": "running",
+                              "cohort_key": assigner.cohort_key(None, {})})
+    with pytest.raises(ValueError, match="assigns task t"):
+        assigner.assign("run", "other", cohort={})
+    with pytest.raises(ValueError, match="different cohort"):
+        assigner.assign("run", "t", user_ids=[1, 2])
+    assert db.user_tasks.count_documents({}) == 0
@@ -0,0 +1,80 @@
+import mongomock
+
+from src.db.indexes import INDEXES, apply_indexes, audit_queries, plan_stages
+from src.referrals.graph import ReferralGraph
+from src.tasks.store import UserTaskStore
+
+
+class ExplainedCursor:
+    def __init__(self, plan):
+        self.plan = plan
+
+    def sort(self, *args):
+        return self
+
+    def limit(self, *args):
+        return self
+
+    def explain(self):
+        return {"queryPlanner": {"winningPlan": self.plan}}
+
+
+class ExplainedDatabase:
+    def __init__(self, plans):
+        self.plans = plans
+
+    def __getitem__(self, name):
+        plans = self.plans
+
+        class Collection:
+            def find(self, filter, projection=None):
+                return ExplainedCursor(plans[name])
+        return Collection()
+
+
+def test_apply_is_idempotent_and_reports_unmanaged():
+    db = mongomock.MongoClient().db
+    db.users.create_index("rank")
+    first = apply_indexes(db)
+    assert "user_id_1" in first["users"]["ensured"]
+    assert first["users"]["unmanaged"] == ["rank_1"]
+    assert apply_indexes(db) == first
+    assert db.users.index_information()["user_id_1"]["unique"]
+
+
+def test_duplicate_user_ids_are_reported():
+    db = mongomock.MongoClient().db
+    db.users.insert_many([{"user_id": 1}, {"user_id": 1}])
+    report = apply_indexes(db, {"users": INDEXES["users"][:1]})
+    assert report["users"]["errors"]
+
+
+def test_module_create_indexes_use_the_declared_list():
+    db = mongomock.MongoClient().db
+    UserTaskStore(db.user_tasks, db.users).create_indexes()
+    ReferralGraph(db.referrals).create_indexes()
+    report = apply_indexes(db, {"user_tasks": INDEXES["user_tasks"], "referrals": INDEXES["referrals"]})
+    assert report["user_tasks"]["unmanaged"] == [] and report["referrals"]["unmanaged"] == []
+    assert set(db.user_tasks.index_information()) - {"_id_"} == set(report["user_tasks"]["ensured"])
+
+
+def test_plan_stages_walks_classic_and_sbe_plans():
+    classic = {"stage": "LIMIT", "inputStage": {"stage": "FETCH", "inputStage": {"stage": "IXSCAN"}}}
+    sbe = {"queryPlan": {"stage": "SORT", "inputStage": {"stage": "COLLSCAN"}}}
+    assert plan_stages(classic) == ["LIMIT", "FETCH", "IXSCAN"]
+    assert plan_stages(sbe) == ["SORT", "COLLSCAN"]
+    assert plan_stages({"stage": "OR", "inputStages": [{"stage": "IXSCAN"}, {"stage": "IXSCAN"}]}) == \
+        ["OR", "IXSCAN", "IXSCAN"]
+
+
+def test_audit_flags_collscan_and_in_memory_sort():
+    db = ExplainedDatabase({
+        "users": {"stage": "SORT", "inputStage": {"stage": "COLLSCAN"}},
+        "audit_logs": {"stage": "FETCH", "inputStage": {"stage": "IXSCAN"}},
+    })
+    shapes = [
+        {"name": "bad", "collection": "users", "filter": {}, "sort": [("balance", -1)]},
+        {"name": "good", "collection": "audit_logs", "filter": {"user_id": 1}},
+    ]
+    findings = audit_queries(db, shapes)
+    assert {(f["query"], f["stage"]) for f in findings} == {("bad", "SORT"), ("bad", "COLLSCAN")}
@@ -0,0 +1,83 @@
+import mongomock
+import pytest
+
+from src.leaderboard.cache import InMemoryLeaderboardBackend, LeaderboardCache
+
+
+@pytest.fixture
+def users():
+    collection = mongomock.MongoClient().db.users
+    collection.insert_many([
+        {"user_id": i, "username": f"user{i}", "balance": i * 10, "referrals": 0}
+        for i in range(1, 11)
+    ])
+    return collection
+
+
+def test_pages_are_served_from_cache(users):
+    cache = LeaderboardCache(users, size=5)
+    assert [u["user_id"] for u in cache.top(3)] == [10, 9, 8]
+    assert [u["user_id"] for u in cache.top(2, offset=3)] == [7, 6]
+    assert cache.stats()["misses"] == 1
+    assert cache.stats()["hits"] == 1
+
+
+def test_pages_beyond_window_go_to_mongo(users):
+    cache = LeaderboardCache(users, size=5)
+    assert [u["user_id"] for u in cache.top(3, offset=4)] == [6, 5, 4]
+    assert cache.backend.get() is None
+
+
+def test_change_below_cutoff_keeps_cache(users):
+    cache = LeaderboardCache(users, size=5)
+    cache.top(5)
+    users.update_one({"user_id": 1}, {"$set": {"balance": 20}})
+    cache.on_user_change(1, 20)
+    assert cache.invalidations == 0
+    cache.top(5)
+    assert cache.stats()["hits"] == 1
+
+
+def test_change_entering_top_n_invalidates(users):
+    cache = LeaderboardCache(users, size=5)
+    cache.top(5)
+    users.update_one({"user_id": 1}, {"$set": {"balance": 500}})
+    cache.on_user_change(1, 500)
+    assert cache.top(1)[0]["user_id"] == 1
+    assert cache.invalidations == 1
+
+
+def test_listed_user_dropping_invalidates(users):
+    cache = LeaderboardCache(users, size=5)
+    cache.top(5)
+    cache.on_user_change(10, 0)
+    assert cache.invalidations == 1
+
+
+def test_load_overlapping_invalidate_is_not_stored(users):
+    cache = LeaderboardCache(users, size=5)
+    find = users.find
+
+    def find_then_invalidate(*args, **kwargs):
+        cursor = find(*args, **kwargs)
+        cache.invalidate()  # a write lands while the load is in flight
+        return cursor
+
+    users.find = find_then_invalidate
+    assert [u["user_id"] for u in cache.top(3)] == [10, 9, 8]
+    assert cache.backend.get() is None
+
+
+def test_in_memory_entries_expire():
+    backend = InMemoryLeaderboardBackend(ttl=0)
+    backend.set([{"user_id": 1}])
+    assert backend.get() is None
+
+
+def test_removed_listed_user_invalidates(users):
+    cache = LeaderboardCache(users, size=5)
+    cache.top(5)
+    cache.on_user_removed(2)
+    assert cache.backend.get() is not None
+    cache.on_user_removed(10)
+    assert cache.backend.get() is None
@@ -0,0 +1,78 @@
+import asyncio
+
+import pytest
+
+from src.cache.membership import MembershipCache
+
+
+class Fetcher:
+    def __init__(self, answer=True, error=None):
+        self.calls = 0
+        self.answer = answer
+        self.error = error
+
+    async def __call__(self):
+        self.calls += 1
+        await asyncio.sleep(0.01)
+        if self.error:
+            raise self.error
+        return self.answer
+
+
+@pytest.mark.asyncio
+async def test_positive_answers_are_cached():
+    cache = MembershipCache()
+    fetch = Fetcher(True)
+    assert await cache.is_member(1, fetch)
+    assert await cache.is_member(1, fetch)
+    assert fetch.calls == 1
+    assert cache.stats()["hit_ratio"] == 0.5
+
+
+@pytest.mark.asyncio
+async def test_negative_answers_expire_sooner():
+    cache = MembershipCache(positive_ttl=60, negative_ttl=0.02)
+    fetch = Fetcher(False)
+    assert not await cache.is_member(1, fetch)
+    await asyncio.sleep(0.03)
+    fetch.answer = True
+    assert await cache.is_member(1, fetch)
+    assert fetch.calls == 2
+
+
+@pytest.mark.asyncio
+async def test_concurrent_misses_share_one_call_and_errors_are_not_cached():
+    cache = MembershipCache()
+    fetch = Fetcher(True)
+    assert all(await asyncio.gather(*(cache.is_member(7, fetch) for _ in range(5))))
+    assert fetch.calls == 1
+
+    failing = Fetcher(error=RuntimeError("Telegram unavailable"))
+    with pytest.raises(RuntimeError):
+        await cache.is_member(8, failing)
+    assert await cache.is_member(8, Fetcher(True))
+
+
+@pytest.mark.asyncio
+async def test_chat_member_updates_refresh_entries():
+    cache = MembershipCache()
+    cache.record(3, True)
+    fetch = Fetcher(False)
+    assert await cache.is_member(3, fetch)
+    cache.record(3, False)
+    assert not await cache.is_member(3, fetch)
+    assert fetch.calls == 0
+
+
+@pytest.mark.asyncio
+async def test_cancelled_leader_does_not_strand_waiters():
+    cache = MembershipCache()
+    fetch = Fetcher(True)
+    leader = asyncio.create_task(cache.is_member(9, fetch))
+    await asyncio.sleep(0)
+    waiter = asyncio.create_task(cache.is_member(9, fetch))
+    await asyncio.sleep(0)
+    leader.cancel()
+    assert await asyncio.wait_for(waiter, timeout=1)
+    assert leader.cancelled()
+    assert fetch.calls == 2
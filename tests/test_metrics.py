@@ -0,0 +1,68 @@
+from types import SimpleNamespace
+
+import pytest
+from flask import Flask
+from prometheus_client import REGISTRY, generate_latest
+
+from src.metrics.instrumentation import MongoCommandTimer, StatsCollector, instrument_flask, timed_job, track_handler
+
+
+def sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0
+
+
+def test_track_handler_counts_latency_and_errors():
+    before = sample('simplrefq_telegram_handler_seconds_count', handler='test_balance')
+    with track_handler('test_balance'):
+        pass
+    with pytest.raises(RuntimeError):
+        with track_handler('test_balance'):
+            raise RuntimeError
+    assert sample('simplrefq_telegram_handler_seconds_count', handler='test_balance') == before + 2
+    assert sample('simplrefq_telegram_handler_errors_total', handler='test_balance') >= 1
+
+
+def test_mongo_command_timer():
+    timer = MongoCommandTimer()
+    timer.started(SimpleNamespace(command_name='find', command={'find': 'test_users'},
+                                  connection_id=('h', 1), request_id=7))
+    timer.succeeded(SimpleNamespace(command_name='find', connection_id=('h', 1), request_id=7,
+                                    duration_micros=2500))
+    timer.started(SimpleNamespace(command_name='getMore', command={'getMore': 123, 'collection': 'test_users'},
+                                  connection_id=('h', 1), request_id=8))
+    timer.failed(SimpleNamespace(command_name='getMore', connection_id=('h', 1), request_id=8,
+                                 duration_micros=100))
+    assert sample('simplrefq_mongo_command_seconds_sum', collection='test_users', command='find') >= 0.0025
+    assert sample('simplrefq_mongo_command_failures_total', collection='test_users', command='getMore') == 1
+
+
+def test_stats_collector_skips_unready_sources():
+    collector = StatsCollector()
+    collector.register_queue('ready', lambda: 3)
+    collector.register_queue('not_ready', lambda: None.qsize())
+    collector.register_cache('profile', lambda: {'hits': 3, 'redis_hits': 1, 'misses': 1, 'hit_ratio': 0.8})
+    families = {family.name: family for family in collector.collect()}
+    assert [s.labels['queue'] for s in families['simplrefq_queue_depth'].samples] == ['ready']
+    assert families['simplrefq_cache_hit_ratio'].samples[0].value == 0.8
+    hits = [s for s in families['simplrefq_cache_lookups'].samples if s.labels.get('result') == 'hit']
+    assert hits[0].value == 4
+
+
+def test_flask_routes_and_jobs_are_timed():
+    app = instrument_flask(Flask('metrics_test'), name='test_flask')
+
+    @app.route('/items/<int:item_id>')
+    def item(item_id):
+        return {"id": item_id}
+
+    client = app.test_client()
+    client.get('/items/1')
+    client.get('/items/2')
+    assert sample('simplrefq_http_request_seconds_count', app='test_flask', route='/items/<int:item_id>',
+                  method='GET', status='200') == 2
+    response = client.get('/metrics')
+    assert b'simplrefq_http_request_seconds_bucket' in response.data
+
+    timed_job('test_job', lambda: None)()
+    assert sample('simplrefq_scheduler_job_seconds_count', job='test_job') == 1
+    assert b'simplrefq_queue_depth' in generate_latest(REGISTRY)
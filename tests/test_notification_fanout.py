@@ -0,0 +1,114 @@
+import asyncio
+import time
+
+import mongomock
+import pytest
+from pymongo.errors import AutoReconnect
+
+from src.notifications.fanout import AsyncTokenBucket, NotificationFanout
+from src.notifications import senders
+from src.notifications.senders import SMTPEmailSender, StubSender
+
+
+@pytest.fixture
+def db():
+    database = mongomock.MongoClient().db
+    database.users.insert_many([
+        {"_id": i, "user_id": i, "device_token": f"tok{i}", "email": f"u{i}@example.com",
+         "phone_number": f"+1555{i:04d}" if i % 2 else None}
+        for i in range(1, 11)
+    ])
+    return database
+
+
+def make_fanout(db, **kwargs):
+    senders = {"push": StubSender(max_batch=4), "email": StubSender(), "sms": StubSender()}
+    return NotificationFanout(db.users, db.checkpoints, senders, batch_size=3, **kwargs), senders
+
+
+def test_delivers_every_channel(db):
+    fanout, senders = make_fanout(db)
+    report = asyncio.run(fanout.run("reminder:1", "Reminder", "Claim your reward"))
+    assert report["users"] == 10
+    assert report["sent"] == {"push": 10, "email": 10, "sms": 5}
+    assert len(senders["push"].sent) == 10
+    assert db.checkpoints.find_one({"_id": "reminder:1"})["status"] == "done"
+
+
+def test_finished_run_is_not_repeated(db):
+    fanout, senders = make_fanout(db)
+    asyncio.run(fanout.run("reminder:1", "Reminder", "Claim your reward"))
+    report = asyncio.run(fanout.run("reminder:1", "Reminder", "Claim your reward"))
+    assert report["skipped"]
+    assert len(senders["email"].sent) == 10
+
+
+def test_resumes_after_checkpoint(db):
+    db.checkpoints.insert_one({"_id": "reminder:2", "status": "running", "last_id": 6, "users": 6,
+                               "sent": {"push": 6, "email": 6, "sms": 3}})
+    fanout, senders = make_fanout(db)
+    report = asyncio.run(fanout.run("reminder:2", "Reminder", "Claim your reward"))
+    assert {m["to"] for m in senders["push"].sent} == {"tok7", "tok8", "tok9", "tok10"}
+    assert report["users"] == 10
+    assert report["sent"]["push"] == 10
+
+
+def test_failures_are_counted(db):
+    senders = {"push": StubSender(max_batch=5, fail_for={"tok1", "tok2"})}
+    fanout = NotificationFanout(db.users, db.checkpoints, senders, rate_limits={"push": 1000})
+    report = asyncio.run(fanout.run("reminder:3", "Reminder", "Claim your reward"))
+    assert report["sent"] == {"push": 8}
+    assert report["failed"] == {"push": 2}
+
+
+def test_token_bucket_charges_whole_chunks():
+    async def send_chunks():
+        bucket = AsyncTokenBucket(rate=100, capacity=10)
+        started = time.monotonic()
+        await bucket.acquire(50)  # larger than the bucket: leaves it 40 in debt
+        await bucket.acquire(10)
+        return time.monotonic() - started
+    assert asyncio.run(send_chunks()) >= 0.45
+
+
+def test_read_errors_end_the_run_instead_of_hanging(db, monkeypatch):
+    fanout, _ = make_fanout(db)
+    calls = []
+
+    def read_batch(after_id):
+        calls.append(after_id)
+        if len(calls) > 1:
+            raise AutoReconnect("connection lost")
+        return list(db.users.find({}).sort("_id", 1).limit(3))
+
+    monkeypatch.setattr(fanout, '_read_batch', read_batch)
+    with pytest.raises(AutoReconnect):
+        asyncio.run(asyncio.wait_for(fanout.run("reminder:4", "Reminder", "Claim"), timeout=5))
+    assert db.checkpoints.find_one({"_id": "reminder:4"})["status"] == "running"
+
+
+def test_broken_smtp_connection_is_replaced(monkeypatch):
+    opened = []
+
+    class FakeSMTP:
+        def __init__(self, host, port, timeout=None):
+            self.closed = False
+            self.broken = not opened  # the first connection drops mid-batch
+            opened.append(self)
+
+        def starttls(self):
+            pass
+
+        def send_message(self, message):
+            if self.broken:
+                raise OSError("connection reset")
+
+        def close(self):
+            self.closed = True
+
+    monkeypatch.setattr(senders.smtplib, 'SMTP', FakeSMTP)
+    sender = SMTPEmailSender("smtp.test", pool_size=1)
+    assert sender.deliver(["a@x.test"], "t", "b") == 0
+    assert opened[0].closed
+    assert sender.deliver(["a@x.test", "b@x.test"], "t", "b") == 2
+    assert len(opened) == 2
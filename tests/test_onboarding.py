@@ -0,0 +1,66 @@
+from datetime import datetime
+import io
+import json
+
+import mongomock
+import pytest
+
+from src.users.onboarding import UserOnboarder, read_jsonl
+
+
+class RecordingAudit:
+    def __init__(self):
+        self.events = []
+
+    def log_many(self, events):
+        self.events.extend(events)
+
+
+@pytest.fixture
+def users():
+    users = mongomock.MongoClient().db.users
+    users.create_index("user_id", unique=True)
+    users.insert_one({"user_id": 2, "username": "kept", "balance": 50})
+    return users
+
+
+def test_onboard_creates_new_and_skips_existing(users):
+    audit = RecordingAudit()
+    records = [{"user_id": i, "username": f"u{i}", "balance": 999} for i in range(1, 6)]
+    report = UserOnboarder(users, audit, batch_size=2).onboard(records)
+    assert (report["read"], report["created"], report["existing"]) == (5, 4, 1)
+    assert report["users_per_sec"] > 0
+    assert users.find_one({"user_id": 2})["balance"] == 50
+    created = users.find_one({"user_id": 3})
+    assert created["balance"] == 0 and created["username"] == "u3" and created["completed_tasks_count"] == 0
+    assert [sorted(event["user_ids"]) for event in audit.events] == [[1], [3, 4], [5]]
+    assert {event["event_type"] for event in audit.events} == {"users_created"}
+
+
+def test_rerun_is_idempotent(users):
+    onboarder = UserOnboarder(users)
+    records = [{"user_id": i} for i in range(10, 20)]
+    onboarder.onboard(records)
+    report = onboarder.onboard(records + [{"user_id": 10}])
+    assert report["created"] == 0 and report["existing"] == 11
+    assert users.count_documents({}) == 11
+
+
+def test_jsonl_with_bad_lines():
+    lines = "\n".join([json.dumps({"user_id": 1}), "not json", "", json.dumps([1]), json.dumps({"user_id": "x"})])
+    users = mongomock.MongoClient().db.users
+    report = UserOnboarder(users).onboard(read_jsonl(io.StringIO(lines)))
+    assert report["read"] == 4 and report["created"] == 1 and report["invalid"] == 3
+
+
+def test_created_at_is_stored_as_datetime(users):
+    records = [
+        {"user_id": 30, "created_at": "2024-05-01T12:00:00Z"},
+        {"user_id": 31, "created_at": "2024-05-01T12:00:00"},
+        {"user_id": 32, "created_at": "yesterday"},
+        {"user_id": 33, "created_at": 1714564800},
+    ]
+    report = UserOnboarder(users).onboard(records)
+    assert report["created"] == 2 and report["invalid"] == 2
+    for user_id in (30, 31):
+        assert users.find_one({"user_id": user_id})["created_at"].replace(tzinfo=None) == datetime(2024, 5, 1, 12)
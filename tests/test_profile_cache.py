@@ -0,0 +1,62 @@
+from datetime import datetime
+
+import mongomock
+import pytest
+
+from src.cache.profile import ProfileCache
+
+
+class FakeRedis:
+    def __init__(self):
+        self.data = {}
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def set(self, key, value, ex=None):
+        self.data[key] = value
+
+    def delete(self, *keys):
+        for key in keys:
+            self.data.pop(key, None)
+
+
+@pytest.fixture
+def users():
+    collection = mongomock.MongoClient().db.users
+    collection.insert_one({"user_id": 1, "balance": 10, "last_claimed": datetime(2026, 1, 1)})
+    return collection
+
+
+def test_reads_are_served_from_memory(users):
+    cache = ProfileCache(users)
+    assert cache.get(1)["balance"] == 10
+    users.update_one({"user_id": 1}, {"$set": {"balance": 99}})
+    assert cache.get(1)["balance"] == 10
+    assert cache.stats()["hits"] == 1
+    assert cache.get(2) is None
+
+
+def test_invalidate_and_ttl(users):
+    cache = ProfileCache(users, ttl=0)
+    cache.get(1)
+    users.update_one({"user_id": 1}, {"$set": {"balance": 20}})
+    assert cache.get(1)["balance"] == 20  # expired immediately
+
+    cache = ProfileCache(users)
+    cache.get(1)
+    users.update_one({"user_id": 1}, {"$set": {"balance": 30}})
+    cache.invalidate(1)
+    assert cache.get(1)["balance"] == 30
+
+
+def test_redis_tier_is_shared(users):
+    redis = FakeRedis()
+    ProfileCache(users, redis_client=redis).get(1)
+    other_process = ProfileCache(users, redis_client=redis)
+    document = other_process.get(1)
+    assert document["last_claimed"] == datetime(2026, 1, 1)
+    assert other_process.stats()["redis_hits"] == 1
+
+    other_process.invalidate(1)
+    assert redis.data == {}
@@ -0,0 +1,31 @@
+import mongomock
+import pytest
+
+from src.leaderboard.rank_lookup import RankLookup
+
+
+@pytest.fixture
+def lookup():
+    collection = mongomock.MongoClient().db.users
+    collection.insert_many([
+        {"user_id": 1, "balance": 10, "referrals": 0},
+        {"user_id": 2, "balance": 30, "referrals": 1},
+        {"user_id": 3, "balance": 30, "referrals": 5},
+        {"user_id": 4, "balance": 5, "referrals": 9},
+        {"user_id": 5, "balance": 10, "referrals": 0},
+    ])
+    return RankLookup(collection)
+
+
+def test_rank_orders_by_balance_then_referrals(lookup):
+    assert lookup.get_rank(3)["rank"] == 1
+    assert lookup.get_rank(2)["rank"] == 2
+    assert lookup.get_rank(4) == {"rank": 5, "balance": 5, "referrals": 9}
+
+
+def test_full_ties_share_a_rank(lookup):
+    assert lookup.get_rank(1)["rank"] == lookup.get_rank(5)["rank"] == 3
+
+
+def test_unknown_user(lookup):
+    assert lookup.get_rank(99) is None
@@ -0,0 +1,65 @@
+import mongomock
+import pytest
+
+from src.leaderboard.rank_lookup import RankLookup
+from src.leaderboard.ranking import RankingEngine
+
+
+@pytest.fixture
+def users():
+    collection = mongomock.MongoClient().db.users
+    collection.insert_many([
+        {"user_id": 1, "balance": 10, "referrals": 0},
+        {"user_id": 2, "balance": 30, "referrals": 1},
+        {"user_id": 3, "balance": 30, "referrals": 5},
+        {"user_id": 4, "balance": 5, "referrals": 9},
+    ])
+    return collection
+
+
+def ranks(users):
+    return {u["user_id"]: u["rank"] for u in users.find()}
+
+
+def test_bulk_strategy_assigns_ranks(users):
+    report = RankingEngine(users, batch_size=2, strategy='bulk').run()
+    assert ranks(users) == {3: 1, 2: 2, 1: 3, 4: 4}
+    assert report["strategy"] == 'bulk'
+    assert report["scanned"] == 4
+    assert report["writes"] == 4
+    assert report["duration_ms"] >= 0
+
+
+def test_bulk_strategy_only_writes_changed_ranks(users):
+    engine = RankingEngine(users, strategy='bulk')
+    engine.run()
+    assert engine.run()["writes"] == 0
+
+    users.update_one({"user_id": 4}, {"$set": {"balance": 20}})
+    assert engine.run()["writes"] == 2
+    assert ranks(users) == {3: 1, 2: 2, 4: 3, 1: 4}
+
+
+def test_bulk_strategy_shares_ranks_on_ties(users):
+    users.insert_many([
+        {"user_id": 5, "balance": 30, "referrals": 5},
+        {"user_id": 6, "balance": 10, "referrals": 0},
+    ])
+    RankingEngine(users, strategy='bulk').run()
+    assert ranks(users) == {3: 1, 5: 1, 2: 3, 1: 4, 6: 4, 4: 6}
+    lookup = RankLookup(users)
+    assert all(lookup.get_rank(user_id)["rank"] == rank for user_id, rank in ranks(users).items())
+
+
+def test_merge_pipeline_targets_changed_documents(users):
+    pipeline = RankingEngine(users, strategy='merge').merge_pipeline(run_id=7)
+    assert pipeline[0]["$setWindowFields"]["sortBy"] == {"balance": -1, "referrals": -1}
+    assert pipeline[0]["$setWindowFields"]["output"] == {"new_rank": {"$rank": {}}}
+    assert pipeline[1] == {"$match": {"$expr": {"$ne": ["$rank", "$new_rank"]}}}
+    assert pipeline[-1]["$merge"]["into"] == "users"
+    assert pipeline[-1]["$merge"]["whenNotMatched"] == "discard"
+
+
+def test_unknown_strategy_is_rejected(users):
+    with pytest.raises(ValueError):
+        RankingEngine(users, strategy='fast')
@@ -0,0 +1,72 @@
+from datetime import datetime
+
+import mongomock
+import pytest
+
+from src.referrals.graph import ReferralGraph
+
+
+@pytest.fixture
+def graph():
+    graph = ReferralGraph(mongomock.MongoClient().db.referrals, max_depth=3)
+    graph.create_indexes()
+    return graph
+
+
+def test_paths_and_levels(graph):
+    graph.add(1, 2)
+    graph.add(1, 3)
+    graph.add(2, 4)
+    edge = graph.add(4, 5)
+    assert edge["ancestors"] == [4, 2, 1] and edge["depth"] == 3
+    assert graph.add(5, 6)["ancestors"] == [5, 4, 2]  # capped at max_depth
+    assert graph.downline_by_level(1) == {1: 2, 2: 1, 3: 1}
+    assert graph.downline_depth(2) == 3
+    assert graph.tree_depth() == 4
+
+
+def test_rejects_duplicates_self_and_cycles(graph):
+    graph.add(1, 2)
+    with pytest.raises(ValueError, match="already been referred"):
+        graph.add(3, 2)
+    with pytest.raises(ValueError, match="themselves"):
+        graph.add(7, 7)
+    with pytest.raises(ValueError, match="cycle"):
+        graph.add(2, 1)
+
+
+def test_late_referrer_extends_existing_downline(graph):
+    graph.add(2, 3)
+    graph.add(3, 4)
+    graph.add(1, 2)
+    assert graph.downline_by_level(1) == {1: 1, 2: 1, 3: 1}
+    assert graph.edges.find_one({"user_id": 4})["depth"] == 3
+
+
+def test_top_referrers_window(graph):
+    graph.add(1, 2, at=datetime(2026, 1, 1))
+    graph.add(1, 3, at=datetime(2026, 2, 1))
+    graph.add(5, 4, at=datetime(2026, 2, 2))
+    graph.add(5, 6, at=datetime(2026, 2, 3))
+    assert graph.top_referrers(datetime(2026, 1, 15)) == [
+        {"user_id": 5, "referrals": 2}, {"user_id": 1, "referrals": 1}]
+
+
+def test_rebuild_from_users(graph):
+    users = mongomock.MongoClient().db.users
+    users.insert_many([{"user_id": 1, "referred_by": None}, {"user_id": 3, "referred_by": 2},
+                       {"user_id": 2, "referred_by": 1}, {"user_id": 4, "referred_by": 3}])
+    assert graph.rebuild_from_users(users)["edges"] == 3
+    assert graph.edges.find_one({"user_id": 4})["ancestors"] == [3, 2, 1]
+    assert graph.rebuild_from_users(users)["edges"] == 0
+
+
+def test_cycles_and_depths_beyond_the_ancestor_cap(graph):
+    for user_id in range(1, 6):
+        graph.add(user_id, user_id + 1)  # chain 1 -> 2 -> ... -> 6, deeper than max_depth=3
+    with pytest.raises(ValueError, match="cycle"):
+        graph.add(6, 1)
+    graph.add(10, 1)  # the root gets a referrer: every descendant moves one level down
+    assert graph.edges.find_one({"user_id": 6})["depth"] == 6
+    assert graph.edges.find_one({"user_id": 6})["ancestors"] == [5, 4, 3]
+    assert graph.tree_depth() == 6
@@ -0,0 +1,45 @@
+from collections import Counter
+
+from telegram import Update
+
+from benchmarks.replay_webhook import (
+    BUTTON_ACTIONS, FakeBotAPI, ReplyTracker, chat_id_of, percentiles, synthetic_updates
+)
+
+
+def test_synthetic_updates_parse_and_follow_the_skew():
+    updates = list(synthetic_updates(2000, users=100, skew=1.2, start_ratio=0.1))
+    assert [u["update_id"] for u in updates] == list(range(1, 2001))
+    parsed = [Update.de_json(u, None) for u in updates]
+    commands = [p for p in parsed if p.message]
+    assert commands and all(p.message.text == "/start" for p in commands)
+    assert {p.callback_query.data for p in parsed if p.callback_query} == set(BUTTON_ACTIONS)
+    activity = Counter(chat_id_of(u) for u in updates)
+    assert activity[1] > activity[50] > 0
+
+
+def test_replies_are_matched_per_chat_in_order():
+    tracker = ReplyTracker()
+    tracker.expect(1, 10.0)
+    tracker.expect(1, 11.0)
+    tracker.expect(2, 10.5)
+    tracker.record(1, 10.2)
+    tracker.record(2, 10.6)
+    tracker.record(3, 12.0)
+    assert [round(ms) for ms in tracker.latencies] == [200, 100]
+    assert tracker.outstanding == 1 and tracker.unexpected == 1
+
+
+def test_fake_bot_api_answers_and_reports_replies():
+    replies = []
+    fake = FakeBotAPI(on_reply=lambda chat_id, at: replies.append(chat_id))
+    try:
+        assert fake.handle('getMe', {})["is_bot"]
+        assert fake.handle('getChatMember', {"chat_id": "@simplco", "user_id": "7"})["status"] == "member"
+        message = fake.handle('sendMessage', {"chat_id": "7", "text": "hi"})
+        assert message["chat"]["id"] == 7 and replies == [7]
+        assert fake.handle('answerCallbackQuery', {}) is True
+        assert fake.calls["sendMessage"] == 1
+    finally:
+        fake.server.server_close()
+    assert percentiles([float(i) for i in range(1, 101)])["p99_ms"] == 100.0
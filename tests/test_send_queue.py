@@ -0,0 +1,110 @@
+import asyncio
+import time
+
+import pytest
+from telegram.error import Forbidden, RetryAfter
+
+from src.outbound.send_queue import BULK, INTERACTIVE, OutboundSendQueue
+
+
+class FakeBot:
+    """Records sends; can answer with a 429 or an error for chosen calls"""
+
+    def __init__(self, retry_after_on=(), forbidden=()):
+        self.calls = []
+        self.retry_after_on = set(retry_after_on)
+        self.forbidden = set(forbidden)
+
+    async def send_message(self, chat_id, text, **kwargs):
+        self.calls.append((time.monotonic(), chat_id, text))
+        if len(self.calls) in self.retry_after_on:
+            raise RetryAfter(1)
+        if chat_id in self.forbidden:
+            raise Forbidden("bot was blocked by the user")
+        await asyncio.sleep(0)
+        return {"chat_id": chat_id, "text": text}
+
+
+@pytest.mark.asyncio
+async def test_interactive_lane_overtakes_bulk():
+    bot = FakeBot()
+    queue = OutboundSendQueue(bot, global_rate=1000, chat_rate=1000, max_in_flight=1)
+    bulk = [queue.send_message(100 + i, f"bulk {i}", priority=BULK) for i in range(5)]
+    reply = queue.send_message(1, "reply", priority=INTERACTIVE)
+    await queue.start()
+    await asyncio.gather(reply, *bulk)
+    await queue.stop()
+    assert bot.calls[0][2] == "reply"
+
+
+@pytest.mark.asyncio
+async def test_per_chat_rate_does_not_block_other_chats():
+    bot = FakeBot()
+    queue = OutboundSendQueue(bot, global_rate=1000, chat_rate=20, chat_burst=1)
+    await queue.start()
+    same_chat = [queue.send_message(1, f"m{i}") for i in range(4)]
+    other = queue.send_message(2, "other")
+    await asyncio.gather(*same_chat, other)
+    await queue.stop()
+    times = [t for t, chat, _ in bot.calls if chat == 1]
+    assert times[-1] - times[0] >= 3 / 20 * 0.9
+    other_time = next(t for t, chat, _ in bot.calls if chat == 2)
+    assert other_time < times[1]
+
+
+@pytest.mark.asyncio
+async def test_retry_after_pauses_and_retries():
+    bot = FakeBot(retry_after_on={1})
+    queue = OutboundSendQueue(bot, global_rate=1000, chat_rate=1000)
+    await queue.start()
+    result = await queue.send_message(1, "hello")
+    await queue.stop()
+    assert result == {"chat_id": 1, "text": "hello"}
+    assert bot.calls[1][0] - bot.calls[0][0] >= 0.95
+    assert queue.stats()["rate_limited"] == 1
+
+
+@pytest.mark.asyncio
+async def test_errors_fail_the_future_and_stats_report_throughput():
+    queue = OutboundSendQueue(FakeBot(forbidden={2}), global_rate=1000, chat_rate=1000)
+    await queue.start()
+    ok = queue.send_message(1, "a")
+    blocked = queue.send_message(2, "b")
+    await ok
+    with pytest.raises(Forbidden):
+        await blocked
+    await queue.stop()
+    stats = queue.stats()
+    assert stats["sent"] == 1 and stats["failed"] == 1
+    assert stats["sent_per_sec"] > 0
+    assert stats["queue_depth"] == {"interactive": 0, "bulk": 0}
+
+
+@pytest.mark.asyncio
+async def test_unexpected_errors_fail_the_future():
+    class BrokenBot(FakeBot):
+        async def send_message(self, chat_id, text, **kwargs):
+            raise OSError("connection reset")
+
+    queue = OutboundSendQueue(BrokenBot(), global_rate=1000, chat_rate=1000)
+    await queue.start()
+    with pytest.raises(OSError):
+        await asyncio.wait_for(queue.send_message(1, "a"), timeout=2)
+    await queue.stop()
+    assert queue.stats()["failed"] == 1
+
+
+@pytest.mark.asyncio
+async def test_stop_gives_up_on_a_stuck_queue_after_the_timeout():
+    class RateLimitedBot(FakeBot):
+        async def send_message(self, chat_id, text, **kwargs):
+            raise RetryAfter(60)
+
+    queue = OutboundSendQueue(RateLimitedBot(), global_rate=1000, chat_rate=1000)
+    await queue.start()
+    stuck = queue.send_message(1, "a")
+    queued = queue.send_message(2, "b")
+    await asyncio.sleep(0.05)
+    await asyncio.wait_for(queue.stop(timeout=0.1), timeout=2)
+    assert stuck.done() and queued.done()
+    assert queue.stats()["queue_depth"] == {"interactive": 0, "bulk": 0}
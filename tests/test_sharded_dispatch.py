@@ -0,0 +1,77 @@
+import asyncio
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from src.dispatch.sharded import ShardedUpdateProcessor
+
+
+def update(chat_id, update_id):
+    return SimpleNamespace(effective_chat=SimpleNamespace(id=chat_id), update_id=update_id)
+
+
+async def dispatch(processor, updates, handler):
+    async with processor:
+        await asyncio.gather(*(
+            processor.process_update(u, handler(u)) for u in updates
+        ))
+
+
+@pytest.mark.asyncio
+async def test_same_chat_keeps_order():
+    seen = []
+
+    async def handler(u):
+        # Earlier updates sleep longer, so reordering would show up
+        await asyncio.sleep(0.01 * (5 - u.update_id))
+        seen.append(u.update_id)
+
+    await dispatch(ShardedUpdateProcessor(workers=4), [update(1, i) for i in range(5)], handler)
+    assert seen == [0, 1, 2, 3, 4]
+
+
+@pytest.mark.asyncio
+async def test_slow_chat_does_not_delay_others():
+    finished = {}
+
+    async def handler(u):
+        await asyncio.sleep(0.2 if u.effective_chat.id == 0 else 0.01)
+        finished[u.update_id] = time.perf_counter()
+
+    processor = ShardedUpdateProcessor(workers=8, shard_key=lambda u: u.effective_chat.id)
+    started = time.perf_counter()
+    await dispatch(processor, [update(0, 0)] + [update(c, c) for c in range(1, 6)], handler)
+    assert all(finished[i] - started < 0.1 for i in range(1, 6))
+
+
+@pytest.mark.asyncio
+async def test_stats_report_depth_and_latency():
+    processor = ShardedUpdateProcessor(workers=2)
+
+    async def handler(u):
+        await asyncio.sleep(0)
+
+    async with processor:
+        await asyncio.gather(*(processor.process_update(update(c, c), handler(None)) for c in range(6)))
+        stats = processor.stats()
+    assert stats["queue_depth"] == 0
+    assert sum(s["processed"] for s in stats["shards"]) == 6
+    assert all(s["max_latency_ms"] >= 0 for s in stats["shards"])
+
+
+@pytest.mark.asyncio
+async def test_cancelled_update_does_not_stop_its_shard():
+    seen = []
+
+    async def handler(u):
+        if u.update_id == 0:
+            raise asyncio.CancelledError()
+        seen.append(u.update_id)
+
+    processor = ShardedUpdateProcessor(workers=1)
+    async with processor:
+        await processor.process_update(update(1, 0), handler(update(1, 0)))
+        assert not processor._shards[0].task.done()
+        await processor.process_update(update(1, 1), handler(update(1, 1)))
+    assert seen == [1]
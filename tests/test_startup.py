@@ -0,0 +1,107 @@
+from types import SimpleNamespace
+import asyncio
+import subprocess
+import sys
+
+import mongomock
+import pytest
+
+import SimplRefQ
+
+
+@pytest.fixture(scope='module')
+def app_client():
+    client = mongomock.MongoClient()
+    client[SimplRefQ.DB_NAME].users.insert_one({"user_id": 1, "username": "alice", "balance": 5})
+    SimplRefQ.init(client, use_transactions=False)
+    return SimplRefQ.app.test_client()
+
+
+def test_import_has_no_side_effects():
+    code = (
+        "import sys, SimplRefQ; "
+        "heavy = [m for m in ('telegram', 'requests', 'apscheduler', 'firebase_admin') if m in sys.modules]; "
+        "assert not heavy, heavy; "
+        "assert SimplRefQ.client is None and SimplRefQ.scheduler is None and SimplRefQ.application is None"
+    )
+    subprocess.run([sys.executable, '-c', code], check=True)
+
+
+def test_init_is_idempotent(app_client):
+    users = SimplRefQ.users_collection
+    SimplRefQ.init()
+    assert SimplRefQ.users_collection is users
+
+
+def test_first_request_is_served(app_client):
+    response = app_client.get('/api/get_user/1')
+    assert response.status_code == 200
+    assert response.json["username"] == "alice"
+
+
+def test_services_share_the_audit_writer(app_client):
+    assert SimplRefQ.audit_writer is not None
+    for service in (SimplRefQ.transfer_engine, SimplRefQ.task_completion, SimplRefQ.user_onboarder):
+        assert service.audit is SimplRefQ.audit_writer
+
+
+def test_daily_reward_is_paid_once_despite_a_stale_profile(app_client):
+    SimplRefQ.users_collection.insert_one({"user_id": 7001, "balance": 0, "last_daily_reward": "2000-01-01"})
+    SimplRefQ.profile_cache.get(7001)  # a stale copy that still allows the claim
+    assert SimplRefQ.claim_daily_reward(7001)
+    assert not SimplRefQ.claim_daily_reward(7001)
+    assert not SimplRefQ.check_daily_reward(7001)
+    assert SimplRefQ.users_collection.find_one({"user_id": 7001})["balance"] == 10
+    assert not SimplRefQ.claim_daily_reward(999999)  # unknown users are not created
+
+
+def test_daily_reward_button_uses_the_conditional_claim(app_client):
+    SimplRefQ.users_collection.insert_one({"user_id": 7002, "balance": 0, "last_daily_reward": None})
+    replies = []
+
+    async def send_message(chat_id, text, **kwargs):
+        replies.append(text)
+
+    def tap(user_id):
+        update = SimpleNamespace(callback_query=SimpleNamespace(from_user=SimpleNamespace(id=user_id)),
+                                 effective_chat=SimpleNamespace(id=user_id))
+        context = SimpleNamespace(bot=SimpleNamespace(send_message=send_message))
+        asyncio.run(SimplRefQ.daily_rewards(update, context))
+
+    tap(7002)
+    tap(7002)
+    tap(999998)
+    assert replies == ["You have successfully claimed 10 $REBLCOINS!",
+                       "You've already claimed your daily reward today.",
+                       "No user record found. Please register using /start."]
+    assert SimplRefQ.users_collection.find_one({"user_id": 7002})["balance"] == 10
+    assert not SimplRefQ.claim_daily_reward(7002)  # the mini-app path sees the same claim
+
+
+def test_users_referred_before_the_graph_cannot_be_referred_again(app_client):
+    # init() alone ensures the unique user_id index the "already referred" guard relies on
+    SimplRefQ.users_collection.insert_many([{"user_id": 8001, "referrals": 1},
+                                            {"user_id": 8002, "referred_by": 8001},
+                                            {"user_id": 8003, "referrals": 0}])
+    with pytest.raises(ValueError, match="already been referred"):
+        SimplRefQ.add_referral(8003, 8002)
+    assert SimplRefQ.users_collection.find_one({"user_id": 8002})["referred_by"] == 8001
+    assert SimplRefQ.users_collection.find_one({"user_id": 8003})["referrals"] == 0
+    SimplRefQ.add_referral(8003, 8004)
+    assert SimplRefQ.users_collection.find_one({"user_id": 8004})["referred_by"] == 8003
+    with pytest.raises(ValueError, match="cycle"):
+        SimplRefQ.add_referral(8004, 8003)
+    assert SimplRefQ.users_collection.find_one({"user_id": 8003})["referred_by"] is None
+
+
+def test_rejected_referral_removes_the_user_it_created(app_client):
+    SimplRefQ.add_referral(8101, 8102)
+    SimplRefQ.delete_user(8102)  # still in the referral graph
+    with pytest.raises(ValueError):
+        SimplRefQ.add_referral(8103, 8102)
+    assert SimplRefQ.users_collection.count_documents({"user_id": 8102}) == 0
+
+
+def test_flask_does_not_accept_telegram_updates(app_client):
+    # Updates go to the ASGI webhook, which runs the bot application; Flask would drop them
+    assert app_client.post('/webhook', json={"update_id": 1}).status_code == 404
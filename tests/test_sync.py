@@ -0,0 +1,94 @@
+from urllib.parse import urlencode
+import hashlib
+import hmac
+import json
+import time
+
+import mongomock
+import pytest
+
+import SimplRefQ
+
+from src.api.sync import SyncService
+from src.api.telegram_auth import validate_init_data
+from src.cache.profile import ProfileCache
+
+
+@pytest.fixture
+def service():
+    users = mongomock.MongoClient().db.users
+    users.insert_many([
+        {"user_id": 1, "balance": 50, "referrals": 1, "completed_tasks_count": 1, "assigned_tasks_count": 3,
+         "rank": 2},
+        {"user_id": 2, "balance": 80, "referrals": 0, "rank": 1, "wallet_address": "0xabc"},
+    ])
+    return SyncService(users, ProfileCache(users))
+
+
+def test_payload_combines_profile_rank_and_totals(service):
+    payload = service.payload(1)
+    assert payload["balance"] == 50
+    assert payload["tasksCompleted"] == 1
+    assert payload["progress"] == 25
+    assert payload["leadershipRank"] == 2
+    assert payload["globalBalance"] == 130
+    assert service.payload(2)["walletAddress"] == "0xabc"
+    assert service.payload(3) is None
+
+
+def test_global_stats_are_cached(service):
+    assert service.global_stats()["globalBalance"] == 130
+    service.users.insert_one({"user_id": 3, "balance": 1000})
+    assert service.global_stats()["globalBalance"] == 130
+    service.stats_ttl = 0
+    service._stats_expires = 0
+    assert service.global_stats()["globalBalance"] == 1130
+
+
+def test_payloads_are_cached_until_the_profile_changes(service):
+    payload, etag = service.get(1)
+    service.users.update_one({"user_id": 1}, {"$set": {"balance": 60}})
+    assert service.get(1) == (payload, etag)  # a 304 is served without rebuilding
+    service.profiles.invalidate(1)
+    payload, changed = service.get(1)
+    assert payload["balance"] == 60 and changed != etag
+    assert service.get(3) is None
+    assert service.stats()["hits"] == 1
+
+
+def test_etag_tracks_payload(service):
+    first = service.etag(service.payload(1))
+    assert service.etag(service.payload(1)) == first
+    assert service.etag(dict(service.payload(1), balance=51)) != first
+
+
+def signed_init_data(token, user, auth_date=None):
+    fields = {"auth_date": str(auth_date or int(time.time())), "user": json.dumps(user)}
+    check = "\n".join(f"{k}={v}" for k, v in sorted(fields.items()))
+    secret = hmac.new(b"WebAppData", token.encode(), hashlib.sha256).digest()
+    fields["hash"] = hmac.new(secret, check.encode(), hashlib.sha256).hexdigest()
+    return urlencode(fields)
+
+
+def test_validate_init_data():
+    init_data = signed_init_data("123:abc", {"id": 7})
+    assert validate_init_data(init_data, "123:abc") == {"id": 7}
+    assert validate_init_data(init_data, "123:other") is None
+    assert validate_init_data(signed_init_data("123:abc", {"id": 7}, auth_date=1), "123:abc") is None
+
+
+def test_sync_route_requires_signed_init_data(monkeypatch):
+    monkeypatch.setattr(SimplRefQ, 'TELEGRAM_BOT_TOKEN', "123:abc")
+    SimplRefQ.init(mongomock.MongoClient(), use_transactions=False)
+    SimplRefQ.users_collection.insert_one({"user_id": 4242, "balance": 3, "referrals": 0})
+    http = SimplRefQ.app.test_client()
+    headers = {'X-Telegram-Init-Data': signed_init_data("123:abc", {"id": 4242})}
+    response = http.get('/api/sync', headers=headers)
+    assert response.status_code == 200
+    assert response.json["balance"] == 3
+    again = http.get('/api/sync', headers=dict(headers, **{'If-None-Match': response.headers['ETag']}))
+    assert again.status_code == 304
+    assert http.get('/api/sync').status_code == 401
+    assert http.get('/api/sync?user_id=4242').status_code == 401
+    forged = {'X-Telegram-Init-Data': signed_init_data("123:other", {"id": 4242})}
+    assert http.get('/api/sync', headers=forged).status_code == 401
@@ -0,0 +1,60 @@
+import json
+import time
+
+import mongomock
+import pytest
+
+from src.tasks.catalog import TaskCatalog
+
+
+@pytest.fixture
+def db():
+    db = mongomock.MongoClient().db
+    db.tasks.insert_many([{"task_name": f"task {i}", "reward": i} for i in range(25)])
+    return db
+
+
+def test_pages_cover_every_task_once(db):
+    catalog = TaskCatalog(db.tasks, db.catalog_versions)
+    seen, cursor = [], None
+    while True:
+        tasks, cursor = catalog.page(cursor, limit=10)
+        seen.extend(task["id"] for task in tasks)
+        if cursor is None:
+            break
+    assert len(seen) == len(set(seen)) == 25
+    assert seen == sorted(seen)
+    assert catalog.reloads == 1
+
+
+def test_streamed_page_matches_page(db):
+    catalog = TaskCatalog(db.tasks, db.catalog_versions)
+    tasks, cursor = catalog.page(limit=7)
+    streamed = json.loads("".join(catalog.iter_page_json(limit=7)))
+    assert streamed == {"tasks": tasks, "next_cursor": cursor}
+    assert json.loads("".join(catalog.iter_page_json(after=max(catalog._view().ids))))["tasks"] == []
+
+
+def test_version_bump_reloads(db):
+    catalog = TaskCatalog(db.tasks, db.catalog_versions)
+    other_process = TaskCatalog(db.tasks, db.catalog_versions)
+    assert len(other_process) == 25
+    task_id = db.tasks.insert_one({"task_name": "new", "reward": 100}).inserted_id
+    catalog.bump_version()
+    assert catalog.get(task_id)["reward"] == 100
+    assert other_process.get(task_id) is None
+    assert other_process._current_version() != other_process._view().version
+
+
+def test_background_poll_picks_up_version_changes(db):
+    catalog = TaskCatalog(db.tasks, db.catalog_versions, poll_interval=0.01)
+    catalog.start()
+    try:
+        task_id = db.tasks.insert_one({"task_name": "late", "reward": 1}).inserted_id
+        TaskCatalog(db.tasks, db.catalog_versions).bump_version()
+        deadline = time.monotonic() + 2
+        while catalog.get(task_id) is None and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert catalog.get(task_id) is not None
+    finally:
+        catalog.stop()
@@ -0,0 +1,75 @@
+import mongomock
+import pytest
+
+from src.tasks.catalog import TaskCatalog
+from src.tasks.completion import TaskCompletion, TaskNotAssigned
+from src.tasks.store import UserTaskStore
+
+
+@pytest.fixture
+def db():
+    db = mongomock.MongoClient().db
+    db.users.insert_many([{"user_id": i, "balance": 0, "referrals": 0} for i in (1, 2, 3)])
+    UserTaskStore(db.user_tasks, db.users).create_indexes()
+    return db
+
+
+@pytest.fixture
+def setup(db):
+    task_ids = [str(db.tasks.insert_one({"task_name": name, "reward": reward}).inserted_id)
+                for name, reward in (("follow", 10), ("share", 25))]
+    store = UserTaskStore(db.user_tasks, db.users)
+    for user_id in (1, 2, 3):
+        for task_id in task_ids:
+            store.assign(user_id, task_id)
+    completion = TaskCompletion(db.user_tasks, db.users, TaskCatalog(db.tasks, db.task_versions))
+    return completion, task_ids
+
+
+def test_complete_rewards_once(setup, db):
+    completion, (follow, _) = setup
+    user = completion.complete(1, follow)
+    assert user["balance"] == 10 and user["reward"] == 10
+    with pytest.raises(TaskNotAssigned):
+        completion.complete(1, follow)
+    with pytest.raises(ValueError, match="does not exist"):
+        completion.complete(1, "missing")
+    stored = db.users.find_one({"user_id": 1})
+    assert stored["completed_tasks_count"] == 1 and stored["assigned_tasks_count"] == 1
+
+
+def test_complete_many(setup, db):
+    completion, (follow, share) = setup
+    completion.complete(3, follow)
+    report = completion.complete_many([(1, follow), (1, share), (1, share), (3, follow), (2, "missing")])
+    assert report["completed"] == 2
+    assert report["credited_users"] == [1]
+    assert sorted(report["rejected"]) == [
+        (1, share, "Duplicate completion in batch."),
+        (2, "missing", "Task does not exist."),
+        (3, follow, "Task not assigned to this user."),
+    ]
+    user = db.users.find_one({"user_id": 1})
+    assert user["balance"] == 35 and user["completed_tasks_count"] == 2 and user["assigned_tasks_count"] == 0
+
+
+def test_complete_many_rejects_malformed_items_and_audits_like_complete(setup, db):
+    completion, (follow, share) = setup
+
+    class RecordingAudit:
+        def __init__(self):
+            self.events = []
+
+        def log_many(self, events):
+            self.events.extend(events)
+
+    completion.audit = RecordingAudit()
+    completion.complete(2, follow)
+    single = list(completion.audit.events)
+    completion.audit.events.clear()
+
+    report = completion.complete_many([[1, follow], 7, [1], [[1], share], (True, share)])
+    assert report["completed"] == 1
+    assert [item for item, _, _ in report["rejected"]] == [7, [1], [[1], share], (True, share)]
+    assert [e["event_type"] for e in completion.audit.events] == [e["event_type"] for e in single]
+    assert completion.audit.events[0]["description"] == single[0]["description"]
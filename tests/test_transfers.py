@@ -0,0 +1,98 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import mongomock
+import pytest
+from pymongo.errors import AutoReconnect
+
+from src.ledger.transfers import InsufficientBalance, TransferEngine
+
+
+@pytest.fixture
+def users():
+    collection = mongomock.MongoClient().db.users
+    collection.insert_many([
+        {"user_id": 1, "balance": 100, "referrals": 0},
+        {"user_id": 2, "balance": 0, "referrals": 3},
+    ])
+    return collection
+
+
+def balance(users, user_id):
+    user = users.find_one({"user_id": user_id})
+    return user["balance"] if user else None
+
+
+def test_transfer_moves_balance(users):
+    sender, receiver = TransferEngine(users).transfer(1, 2, 40)
+    assert sender["balance"] == 60
+    assert receiver == {"user_id": 2, "balance": 40, "referrals": 3}
+
+
+def test_transfer_rejects_overdraft(users):
+    with pytest.raises(InsufficientBalance):
+        TransferEngine(users).transfer(1, 2, 101)
+    assert balance(users, 1) == 100
+    assert balance(users, 2) == 0
+
+
+def test_concurrent_transfers_never_overdraw(users):
+    engine = TransferEngine(users)
+
+    def attempt(_):
+        try:
+            engine.transfer(1, 2, 30)
+            return True
+        except InsufficientBalance:
+            return False
+
+    with ThreadPoolExecutor(8) as pool:
+        succeeded = sum(pool.map(attempt, range(20)))
+    assert succeeded == 3
+    assert balance(users, 1) == 10
+    assert balance(users, 2) == 90
+
+
+def test_transfer_many_applies_batches(users):
+    engine = TransferEngine(users, batch_size=2)
+    report = engine.transfer_many([(1, 2, 10), (1, 3, 20), (1, 4, 30), (2, 1, 50), (5, 1, 1), (1, 1, 1)])
+    assert report["applied"] == 3
+    assert balance(users, 1) == 40
+    assert balance(users, 2) == 10
+    assert balance(users, 3) == 20
+    assert balance(users, 4) == 30
+    reasons = sorted(reason for *_, reason in report["rejected"])
+    assert reasons == ["Cannot transfer balance to yourself.", "Insufficient balance.", "Insufficient balance."]
+
+
+class RecordingWriter:
+    def __init__(self):
+        self.events = []
+
+    def log_many(self, events):
+        self.events.extend(events)
+
+
+def test_transfer_many_refunds_senders_when_credits_fail(users, monkeypatch):
+    real_bulk_write = users.bulk_write
+    calls = []
+
+    def failing_credit(requests, **kwargs):
+        calls.append(requests)
+        if len(calls) == 1:
+            raise AutoReconnect("connection lost")
+        return real_bulk_write(requests, **kwargs)
+
+    monkeypatch.setattr(users, 'bulk_write', failing_credit)
+    with pytest.raises(AutoReconnect):
+        TransferEngine(users).transfer_many([(1, 2, 10), (1, 3, 20)])
+    assert balance(users, 1) == 100
+    assert balance(users, 2) == 0
+
+
+def test_transfer_many_audits_both_sides_like_transfer(users):
+    writer = RecordingWriter()
+    TransferEngine(users, audit_writer=writer).transfer_many([(1, 2, 10)])
+    assert writer.events == [
+        {"user_id": 1, "event_type": "balance_update", "description": "Balance updated by -10 coins."},
+        {"user_id": 2, "event_type": "balance_update", "description": "Balance updated by 10 coins."},
+    ]
@@ -0,0 +1,62 @@
+import mongomock
+import pytest
+
+from src.tasks.migrate import migrate_task_arrays
+from src.tasks.store import UserTaskStore
+
+
+@pytest.fixture
+def db():
+    return mongomock.MongoClient().db
+
+
+@pytest.fixture
+def store(db):
+    store = UserTaskStore(db.user_tasks, db.users)
+    store.create_indexes()
+    db.users.insert_one({"user_id": 1, "balance": 0})
+    return store
+
+
+def test_assign_and_complete_keep_counters(store, db):
+    assert store.assign(1, "t1")
+    assert not store.assign(1, "t1")
+    assert store.assign(1, "t2")
+    assert store.complete(1, "t1")
+    assert not store.complete(1, "t1")
+    assert not store.complete(1, "t3")
+    user = db.users.find_one({"user_id": 1})
+    assert user["assigned_tasks_count"] == 1
+    assert user["completed_tasks_count"] == 1
+    assert store.is_assigned(1, "t2") and not store.is_assigned(1, "t1")
+    assert store.task_ids(1, "completed") == ["t1"]
+
+
+def test_mark_completed_recounts(store, db):
+    store.assign(1, "t1")
+    counts = store.mark_completed(1, ["t1", "t9"])
+    assert counts == {"assigned_tasks_count": 0, "completed_tasks_count": 2}
+
+
+def test_migration_moves_arrays_and_is_resumable(db):
+    db.users.insert_many([
+        {"user_id": 1, "assigned_tasks": ["a", "b"], "completed_tasks": ["b", "c"]},
+        {"user_id": 2, "tasks_completed": ["x"]},
+        {"user_id": 3, "balance": 5},
+    ])
+    report = migrate_task_arrays(db.users, db.user_tasks, batch_size=1)
+    assert report["users"] == 2
+    assert report["task_rows"] == 4
+    user = db.users.find_one({"user_id": 1})
+    assert "assigned_tasks" not in user and "completed_tasks" not in user
+    assert user["assigned_tasks_count"] == 1 and user["completed_tasks_count"] == 2
+    assert db.user_tasks.count_documents({"user_id": 1, "status": "completed"}) == 2
+    assert migrate_task_arrays(db.users, db.user_tasks)["users"] == 0
+
+
+def test_migration_keeps_rows_assigned_after_deploy(store, db):
+    db.users.update_one({"user_id": 1}, {"$set": {"assigned_tasks": ["a"], "completed_tasks": ["b"]}})
+    store.assign(1, "new")  # written by the new code before the migration ran
+    migrate_task_arrays(db.users, db.user_tasks)
+    user = db.users.find_one({"user_id": 1})
+    assert user["assigned_tasks_count"] == 2 and user["completed_tasks_count"] == 1
@@ -85,4 +85,17 @@ def test_activity_patterns(wallet_manager):
     # Verify engagement metrics
     engagement = wallet_manager.get_user_engagement(user_id)
     assert engagement['wallet_count'] == 1
-    assert engagement['engagement_score'] > 0 
\ No newline at end of file
+    assert engagement['engagement_score'] > 0 
+
+
+def test_clients_are_lazy_and_shared(wallet_manager):
+    from src.wallet import wallet_manager as module
+    module._shared_clients.clear()
+
+    # Construction alone builds no chain client or model
+    manager = WalletManager()
+    assert module._shared_clients == {}
+
+    # First use builds the client once and every manager shares it
+    assert manager.solana is WalletManager().solana
+    assert list(module._shared_clients) == [('solana', 'http://localhost:8899')]
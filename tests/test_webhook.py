@@ -0,0 +1,106 @@
+import asyncio
+
+from fastapi.testclient import TestClient
+
+from src.api.dedup import UpdateDeduplicator
+from src.api.main import create_app
+
+
+class FakeApplication:
+    def __init__(self):
+        self.bot = None
+        self.update_queue = asyncio.Queue()
+        self.started = False
+
+    async def initialize(self):
+        pass
+
+    async def start(self):
+        self.started = True
+
+    async def stop(self):
+        self.started = False
+
+    async def shutdown(self):
+        pass
+
+
+def message(update_id, text="/start"):
+    return {
+        "update_id": update_id,
+        "message": {
+            "message_id": update_id, "date": 0, "text": text,
+            "chat": {"id": 1, "type": "private"},
+            "from": {"id": 1, "is_bot": False, "first_name": "A"},
+        },
+    }
+
+
+def test_deduplicator_window():
+    dedup = UpdateDeduplicator(window=2)
+    assert not dedup.seen(1)
+    assert dedup.seen(1)
+    dedup.seen(2)
+    dedup.seen(3)  # evicts 1
+    assert not dedup.seen(1)
+    assert dedup.duplicates == 1
+
+
+def test_retried_updates_are_acknowledged_once():
+    fake = FakeApplication()
+    app = create_app(lambda: fake)
+    with TestClient(app) as client:
+        for update_id in (10, 11, 10, 11, 12):
+            assert client.post("/webhook", json=message(update_id)).status_code == 200
+    received = []
+    while not fake.update_queue.empty():
+        received.append(fake.update_queue.get_nowait().update_id)
+    assert received == [10, 11, 12]
+    assert app.state.dedup.duplicates == 2
+
+
+def test_rejects_bad_payloads_and_secret():
+    app = create_app(FakeApplication, secret_token="s3cret")
+    with TestClient(app) as client:
+        headers = {"X-Telegram-Bot-Api-Secret-Token": "s3cret"}
+        assert client.post("/webhook", json=message(1)).status_code == 403
+        assert client.post("/webhook", content=b"not json", headers=headers).status_code == 400
+        assert client.post("/webhook", json={"message": {}}, headers=headers).status_code == 400
+        assert client.post("/webhook", json={"update_id": [1]}, headers=headers).status_code == 400
+        assert client.post("/webhook", json={"update_id": "1"}, headers=headers).status_code == 400
+        assert client.post("/api/webhook", json=message(1), headers=headers).status_code == 200
+
+
+def test_metrics_endpoint_reports_webhook_latency():
+    app = create_app(FakeApplication)
+    with TestClient(app) as client:
+        client.post("/webhook", json=message(1))
+        body = client.get("/metrics").text
+    assert 'simplrefq_http_request_seconds_count{app="webhook",method="POST",route="/webhook",status="200"}' in body
+    assert 'simplrefq_queue_depth{queue="webhook_intake"}' in body
+
+
+def test_lifespan_registers_the_webhook_with_its_secret():
+    calls = []
+
+    async def register(application, secret_token):
+        calls.append((application.started, secret_token))
+
+    with TestClient(create_app(FakeApplication, secret_token="s3cret", register_webhook=register)):
+        pass
+    assert calls == [(True, "s3cret")]
+
+
+def test_register_webhook_sends_allowed_updates_and_secret():
+    import SimplRefQ
+
+    class FakeBot:
+        async def set_webhook(self, url, **kwargs):
+            self.call = (url, kwargs)
+            return True
+
+    bot = FakeBot()
+    assert asyncio.run(SimplRefQ.register_webhook(bot, "https://example.test/api/webhook", secret_token="s3cret"))
+    assert bot.call == ("https://example.test/api/webhook",
+                        {"allowed_updates": SimplRefQ.ALLOWED_UPDATES, "secret_token": "s3cret"})
+    assert "chat_member" in SimplRefQ.ALLOWED_UPDATES